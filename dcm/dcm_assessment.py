@@ -3,7 +3,6 @@ Created on 2024-01-10
 
 @author: wf
 """
-import os
 from datetime import datetime, timezone
 
 from ngwidgets.progress import NiceguiProgressbar
@@ -111,6 +110,7 @@ class ButtonRow:
             self.achievement.date_assessed_iso = date_assessed_iso
 
         self.set_button_states(self.achievement)
+        self.assessment.mark_dirty()
         # refresh the ui
         self.row.update()
         # show achievement_view
@@ -144,31 +144,23 @@ class Assessment:
         self.reset(dcm=dcm, learner=learner)
         self.setup_ui()
 
-    def store(self) -> str:
+    def mark_dirty(self):
+        """
+        mark the learner's achievements as changed - they
+        are stored in the background
+        """
+        self.webserver.learner_store.mark_dirty(self.learner)
+
+    async def store(self) -> str:
         """
         Store the current state of
-        the learner's achievements.
+        the learner's achievements now.
 
         Returns(str): the path to the file
         """
         file_path = None
         try:
-            # Serialize the learner object to JSON
-            learner_data_json = self.learner.to_json(indent=2)
-
-            # Determine the file path for storing the learner's data
-            filename = self.learner.file_name + ".json"
-            file_path = os.path.join(
-                self.webserver.server_config.storage_path, filename
-            )
-
-            # Write the serialized data to the file
-            with open(file_path, "w") as file:
-                file.write(learner_data_json)
-
-            if self.debug:
-                print(f"Learner data stored in {file_path}")
-
+            file_path = await self.webserver.learner_store.store(self.learner)
         except Exception as ex:
             self.webserver.handle_exception(ex, self.webserver.do_trace)
         return file_path
@@ -194,6 +186,7 @@ class Assessment:
         if self.learner.achievements is None:
             self.learner.achievements = []
             self.setup_achievements()
+            self.mark_dirty()
         self.total = len(self.learner.achievements)
 
     def clear(self):
@@ -215,17 +208,13 @@ class Assessment:
         """
         Setup achievements based on the competence tree.
 
-        This method iterates over the competence aspects and their facets,
-        constructs a path for each facet, and creates an Achievement instance
-        based on the path. These achievements are then added to the learner's
-        achievements list.
+        This method iterates over the competence areas and their facets
+        of any depth in depth first order and creates an Achievement instance
+        based on the path of each element. These achievements are then added
+        to the learner's achievements list.
         """
-        for aspect in self.competence_tree.aspects:
-            for area in aspect.areas:
-                self.add_achievement(area.path)
-                for facet in area.facets:
-                    # Construct the path for the facet
-                    self.add_achievement(facet.path)
+        for element in self.competence_tree.iter_subtree(min_depth=2):
+            self.add_achievement(element.path)
 
     def add_achievement(self, path):
         # Create a new Achievement instance with the constructed path
@@ -362,12 +351,10 @@ class Assessment:
         """
         self.index_view.text = self.get_index_str()
         achievement = self.current_achievement
-        self.store()
-        self.webserver.render_dcm(
+        self.webserver.update_dcm(
             self.dcm,
             self.learner,
             selected_paths=[achievement.path],
-            clear_assessment=False,
         )
         self.button_row.achievement = achievement
         self.button_row.set_button_states(achievement)
@@ -0,0 +1,354 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import dcm
+from dcm.dcm_core import CompetenceTree, DynamicCompetenceMap
+from dcm.svg import SVGConfig
+
+
+@dataclass
+class CacheStats:
+    """
+    counters of a cache
+
+    Attributes:
+        hits (int): number of lookups that found a valid entry
+        misses (int): number of lookups that found no (valid) entry
+        evictions (int): number of entries removed to respect the bounds
+        expirations (int): number of entries removed since their time to live was exceeded
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class LRUCache:
+    """
+    a thread safe, bounded least recently used cache
+    with an optional time to live for the entries
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """
+        constructor
+
+        Args:
+            max_entries(int): the maximum number of entries to keep
+            ttl(float): time to live of an entry in seconds - None for no expiry
+            max_size(int): the maximum total size of the entries - None for no limit
+            timer(Callable): the clock to use for the time to live handling
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timer = timer
+        self.stats = CacheStats()
+        self.total_size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries and not self._is_expired(key)
+
+    def _is_expired(self, key: Hashable) -> bool:
+        _value, timestamp, _size = self._entries[key]
+        expired = self.ttl is not None and self.timer() - timestamp > self.ttl
+        return expired
+
+    def _remove(self, key: Hashable):
+        value, _timestamp, size = self._entries.pop(key)
+        self.total_size -= size
+        self.on_remove(key, value)
+
+    def on_remove(self, key: Hashable, value: Any):
+        """
+        callback for entries that are evicted, expired or replaced
+        - to be overridden by subclasses that keep additional indices
+        """
+        pass
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        get the value for the given key and mark it as recently used
+
+        Args:
+            key(Hashable): the key to look up
+            default(Any): the value to return if there is no valid entry
+
+        Returns:
+            Any: the cached value or the default
+        """
+        with self._lock:
+            if key in self._entries:
+                if self._is_expired(key):
+                    self._remove(key)
+                    self.stats.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    value, _timestamp, _size = self._entries[key]
+                    return value
+            self.stats.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any, size: int = 1):
+        """
+        put the given value into the cache evicting
+        the least recently used entries if necessary
+
+        Args:
+            key(Hashable): the key
+            value(Any): the value to cache
+            size(int): the (estimated) size of the value for the max_size bound
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self.timer(), size)
+            self.total_size += size
+            # always keep the newest entry even if it exceeds max_size on its own
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_size is not None and self.total_size > self.max_size)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats.evictions += 1
+
+    def clear(self):
+        """
+        remove all entries (the counters are kept)
+        """
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        get my counters and bounds as a dict
+        """
+        with self._lock:
+            stats = asdict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["total_size"] = self.total_size
+            stats["max_size"] = self.max_size
+            stats["ttl"] = self.ttl
+        return stats
+
+
+class RenderCache(LRUCache):
+    """
+    cache for rendered SVG markup keyed by a content hash
+    of the render request
+    """
+
+    @classmethod
+    def get_key(
+        cls,
+        definition: str,
+        markup: str,
+        config: Optional[SVGConfig],
+        text_mode: str,
+    ) -> str:
+        """
+        get the content hash for the given render parameters
+
+        Args:
+            definition(str): the JSON or YAML definition of the competence tree
+            markup(str): the markup of the definition - 'json' or 'yaml'
+            config(SVGConfig): the SVG configuration - None for the default configuration
+            text_mode(str): the text display mode
+
+        Returns:
+            str: the hex digest identifying the render result
+        """
+        if config is None:
+            config = SVGConfig()
+        config_json = json.dumps(asdict(config), sort_keys=True)
+        sha256 = hashlib.sha256()
+        # a new version of dcm might render differently
+        for part in [dcm.__version__, markup, text_mode, config_json, definition]:
+            sha256.update(part.encode("utf-8"))
+            sha256.update(b"\0")
+        key = sha256.hexdigest()
+        return key
+
+    @classmethod
+    def get_etag(cls, key: str) -> str:
+        """
+        get the (strong) HTTP entity tag for the given key
+        """
+        etag = f'"{key}"'
+        return etag
+
+    @classmethod
+    def etag_matches(cls, etag: str, if_none_match: Optional[str]) -> bool:
+        """
+        check whether the given etag matches an If-None-Match header value
+
+        Args:
+            etag(str): the entity tag of the current representation
+            if_none_match(str): the value of the If-None-Match header (might be None)
+
+        Returns:
+            bool: True if the client already has the current representation
+        """
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            # weak comparison as specified for If-None-Match
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == "*" or candidate == etag:
+                return True
+        return False
+
+
+class TreeRegistry(LRUCache):
+    """
+    process wide registry of parsed competence trees keyed by
+    the digest of their definition
+
+    The size of an entry is estimated by the length of its definition text
+    so that max_size bounds the memory used by the parsed trees
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_size: Optional[int] = 64 * 1024 * 1024,
+    ):
+        """
+        constructor
+
+        Args:
+            max_entries(int): the maximum number of trees to keep
+            max_size(int): the maximum total length of the definitions of the kept trees
+        """
+        super().__init__(max_entries=max_entries, max_size=max_size)
+        self.digests_by_tree_id = {}
+
+    @classmethod
+    def get_instance(cls) -> "TreeRegistry":
+        """
+        get the process wide registry
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def get_digest(cls, definition: str, markup: str) -> str:
+        """
+        get the digest of the given definition
+
+        Args:
+            definition(str): the JSON or YAML definition of the competence tree
+            markup(str): the markup of the definition - 'json' or 'yaml'
+
+        Returns:
+            str: the hex digest of the definition
+        """
+        sha256 = hashlib.sha256()
+        sha256.update(markup.encode("utf-8"))
+        sha256.update(b"\0")
+        sha256.update(definition.encode("utf-8"))
+        digest = sha256.hexdigest()
+        return digest
+
+    def on_remove(self, key: str, value: DynamicCompetenceMap):
+        tree_id = value.competence_tree.id
+        if self.digests_by_tree_id.get(tree_id) == key:
+            del self.digests_by_tree_id[tree_id]
+
+    def register(
+        self,
+        dcm: DynamicCompetenceMap,
+        digest: str,
+        size: int = 1,
+        index_tree_id: bool = False,
+    ):
+        """
+        register the given parsed competence map
+
+        Args:
+            dcm(DynamicCompetenceMap): the competence map
+            digest(str): the digest of the definition the map was parsed from
+            size(int): the estimated size of the competence map
+            index_tree_id(bool): if True make the map available via get_by_tree_id -
+                only for trusted definitions e.g. of the example catalog
+        """
+        with self._lock:
+            self.put(digest, dcm, size=size)
+            if index_tree_id:
+                self.digests_by_tree_id[dcm.competence_tree.id] = digest
+
+    def get_dcm(
+        self, name: str, definition: str, markup: str = "json"
+    ) -> DynamicCompetenceMap:
+        """
+        get the competence map for the given definition - parsing it
+        only if it has not been registered yet
+
+        The definition is e.g. the body of a request and therefore
+        cached by its digest only - it is not available via get_by_tree_id
+
+        Args:
+            name(str): a name identifier for the definition
+            definition(str): the JSON or YAML definition of the competence tree
+            markup(str): the markup of the definition - 'json' or 'yaml'
+
+        Returns:
+            DynamicCompetenceMap: the (shared) competence map
+        """
+        digest = self.get_digest(definition, markup)
+        dcm = self.get(digest)
+        if dcm is None:
+            dcm = DynamicCompetenceMap.from_definition_string(
+                name, definition, content_class=CompetenceTree, markup=markup
+            )
+            self.register(dcm, digest, size=len(definition))
+        return dcm
+
+    def get_by_tree_id(self, tree_id: str) -> Optional[DynamicCompetenceMap]:
+        """
+        get the most recently registered competence map for the given tree id
+
+        Args:
+            tree_id(str): the id of the competence tree
+
+        Returns:
+            DynamicCompetenceMap: the competence map or None if no such tree is registered
+        """
+        with self._lock:
+            digest = self.digests_by_tree_id.get(tree_id)
+            dcm = self.get(digest) if digest is not None else None
+        return dcm
@@ -0,0 +1,323 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from dataclasses_json import dataclass_json
+
+from dcm.dcm_cache import TreeRegistry
+from dcm.dcm_core import CompetenceTree, DynamicCompetenceMap
+from dcm.dcm_snapshot import CompetenceTreeSnapshot
+
+
+@dataclass_json
+@dataclass
+class CatalogEntry:
+    """
+    a competence tree definition file known to the catalog
+
+    Attributes:
+        file_path (str): the absolute path of the definition file
+        markup (str): the markup of the file - 'json' or 'yaml'
+        mtime (float): the modification time of the file when it was indexed
+        tree_id (Optional[str]): the id of the competence tree - None if the file has not been parsed yet
+        digest (Optional[str]): the digest of the definition - None if the file has not been parsed yet
+        valid (bool): False if the file is not a valid competence tree definition
+    """
+
+    file_path: str
+    markup: str
+    mtime: float
+    tree_id: Optional[str] = None
+    digest: Optional[str] = None
+    valid: bool = True
+
+    @property
+    def is_indexed(self) -> bool:
+        return self.tree_id is not None or not self.valid
+
+    def is_modified(self) -> bool:
+        """
+        check whether the file has been modified or deleted since it was indexed
+        """
+        try:
+            modified = os.stat(self.file_path).st_mtime != self.mtime
+        except FileNotFoundError:
+            modified = True
+        return modified
+
+
+@dataclass_json
+@dataclass
+class CatalogIndex:
+    """
+    the persisted index of a catalog
+    """
+
+    version: int = 1
+    entries: List[CatalogEntry] = field(default_factory=list)
+
+
+class ExampleCatalog:
+    """
+    a lazy catalog of competence tree definition files
+
+    At startup only the file names and modification times are scanned.
+    Each tree is parsed the first time it is requested - a fresh compiled
+    snapshot of a definition file in a directory compiled by the operator
+    is preferred over parsing it. The tree ids
+    are kept in a persisted index so that later starts can look
+    up trees by id without parsing other files.
+    """
+
+    def __init__(
+        self,
+        root_paths: List[str],
+        markup: str = "yaml",
+        index_path: Optional[str] = None,
+        tree_registry: Optional[TreeRegistry] = None,
+        snapshot_dirs: Optional[List[str]] = None,
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            root_paths(List[str]): the directories to scan for definition files
+            markup(str): the markup of the definition files - 'json' or 'yaml'
+            index_path(str): the path of the persisted index - None for the default in ~/.dcm
+            tree_registry(TreeRegistry): the registry to keep the parsed trees in - None for the process wide registry
+            snapshot_dirs(List[str]): the directories to load snapshots from - None for the directories compiled with the precompile command
+            debug(bool): if True show debug information
+        """
+        self.root_paths = []
+        self.markup = markup
+        if index_path is None:
+            index_path = os.path.join(
+                os.path.expanduser("~"), ".dcm", f"example_index_{markup}.json"
+            )
+        self.index_path = index_path
+        if tree_registry is None:
+            tree_registry = TreeRegistry.get_instance()
+        self.tree_registry = tree_registry
+        if snapshot_dirs is None:
+            snapshot_dirs = CompetenceTreeSnapshot.get_compiled_directories()
+        self.snapshot_dirs = [
+            os.path.abspath(snapshot_dir) for snapshot_dir in snapshot_dirs
+        ]
+        self.debug = debug
+        self.entries: Dict[str, CatalogEntry] = {}
+        self._lock = threading.RLock()
+        self.indexed_entries = self.load_index()
+        for root_path in root_paths:
+            self.add_root_path(root_path)
+
+    def warn(self, msg: str):
+        print(msg, file=sys.stderr)
+
+    def load_index(self) -> Dict[str, CatalogEntry]:
+        """
+        load the persisted index
+
+        Returns:
+            Dict[str, CatalogEntry]: the indexed entries by file path
+        """
+        indexed_entries = {}
+        if os.path.isfile(self.index_path):
+            try:
+                with open(self.index_path, "r") as index_file:
+                    index = CatalogIndex.from_dict(json.load(index_file))
+                if index.version == CatalogIndex.version:
+                    for entry in index.entries:
+                        indexed_entries[entry.file_path] = entry
+            except Exception as ex:
+                # the index is just an optimization - start from scratch
+                self.warn(f"ignoring invalid catalog index {self.index_path}: {ex}")
+        return indexed_entries
+
+    def save_index(self):
+        """
+        persist the index atomically
+        """
+        with self._lock:
+            index = CatalogIndex(entries=list(self.entries.values()))
+            index_json = index.to_json(indent=2)
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w") as index_file:
+                index_file.write(index_json)
+            os.replace(tmp_path, self.index_path)
+        except OSError as ex:
+            self.warn(f"could not save catalog index {self.index_path}: {ex}")
+
+    def add_root_path(self, root_path: str):
+        """
+        scan the file names and modification times of the given root path
+
+        Args:
+            root_path(str): the directory to scan
+        """
+        root_path = os.path.abspath(root_path)
+        if root_path in self.root_paths:
+            return
+        self.root_paths.append(root_path)
+        file_ext = f".{self.markup}"
+        with self._lock:
+            for dirpath, _dirnames, filenames in os.walk(root_path):
+                for filename in filenames:
+                    if filename.endswith(file_ext):
+                        file_path = os.path.join(dirpath, filename)
+                        mtime = os.stat(file_path).st_mtime
+                        entry = self.indexed_entries.get(file_path)
+                        if entry is None or entry.mtime != mtime:
+                            entry = CatalogEntry(
+                                file_path=file_path, markup=self.markup, mtime=mtime
+                            )
+                        self.entries[file_path] = entry
+            if self.debug:
+                print(f"{len(self.entries)} catalog entries after scanning {root_path}")
+
+    def load_entry(self, entry: CatalogEntry) -> Optional[DynamicCompetenceMap]:
+        """
+        load the competence map of the given entry via the tree registry
+
+        Args:
+            entry(CatalogEntry): the entry to load
+
+        Returns:
+            DynamicCompetenceMap: the competence map or None if the entry is not valid
+            or its file has been deleted
+        """
+        try:
+            mtime = os.stat(entry.file_path).st_mtime
+            if entry.valid and entry.digest and entry.mtime == mtime:
+                # unchanged file that has already been parsed
+                dcm = self.tree_registry.get(entry.digest)
+                if dcm is not None:
+                    return dcm
+            with open(entry.file_path, "r") as definition_file:
+                definition = definition_file.read()
+        except FileNotFoundError:
+            # the file has been deleted since it was scanned
+            with self._lock:
+                self.entries.pop(entry.file_path, None)
+            return None
+        digest = TreeRegistry.get_digest(definition, entry.markup)
+        dcm = self.tree_registry.get(digest)
+        if dcm is None and CompetenceTreeSnapshot.is_compiled(
+            entry.file_path, self.snapshot_dirs
+        ):
+            # prefer a snapshot compiled from the same definition over parsing it
+            snapshot = CompetenceTreeSnapshot.load_fresh(entry.file_path, digest)
+            if snapshot is not None:
+                competence_tree, _digest = snapshot
+                dcm = DynamicCompetenceMap(competence_tree)
+                self.tree_registry.register(
+                    dcm, digest, size=len(definition), index_tree_id=True
+                )
+        if dcm is None:
+            try:
+                data = DynamicCompetenceMap.parse_markup(definition, entry.markup)
+                if DynamicCompetenceMap.is_valid_definition(
+                    data, CompetenceTree.required_keys()
+                ):
+                    dcm = DynamicCompetenceMap.from_definition_data(
+                        data, CompetenceTree
+                    )
+                    self.tree_registry.register(
+                        dcm, digest, size=len(definition), index_tree_id=True
+                    )
+            except Exception as ex:
+                self.warn(f"invalid competence tree definition {entry.file_path}: {ex}")
+        with self._lock:
+            entry.mtime = mtime
+            entry.digest = digest
+            if dcm is None:
+                entry.valid = False
+                entry.tree_id = None
+            else:
+                entry.valid = True
+                entry.tree_id = dcm.competence_tree.id
+        return dcm
+
+    def get(self, tree_id: str) -> Optional[DynamicCompetenceMap]:
+        """
+        get the competence map for the given tree id
+        parsing it on first use
+
+        Args:
+            tree_id(str): the id of the competence tree
+
+        Returns:
+            DynamicCompetenceMap: the competence map or None if there is no such tree
+        """
+        result = None
+        with self._lock:
+            for entry in list(self.entries.values()):
+                if entry.valid and entry.tree_id == tree_id:
+                    dcm = self.load_entry(entry)
+                    # the id of a modified file may have changed
+                    if dcm is not None and dcm.competence_tree.id == tree_id:
+                        result = dcm
+                        break
+        if result is None:
+            result = self.find_unindexed(tree_id)
+        return result
+
+    def find_unindexed(self, tree_id: str) -> Optional[DynamicCompetenceMap]:
+        """
+        parse the files that have not been indexed yet or have been
+        modified since they were indexed until the given tree is found
+
+        Args:
+            tree_id(str): the id of the competence tree
+
+        Returns:
+            DynamicCompetenceMap: the competence map or None if there is no such tree
+        """
+        result = None
+        parsed = False
+        with self._lock:
+            for entry in list(self.entries.values()):
+                if not entry.is_indexed or entry.is_modified():
+                    parsed = True
+                    dcm = self.load_entry(entry)
+                    if dcm is not None and entry.tree_id == tree_id:
+                        result = dcm
+                        break
+        if parsed:
+            self.save_index()
+        return result
+
+    def __contains__(self, tree_id: str) -> bool:
+        return self.get(tree_id) is not None
+
+    def __getitem__(self, tree_id: str) -> DynamicCompetenceMap:
+        dcm = self.get(tree_id)
+        if dcm is None:
+            raise KeyError(tree_id)
+        return dcm
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> List[str]:
+        """
+        get the ids of all trees - parsing all files that have not been indexed yet
+        """
+        self.find_unindexed(None)
+        with self._lock:
+            tree_ids = [
+                entry.tree_id
+                for entry in self.entries.values()
+                if entry.valid and entry.tree_id is not None
+            ]
+        return tree_ids
@@ -3,8 +3,11 @@ Created on 2024-01-12
 
 @author: wf
 """
-import copy
-from typing import List, Optional
+import hashlib
+import io
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple
 
 from dcm.dcm_core import (
     CompetenceElement,
@@ -16,17 +19,78 @@ from dcm.dcm_core import (
 from dcm.svg import SVG, DonutSegment, SVGConfig, SVGNodeConfig
 
 
+@dataclass(frozen=True)
+class SegmentLayout:
+    """
+    the learner independent layout of a single donut segment
+
+    Attributes:
+        element (Optional[CompetenceElement]): the element - None for an empty placeholder segment
+        level (int): the index of the hierarchy level e.g. 0 for aspects
+        segment (DonutSegment): the geometry of the segment
+        donut_path (str): the precomputed SVG path definition of the segment
+        index (int): the position of the segment in the drawing order
+    """
+
+    element: Optional[CompetenceElement]
+    level: int
+    segment: DonutSegment
+    donut_path: str
+    index: int
+
+    @property
+    def group_id(self) -> str:
+        """
+        the id of the group wrapping the segment in patchable mode
+        """
+        group_id = f"dcm-segment-{self.index}"
+        return group_id
+
+
+@dataclass(frozen=True)
+class ChartLayout:
+    """
+    the learner independent layout of a chart which only depends
+    on the competence tree and the SVG configuration
+
+    Attributes:
+        competence_tree (CompetenceTree): the tree this layout has been computed for
+        cx (float): the x coordinate of the center
+        cy (float): the y coordinate of the center
+        tree_radius (float): the radius of the inner circle
+        segments (Tuple[SegmentLayout, ...]): the segments in drawing order
+        segments_by_path (Mapping[str, SegmentLayout]): the segments of the elements by path
+    """
+
+    competence_tree: CompetenceTree
+    cx: float
+    cy: float
+    tree_radius: float
+    segments: Tuple[SegmentLayout, ...]
+    segments_by_path: Mapping[str, SegmentLayout]
+
+
 class DcmChart:
     """
     a Dynamic competence map chart
     """
 
+    # the colors of the lowest and highest heatmap value
+    heatmap_colors = ("#ffffcc", "#bd0026")
+
     def __init__(self, dcm: DynamicCompetenceMap):
         """
         Constructor
         """
         self.dcm = dcm
         self.text_mode = "none"
+        self.layouts = {}
+        self.layout = None
+        # the achievement level and selection state of each painted path
+        self.patchable = False
+        self.paint_states = {}
+        # the cohort values of the paths in heatmap mode
+        self.heatmap = None
 
     def prepare_and_add_inner_circle(
         self, config, competence_tree: CompetenceTree, lookup_url: str = None
@@ -41,15 +105,12 @@ class DcmChart:
 
         svg = SVG(config)
         self.svg = svg
-        config = svg.config
+        self.layout = self.get_layout(competence_tree, svg.config)
         # center of circle
-        self.cx = config.width // 2
-        self.cy = (config.total_height - config.legend_height) // 2
+        self.cx = self.layout.cx
+        self.cy = self.layout.cy
         self.radius_steps = competence_tree.total_levels
-        self.tree_radius = config.width / 2 / self.radius_steps / 2
-        if "tree" in competence_tree.relative_radius:
-            _inner, outer = competence_tree.relative_radius.get("tree")
-            self.tree_radius = outer * config.width / 2
+        self.tree_radius = self.layout.tree_radius
 
         self.circle_config = competence_tree.to_svg_node_config(
             x=self.cx, y=self.cy, width=self.tree_radius
@@ -135,6 +196,7 @@ class DcmChart:
         segment: DonutSegment,
         level_color=None,
         achievement_level=None,
+        donut_path: str = None,
     ) -> DonutSegment:
         """
         create a donut segment for the
@@ -143,10 +205,10 @@ class DcmChart:
 
         if level color is available an achievement
         needs to be potentially shown
+
+        the donut_path of the segment may be given if it has been precomputed
         """
         element_config = self.get_element_config(element)
-        # make sure we show the text on the original segment
-        text_segment = copy.deepcopy(segment)
 
         if level_color:
             element_config.fill = level_color  # Set the color
@@ -155,28 +217,32 @@ class DcmChart:
             element_config.element_class = "selected"
 
         if achievement_level is None:
-            result = svg.add_donut_segment(config=element_config, segment=segment)
+            result = svg.add_donut_segment(
+                config=element_config, segment=segment, donut_path=donut_path
+            )
         else:
             # we need to draw an achievement
-            total_levels = self.dcm.competence_tree.total_valid_levels
-            if not self.dcm.competence_tree.stacked_levels:
-                ratio = achievement_level / total_levels
+            competence_tree = self.dcm.competence_tree
+            if not competence_tree.stacked_levels:
+                ratio = competence_tree.get_level_ratio(achievement_level)
                 relative_radius = (segment.outer_radius - segment.inner_radius) * ratio
-                segment.outer_radius = segment.inner_radius + relative_radius
-                result = svg.add_donut_segment(config=element_config, segment=segment)
+                achievement_segment = segment.replace(
+                    outer_radius=segment.inner_radius + relative_radius
+                )
+                result = svg.add_donut_segment(
+                    config=element_config, segment=achievement_segment
+                )
             else:
                 # create the stacked segments starting with the highest level
                 for level in range(achievement_level, 0, -1):
-                    level_color = self.dcm.competence_tree.get_level_color(level)
-                    stack_element_config = copy.deepcopy(element_config)
-                    stack_element_config.fill = level_color
-                    ratio = level / total_levels
+                    level_color = competence_tree.get_level_color(level)
+                    stack_element_config = replace(element_config, fill=level_color)
+                    ratio = competence_tree.get_level_ratio(level)
                     relative_radius = (
                         segment.outer_radius - segment.inner_radius
                     ) * ratio
-                    stacked_segment = copy.deepcopy(segment)
-                    stacked_segment.outer_radius = (
-                        segment.inner_radius + relative_radius
+                    stacked_segment = segment.replace(
+                        outer_radius=segment.inner_radius + relative_radius
                     )
                     # the result will be overrriden in the loop so we'll return the innermost
                     result = svg.add_donut_segment(
@@ -186,9 +252,8 @@ class DcmChart:
             # no autofill please
             # textwrap.fill(element.short_name, width=20)
             text = element.short_name
-            self.svg.add_text_to_donut_segment(
-                text_segment, text, direction=self.text_mode
-            )
+            # the text is shown on the original segment
+            svg.add_text_to_donut_segment(segment, text, direction=self.text_mode)
         return result
 
     def generate_donut_segment_for_achievement(
@@ -212,8 +277,6 @@ class DcmChart:
             if level_color:
                 # set the color and radius of
                 # the segment for achievement
-                # make sure we don't interfere with the segment calculations
-                segment = copy.deepcopy(segment)
                 result = self.add_donut_segment(
                     svg, element, segment, level_color, achievement.level
                 )
@@ -225,6 +288,7 @@ class DcmChart:
         element: CompetenceElement,
         learner: Learner,
         segment: DonutSegment,
+        donut_path: str = None,
     ) -> DonutSegment:
         """
         generate a donut segment for a given element of
@@ -232,9 +296,21 @@ class DcmChart:
         """
         if segment.outer_radius == 0.0:
             result = segment
+        elif self.heatmap is not None and element is not None:
+            ratio = self.heatmap.get(element.path)
+            heatmap_color = None if ratio is None else self.get_heatmap_color(ratio)
+            result = self.add_donut_segment(
+                svg=svg,
+                element=element,
+                segment=segment,
+                level_color=heatmap_color,
+                donut_path=donut_path,
+            )
         else:
             # Simply create the donut segment without considering the achievement
-            result = self.add_donut_segment(svg=svg, element=element, segment=segment)
+            result = self.add_donut_segment(
+                svg=svg, element=element, segment=segment, donut_path=donut_path
+            )
             # check learner achievements
             if learner:
                 _learner_segment = self.generate_donut_segment_for_achievement(
@@ -242,86 +318,265 @@ class DcmChart:
                 )
         return result
 
-    def generate_pie_elements(
-        self,
-        level: int,
-        svg: SVG,
-        parent_element: CompetenceElement,
-        learner: Learner,
-        segment: DonutSegment,
-        symmetry_level: int = 1,
-    ):
+    def get_heatmap_color(self, ratio: float) -> str:
         """
-        generate the pie elements (donut segments) for the subelements
-        of the given parent_element at the given level
-        e.g. aspects, areas or facets - taking the learner
-        achievements into account if a corresponding achievement
-        is found. The segment limits the area in which the generation may operate
-
-        the symmetry level denotes at which level the rings should be symmetric
-        """
-        sub_element_name = self.levels[level]
-        # get the elements to be displayed
-        elements = getattr(parent_element, sub_element_name)
-        total = len(elements)
-        total_sub_elements = self.dcm.competence_tree.total_elements[sub_element_name]
-        hierarchy_level = sub_element_name[:-1]
-        if hierarchy_level in self.dcm.competence_tree.relative_radius:
-            # calculate inner and outer radius
-            inner_ratio, outer_ratio = self.dcm.competence_tree.relative_radius[
-                hierarchy_level
-            ]
-            # Calculate the actual inner and outer radii
-            inner_radius = self.svg.config.width / 2 * inner_ratio
-            outer_radius = self.svg.config.width / 2 * outer_ratio
-        else:
-            inner_radius = segment.outer_radius
-            outer_radius = segment.outer_radius + self.tree_radius * 2
-        # are there any elements to be shown?
-        if total == 0:
-            # there are no subelements we might need a single
-            # empty donut segment
-            # but only if there are any other available subelements
-            # on this level
-            if total_sub_elements == 0:
-                return
-
-            sub_segment = DonutSegment(
-                cx=self.cx,
-                cy=self.cy,
-                inner_radius=inner_radius,
-                outer_radius=outer_radius,
-                start_angle=segment.start_angle,
-                end_angle=segment.end_angle,
-            )
+        get the heatmap color for the given ratio
+
+        Args:
+            ratio(float): the value of the cohort statistic scaled to 0.0 to 1.0
+
+        Returns:
+            str: the color interpolated between the lowest and highest heatmap color
+        """
+        ratio = min(max(ratio, 0.0), 1.0)
+        low_color, high_color = self.heatmap_colors
+        rgb = []
+        for i in range(1, 7, 2):
+            low = int(low_color[i : i + 2], 16)
+            high = int(high_color[i : i + 2], 16)
+            rgb.append(round(low + (high - low) * ratio))
+        color = "#{:02x}{:02x}{:02x}".format(*rgb)
+        return color
+
+    def get_layout(
+        self, competence_tree: CompetenceTree, config: SVGConfig
+    ) -> ChartLayout:
+        """
+        get the layout for the given tree and configuration - the layout
+        is computed on first use and reused for further learners and selections
+        until the hierarchy of the tree is changed
+
+        Args:
+            competence_tree(CompetenceTree): the competence tree to layout
+            config(SVGConfig): the SVG configuration
+
+        Returns:
+            ChartLayout: the (shared) layout
+        """
+        # astuple would deep copy the field values
+        config_key = tuple(getattr(config, field.name) for field in fields(config))
+        # a change of the hierarchy of the tree needs a new layout
+        layout_key = (id(competence_tree), competence_tree.revision, config_key)
+        layout = self.layouts.get(layout_key)
+        # the layout keeps a reference to its tree so the id can not be reused
+        if layout is None or layout.competence_tree is not competence_tree:
+            layout = self.generate_layout(competence_tree, config)
+            self.layouts[layout_key] = layout
+        return layout
+
+    def generate_layout(
+        self, competence_tree: CompetenceTree, config: SVGConfig
+    ) -> ChartLayout:
+        """
+        generate the learner independent layout of the donut segments
+        of the given tree for the given configuration
+
+        Args:
+            competence_tree(CompetenceTree): the competence tree to layout
+            config(SVGConfig): the SVG configuration
+
+        Returns:
+            ChartLayout: the layout with the segments in drawing order
+        """
+        # center of circle
+        cx = config.width // 2
+        cy = (config.total_height - config.legend_height) // 2
+        tree_radius = config.width / 2 / competence_tree.total_levels / 2
+        if "tree" in competence_tree.relative_radius:
+            _inner, outer = competence_tree.relative_radius.get("tree")
+            tree_radius = outer * config.width / 2
+        svg = SVG(config)
+        segment_layouts = []
+        root_segment = DonutSegment(
+            cx=cx, cy=cy, inner_radius=0, outer_radius=tree_radius
+        )
+        # depth first walk with an explicit stack - the drawing order
+        # is element, subelements, next element
+        stack = [(-1, competence_tree, root_segment)]
+        while stack:
+            parent_level, parent_element, segment = stack.pop()
+            if parent_element is not competence_tree:
+                segment_layouts.append(
+                    SegmentLayout(
+                        element=parent_element,
+                        level=parent_level,
+                        segment=segment,
+                        donut_path=svg.get_donut_path(segment),
+                        index=len(segment_layouts),
+                    )
+                )
+            level = parent_level + 1
+            if parent_element is None:
+                continue
+            # get the elements to be displayed - the hierarchy may have any depth
+            elements = competence_tree.get_sub_elements(parent_element)
+            total = len(elements)
+            # the depth of the subelements - 1 for the aspects
+            depth = level + 1
+            total_sub_elements = competence_tree.get_total_elements_at_depth(depth)
+            hierarchy_level = competence_tree.get_hierarchy_name(depth)
+            if hierarchy_level in competence_tree.relative_radius:
+                # calculate inner and outer radius
+                inner_ratio, outer_ratio = competence_tree.relative_radius[
+                    hierarchy_level
+                ]
+                # Calculate the actual inner and outer radii
+                inner_radius = config.width / 2 * inner_ratio
+                outer_radius = config.width / 2 * outer_ratio
+            else:
+                inner_radius = segment.outer_radius
+                outer_radius = segment.outer_radius + tree_radius * 2
+            sub_segments = []
+            # are there any elements to be shown?
+            if total == 0:
+                # there are no subelements we might need a single
+                # empty donut segment
+                # but only if there are any other available subelements
+                # on this level
+                if total_sub_elements > 0:
+                    sub_segment = DonutSegment(
+                        cx=cx,
+                        cy=cy,
+                        inner_radius=inner_radius,
+                        outer_radius=outer_radius,
+                        start_angle=segment.start_angle,
+                        end_angle=segment.end_angle,
+                    )
+                    sub_segments.append((level, None, sub_segment))
+            else:
+                angle_per_element = (segment.end_angle - segment.start_angle) / total
+                start_angle = segment.start_angle
+                for element in elements:
+                    end_angle = start_angle + angle_per_element
+                    sub_segment = DonutSegment(
+                        cx=cx,
+                        cy=cy,
+                        inner_radius=inner_radius,
+                        outer_radius=outer_radius,
+                        start_angle=start_angle,
+                        end_angle=end_angle,
+                    )
+                    sub_segments.append((level, element, sub_segment))
+                    start_angle = end_angle
+            stack.extend(reversed(sub_segments))
+        segments_by_path = {
+            segment_layout.element.path: segment_layout
+            for segment_layout in segment_layouts
+            if segment_layout.element is not None
+        }
+        layout = ChartLayout(
+            competence_tree=competence_tree,
+            cx=cx,
+            cy=cy,
+            tree_radius=tree_radius,
+            segments=tuple(segment_layouts),
+            segments_by_path=MappingProxyType(segments_by_path),
+        )
+        return layout
+
+    def paint(self, svg: SVG, layout: ChartLayout, learner: Learner = None):
+        """
+        paint the segments of the given layout taking the learner
+        achievements, the selected paths and the text mode into account
+
+        Args:
+            svg(SVG): the SVG to paint on
+            layout(ChartLayout): the layout of the segments
+            learner(Learner): the learner to show the achievements for
+        """
+        for _segment_layout in self.iter_paint(svg, layout, learner):
+            pass
+
+    def iter_paint(
+        self, svg: SVG, layout: ChartLayout, learner: Learner = None
+    ) -> Iterator[SegmentLayout]:
+        """
+        paint the segments of the given layout one by one
+
+        Args:
+            svg(SVG): the SVG to paint on
+            layout(ChartLayout): the layout of the segments
+            learner(Learner): the learner to show the achievements for
+
+        Yields:
+            SegmentLayout: each segment layout after it has been painted
+        """
+        for segment_layout in layout.segments:
+            element = segment_layout.element
+            patchable = self.patchable and element is not None
+            if patchable:
+                # wrap the segment so that it can be replaced by a patch
+                self.paint_states[element.path] = self.get_paint_state(element, learner)
+                svg.add_element(f'<g id="{segment_layout.group_id}">')
             self.generate_donut_segment_for_element(
-                svg, element=None, learner=None, segment=sub_segment
+                svg,
+                element,
+                learner if element is not None else None,
+                segment=segment_layout.segment,
+                donut_path=segment_layout.donut_path,
             )
-        else:
-            angle_per_element = (segment.end_angle - segment.start_angle) / total
-            start_angle = segment.start_angle
-            for element in elements:
-                end_angle = start_angle + angle_per_element
-                sub_segment = DonutSegment(
-                    cx=self.cx,
-                    cy=self.cy,
-                    inner_radius=inner_radius,
-                    outer_radius=outer_radius,
-                    start_angle=start_angle,
-                    end_angle=end_angle,
-                )
+            if patchable:
+                svg.add_element("</g>")
+            yield segment_layout
+
+    def get_paint_state(
+        self, element: CompetenceElement, learner: Learner = None
+    ) -> Tuple[Optional[int], bool]:
+        """
+        get the learner and selection dependent state of the given element
+
+        Args:
+            element(CompetenceElement): the element
+            learner(Learner): the learner to show the achievements for
+
+        Returns:
+            Tuple[Optional[int], bool]: the achievement level and the selection state
+        """
+        level = None
+        if learner:
+            achievement = learner.achievements_by_path.get(element.path)
+            if achievement:
+                level = achievement.level
+        selected = element.path in self.selected_paths
+        return level, selected
+
+    def generate_svg_patches(
+        self, learner: Learner = None, selected_paths: List = []
+    ) -> List[Dict[str, str]]:
+        """
+        generate the patches for the segments whose achievement level or
+        selection changed since the last patchable rendering
+
+        Args:
+            learner(Learner): the learner to show the achievements for
+            selected_paths(List): the paths to highlight
+
+        Returns:
+            List[Dict[str, str]]: the id of the group and its new markup for each changed segment
+        """
+        if self.layout is None or not self.patchable:
+            raise ValueError("patches need a previous patchable rendering")
+        self.selected_paths = selected_paths
+        patches = []
+        for segment_layout in self.layout.segments:
+            element = segment_layout.element
+            if element is None:
+                continue
+            paint_state = self.get_paint_state(element, learner)
+            if self.paint_states.get(element.path) != paint_state:
+                svg = SVG(self.svg.config)
                 self.generate_donut_segment_for_element(
-                    svg, element, learner, segment=sub_segment
+                    svg,
+                    element,
+                    learner,
+                    segment=segment_layout.segment,
+                    donut_path=segment_layout.donut_path,
                 )
-                start_angle = end_angle
-                if level + 1 < len(self.levels):
-                    self.generate_pie_elements(
-                        level=level + 1,
-                        svg=svg,
-                        parent_element=element,
-                        learner=learner,
-                        segment=sub_segment,
-                    )
+                patches.append(
+                    {"id": segment_layout.group_id, "markup": "".join(svg.elements)}
+                )
+                self.paint_states[element.path] = paint_state
+        return patches
 
     def generate_svg_markup(
         self,
@@ -332,6 +587,8 @@ class DcmChart:
         with_java_script: bool = True,
         text_mode: str = "none",
         lookup_url: str = "",
+        patchable: bool = False,
+        heatmap: Optional[Mapping[str, float]] = None,
     ) -> str:
         """
         Generate the SVG markup for the given CompetenceTree and Learner. This method
@@ -357,6 +614,11 @@ class DcmChart:
             lookup_url (str, optional): Base URL for linking to detailed descriptions
                 or information about the competence elements. If not provided, links
                 will not be generated. Defaults to an empty string.
+            patchable (bool, optional): If True wrap each segment in a group with a stable id
+                so that later changes can be applied via generate_svg_patches. Defaults to False.
+            heatmap (Mapping[str, float], optional): If given color each segment by the cohort
+                value of its path scaled to 0.0 to 1.0 instead of a learner's achievement
+                e.g. from CohortMatrix.get_heatmap. Defaults to None.
 
         Returns:
             str: A string containing the SVG markup for the competence map.
@@ -368,26 +630,163 @@ class DcmChart:
         if competence_tree is None:
             competence_tree = self.dcm.competence_tree
         self.selected_paths = selected_paths
-        self.levels = ["aspects", "areas", "facets"]
         self.text_mode = text_mode
+        self.patchable = patchable
+        self.paint_states = {}
+        self.heatmap = heatmap
 
         svg = self.prepare_and_add_inner_circle(config, competence_tree, lookup_url)
-
-        segment = DonutSegment(
-            cx=self.cx, cy=self.cy, inner_radius=0, outer_radius=self.tree_radius
-        )
-        self.generate_pie_elements(
-            level=0,
-            svg=svg,
-            parent_element=competence_tree,
-            learner=learner,
-            segment=segment,
-        )
+        self.paint(svg, self.layout, learner)
         if svg.config.legend_height > 0:
             competence_tree.add_legend(svg)
 
         return svg.get_svg_markup(with_java_script=with_java_script)
 
+    def iter_svg_markup(
+        self,
+        competence_tree: CompetenceTree = None,
+        learner: Learner = None,
+        selected_paths: List = [],
+        config: SVGConfig = None,
+        with_java_script: bool = True,
+        text_mode: str = "none",
+        lookup_url: str = "",
+        chunk_size: int = 16384,
+        heatmap: Optional[Mapping[str, float]] = None,
+    ) -> Iterator[str]:
+        """
+        Generate the SVG markup in chunks while the segments are painted
+        so that large charts can be streamed e.g. via a StreamingResponse
+        without keeping the complete markup in memory.
+
+        Args:
+            competence_tree (CompetenceTree, optional): The competence tree structure
+                to be visualized. If None, the competence tree of the DcmChart instance
+                will be used. Defaults to None.
+            learner (Learner, optional): The learner whose achievements are to be visualized
+            selected_paths (List, optional): A list of paths that should be highlighted
+            config (SVGConfig, optional): Configuration for the SVG canvas and legend.
+            with_java_script (bool, optional): Indicates whether to include JavaScript
+                in the SVG for interactivity. Defaults to True.
+            text_mode(str): text display mode
+            lookup_url (str, optional): Base URL for linking to detailed descriptions
+            chunk_size(int): the minimum size of the yielded chunks (except the last one)
+            heatmap (Mapping[str, float], optional): the cohort values by path for a heatmap
+
+        Yields:
+            str: the next chunk of the SVG markup
+        """
+        if competence_tree is None:
+            competence_tree = self.dcm.competence_tree
+        self.selected_paths = selected_paths
+        self.text_mode = text_mode
+        self.patchable = False
+        self.heatmap = heatmap
+        buffer = io.StringIO()
+
+        def drain() -> str:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        svg = self.prepare_and_add_inner_circle(config, competence_tree, lookup_url)
+        svg.open(buffer, with_java_script=with_java_script)
+        for _segment_layout in self.iter_paint(svg, self.layout, learner):
+            if buffer.tell() >= chunk_size:
+                yield drain()
+        if svg.config.legend_height > 0:
+            competence_tree.add_legend(svg)
+        svg.close()
+        yield drain()
+
+    def write_svg_markup(self, writer: TextIO, **kwargs):
+        """
+        write the SVG markup to the given file-like object while
+        the segments are painted
+
+        Args:
+            writer(TextIO): the file-like object to write to
+            **kwargs: the arguments of iter_svg_markup
+        """
+        for chunk in self.iter_svg_markup(**kwargs):
+            writer.write(chunk)
+
+    def generate_svg_markups(
+        self,
+        learners: Iterable[Learner],
+        competence_tree: CompetenceTree = None,
+        config: SVGConfig = None,
+        with_java_script: bool = True,
+        text_mode: str = "none",
+        lookup_url: str = "",
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Generate the SVG markup for each of the given learners against
+        the same competence tree. The layout of the tree is computed
+        only once for all learners.
+
+        Args:
+            learners (Iterable[Learner]): the learners whose achievements are to be visualized
+            competence_tree (CompetenceTree, optional): The competence tree structure
+                to be visualized. If None, the competence tree of the DcmChart instance
+                will be used. Defaults to None.
+            config (SVGConfig, optional): Configuration for the SVG canvas and legend.
+            with_java_script (bool, optional): Indicates whether to include JavaScript
+                in the SVG for interactivity. Defaults to True.
+            text_mode(str): text display mode
+            lookup_url (str, optional): Base URL for linking to detailed descriptions
+
+        Yields:
+            Tuple[str, str]: the learner_id and SVG markup for each learner
+        """
+        if config is None:
+            # make sure all learners share the same configuration
+            config = SVGConfig()
+        for learner in learners:
+            svg_markup = self.generate_svg_markup(
+                competence_tree=competence_tree,
+                learner=learner,
+                config=config,
+                with_java_script=with_java_script,
+                text_mode=text_mode,
+                lookup_url=lookup_url,
+            )
+            yield learner.learner_id, svg_markup
+
+    @classmethod
+    def get_content_digest(cls, svg_markup: str) -> str:
+        """
+        get the digest of the given SVG markup to cache and dedupe charts by hash
+        - the markup should have been generated in deterministic mode
+
+        Args:
+            svg_markup(str): the SVG markup
+
+        Returns:
+            str: the hex digest of the markup
+        """
+        digest = hashlib.sha256(svg_markup.encode("utf-8")).hexdigest()
+        return digest
+
+    def generate_svg_digest(self, config: SVGConfig = None, **kwargs) -> str:
+        """
+        generate the SVG markup in deterministic mode and get its digest
+
+        Args:
+            config(SVGConfig): the SVG configuration - None for the default configuration
+            **kwargs: the further arguments of generate_svg_markup
+
+        Returns:
+            str: the hex digest of the deterministic markup
+        """
+        if config is None:
+            config = SVGConfig()
+        config = replace(config, deterministic=True)
+        svg_markup = self.generate_svg_markup(config=config, **kwargs)
+        digest = self.get_content_digest(svg_markup)
+        return digest
+
     def save_svg_to_file(self, svg_markup: str, filename: str):
         """
         Save the SVG content to a file
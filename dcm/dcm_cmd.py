@@ -3,13 +3,21 @@ Created on 2023-11-06
 
 @author: wf
 """
+import os
 import sys
 from argparse import ArgumentParser
+from typing import List
 
 from ngwidgets.cmd import WebserverCmd
+from ngwidgets.progress import TqdmProgressbar
 
-from dcm.dcm_core import DynamicCompetenceMap
-from dcm.dcm_webserver import DynamicCompentenceMapWebServer
+from dcm.dcm_catalog import ExampleCatalog
+from dcm.dcm_core import CompetenceTree, DynamicCompetenceMap
+from dcm.dcm_snapshot import CompetenceTreeSnapshot
+from dcm.dcm_storage import SqliteLearnerStorage
+from dcm.dcm_webserver import DynamicCompentenceMapWebServer, ServerConfig
+from dcm.xapi import XAPI
+from dcm.xapi_import import XAPIImporter
 
 
 class CompetenceCmd(WebserverCmd):
@@ -34,8 +42,133 @@ class CompetenceCmd(WebserverCmd):
             default=DynamicCompetenceMap.examples_path(),
             help="path to example dcm definition files [default: %(default)s]",
         )
+        parser.add_argument(
+            "--precompile",
+            metavar="DIR",
+            help="compile the competence tree definitions in the given directory to binary snapshots",
+        )
+        parser.add_argument(
+            "-f",
+            "--force",
+            action="store_true",
+            help="precompile even if a fresh snapshot exists [default: %(default)s]",
+        )
+        parser.add_argument(
+            "--migrate",
+            metavar="DIR",
+            nargs="?",
+            const="",
+            help="import the learner JSON files of the given directory into the SQLite learner store - default is the configured storage path",
+        )
+        parser.add_argument(
+            "--xapi_import",
+            metavar="FILE",
+            nargs="+",
+            help="import the learners of the given xAPI exports into the configured learner storage",
+        )
+        parser.add_argument(
+            "-ct",
+            "--competence_tree",
+            default="greta_v2_0",
+            help="definition file or example id of the competence tree of the xAPI exports [default: %(default)s]",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            help="number of worker processes for the xAPI import [default: number of CPUs]",
+        )
+        parser.add_argument(
+            "--merge_policy",
+            choices=XAPI.MERGE_POLICIES,
+            default="latest",
+            help="how xAPI achievements of the same competence path are merged [default: %(default)s]",
+        )
         return parser
 
+    def handle_args(self) -> bool:
+        """
+        handle the command line arguments
+        """
+        if self.args.precompile:
+            count = CompetenceTreeSnapshot.compile_directory(
+                self.args.precompile, force=self.args.force, debug=self.args.verbose
+            )
+            print(f"{count} competence tree snapshots written")
+            return True
+        if self.args.migrate is not None:
+            server_config = self.get_server_config()
+            json_path = self.args.migrate or server_config.storage_path
+            storage = SqliteLearnerStorage(server_config.storage_path)
+            count = storage.migrate(json_path, debug=self.args.verbose)
+            storage.close()
+            print(f"{count} learners imported into {storage.db_path}")
+            return True
+        if self.args.xapi_import:
+            self.import_xapi(self.args.xapi_import)
+            return True
+        handled = super().handle_args()
+        return handled
+
+    def get_server_config(self) -> ServerConfig:
+        """
+        get the configuration of the server
+        """
+        config_path = os.path.join(os.path.expanduser("~"), ".dcm", "config.yaml")
+        server_config = ServerConfig.from_yaml(config_path)
+        return server_config
+
+    def get_competence_tree(self, tree_ref: str) -> CompetenceTree:
+        """
+        get the competence tree for the given definition file or example id
+
+        Args:
+            tree_ref(str): the path of a JSON or YAML definition or the id of an example tree
+
+        Returns:
+            CompetenceTree: the competence tree
+        """
+        if os.path.isfile(tree_ref):
+            markup = "json" if tree_ref.endswith(".json") else "yaml"
+            with open(tree_ref, "r") as definition_file:
+                definition = definition_file.read()
+            dcm = DynamicCompetenceMap.from_definition_string(
+                tree_ref, definition, CompetenceTree, markup=markup
+            )
+        else:
+            dcm = ExampleCatalog([self.args.root_path]).get(tree_ref)
+        if dcm is None:
+            raise ValueError(f"unknown competence tree {tree_ref}")
+        return dcm.competence_tree
+
+    def import_xapi(self, json_file_paths: List[str]):
+        """
+        import the given xAPI exports in parallel with a progress bar
+        and show the throughput
+
+        Args:
+            json_file_paths(List[str]): the paths of the xAPI exports
+        """
+        json_file_paths = list(dict.fromkeys(json_file_paths))
+        server_config = self.get_server_config()
+        competence_tree = self.get_competence_tree(self.args.competence_tree)
+        importer = XAPIImporter(
+            competence_tree,
+            server_config.storage_path,
+            backend=server_config.storage_backend,
+            merge_policy=self.args.merge_policy,
+            max_workers=self.args.workers,
+            debug=self.args.verbose,
+        )
+        progress_bar = TqdmProgressbar(
+            total=len(json_file_paths), desc="xAPI import", unit="file"
+        )
+        report = importer.import_files(json_file_paths, progress_bar=progress_bar)
+        progress_bar.progress.close()
+        for failed in report.failed:
+            print(f"failed: {failed}", file=sys.stderr)
+        print(report.summary())
+
 
 def main(argv: list = None):
     """
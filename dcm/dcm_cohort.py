@@ -0,0 +1,250 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dataclasses_json import dataclass_json
+
+from dcm.dcm_core import CompetenceTree, Learner
+from dcm.dcm_storage import LearnerStorage
+
+
+@dataclass_json
+@dataclass
+class CohortStatistics:
+    """
+    the distribution of the achievement levels of a cohort
+    for a single competence element
+
+    Attributes:
+        path (str): the path of the competence element
+        count (int): the number of learners with a level for the element
+        mean (Optional[float]): the mean level - None if there is no level
+        median (Optional[float]): the median level - None if there is no level
+        percentiles (Dict[str, float]): the level percentiles by percentage e.g. "25"
+        histogram (Dict[str, int]): the number of learners by (rounded) competence level
+    """
+
+    path: str
+    count: int = 0
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    percentiles: Dict[str, float] = field(default_factory=dict)
+    histogram: Dict[str, int] = field(default_factory=dict)
+
+
+class CohortMatrix:
+    """
+    a columnar path x learner matrix of the achievement levels
+    of a cohort for one competence tree
+
+    The rows are the paths of the competence tree in the order of
+    elements_by_path, the columns are the learners. Missing levels are NaN.
+    Aggregating a row covers the learners that have a level for it.
+    """
+
+    def __init__(self, competence_tree: CompetenceTree, learners: List[Learner]):
+        """
+        constructor
+
+        Args:
+            competence_tree(CompetenceTree): the competence tree of the cohort
+            learners(List[Learner]): the learners of the cohort
+        """
+        self.competence_tree = competence_tree
+        self.paths = list(competence_tree.elements_by_path.keys())
+        self.path_index = {path: row for row, path in enumerate(self.paths)}
+        self.learner_ids = [learner.learner_id for learner in learners]
+        rows, cols, values = [], [], []
+        for col, learner in enumerate(learners):
+            for achievement in learner.achievements or []:
+                row = self.path_index.get(achievement.path)
+                if row is not None and achievement.level is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(achievement.level)
+        self.levels = np.full((len(self.paths), len(learners)), np.nan)
+        self.levels[rows, cols] = values
+        self._rolled_up = None
+
+    @classmethod
+    def from_directory(
+        cls, competence_tree: CompetenceTree, json_path: str
+    ) -> "CohortMatrix":
+        """
+        create the matrix for the learner JSON files of the given directory
+        that have achievements for the given competence tree
+
+        Args:
+            competence_tree(CompetenceTree): the competence tree of the cohort
+            json_path(str): the directory with the <learner_slug>.json files
+
+        Returns:
+            CohortMatrix: the matrix of the cohort
+        """
+        learners = [
+            learner
+            for learner in LearnerStorage.iter_json_learners(json_path)
+            if learner.achievements
+            and competence_tree.id in learner.get_competence_tree_ids()
+        ]
+        cohort_matrix = cls(competence_tree, learners)
+        return cohort_matrix
+
+    @property
+    def depths(self) -> np.ndarray:
+        depths = np.array([path.count("/") for path in self.paths])
+        return depths
+
+    @property
+    def parent_rows(self) -> np.ndarray:
+        """
+        the row of the parent of each row - -1 for the root
+        """
+        parent_rows = np.array(
+            [self.path_index.get(path.rpartition("/")[0], -1) for path in self.paths]
+        )
+        return parent_rows
+
+    def get_rolled_up(self) -> np.ndarray:
+        """
+        get the levels rolled up the tree hierarchy - an element
+        without a level of its own gets the mean level of its children
+
+        The rollup is done in a single bottom-up pass with
+        one vectorized step per depth of the tree.
+
+        Returns:
+            np.ndarray: the rolled up path x learner level matrix
+        """
+        if self._rolled_up is None:
+            rolled_up = self.levels.copy()
+            depths = self.depths
+            parent_rows = self.parent_rows
+            for depth in range(depths.max(initial=0), 0, -1):
+                child_rows = np.flatnonzero(depths == depth)
+                child_levels = rolled_up[child_rows]
+                has_level = ~np.isnan(child_levels)
+                sums = np.zeros_like(rolled_up)
+                counts = np.zeros_like(rolled_up)
+                np.add.at(
+                    sums, parent_rows[child_rows], np.where(has_level, child_levels, 0)
+                )
+                np.add.at(counts, parent_rows[child_rows], has_level)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    child_means = sums / counts
+                rows = np.flatnonzero(depths == depth - 1)
+                rolled_up[rows] = np.where(
+                    np.isnan(rolled_up[rows]), child_means[rows], rolled_up[rows]
+                )
+            self._rolled_up = rolled_up
+        return self._rolled_up
+
+    def get_statistics(
+        self,
+        rollup: bool = True,
+        percentiles: Sequence[float] = (25, 50, 75, 90),
+    ) -> Dict[str, CohortStatistics]:
+        """
+        get the level distribution of the cohort for all competence elements
+
+        Args:
+            rollup(bool): if True aggregate the rolled up levels
+            percentiles(Sequence[float]): the percentiles to compute
+
+        Returns:
+            Dict[str, CohortStatistics]: the statistics by path
+        """
+        matrix = self.get_rolled_up() if rollup else self.levels
+        counts = np.count_nonzero(~np.isnan(matrix), axis=1)
+        with warnings.catch_warnings():
+            # rows without any level give NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            means = np.nanmean(matrix, axis=1)
+            medians = np.nanmedian(matrix, axis=1)
+            percentile_values = np.nanpercentile(matrix, percentiles, axis=1)
+        level_values = np.array([level.level for level in self.competence_tree.levels])
+        # compare the rounded levels with each competence level
+        histograms = np.count_nonzero(
+            np.rint(matrix)[:, :, np.newaxis] == level_values, axis=1
+        )
+        statistics = {}
+        for row, path in enumerate(self.paths):
+            row_statistics = CohortStatistics(path=path, count=int(counts[row]))
+            if counts[row] > 0:
+                row_statistics.mean = float(means[row])
+                row_statistics.median = float(medians[row])
+                row_statistics.percentiles = {
+                    f"{percentile:g}": float(percentile_values[i, row])
+                    for i, percentile in enumerate(percentiles)
+                }
+            row_statistics.histogram = {
+                str(level_value): int(histograms[row, i])
+                for i, level_value in enumerate(level_values)
+            }
+            statistics[path] = row_statistics
+        return statistics
+
+    def get_path_values(
+        self,
+        statistic: str = "mean",
+        target_level: Optional[int] = None,
+        rollup: bool = True,
+    ) -> np.ndarray:
+        """
+        get the given cohort statistic for all paths scaled to 0.0 to 1.0
+
+        Args:
+            statistic(str): 'mean' for the mean level relative to the highest valid level or
+                'share' for the share of learners at or above the target level
+            target_level(int): the target level of the 'share' statistic
+            rollup(bool): if True use the rolled up levels
+
+        Returns:
+            np.ndarray: the value for each path in the order of paths - NaN if there is no level
+        """
+        matrix = self.get_rolled_up() if rollup else self.levels
+        has_level = ~np.isnan(matrix)
+        counts = np.count_nonzero(has_level, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if statistic == "mean":
+                max_level = self.competence_tree.total_valid_levels
+                path_values = np.nansum(matrix, axis=1) / counts / max_level
+            elif statistic == "share":
+                if target_level is None:
+                    raise ValueError("the share statistic needs a target level")
+                reached = np.count_nonzero(has_level & (matrix >= target_level), axis=1)
+                path_values = reached / counts
+            else:
+                raise ValueError(f"invalid cohort statistic {statistic}")
+        return path_values
+
+    def get_heatmap(
+        self,
+        statistic: str = "mean",
+        target_level: Optional[int] = None,
+        rollup: bool = True,
+    ) -> Dict[str, float]:
+        """
+        get the heatmap of the given cohort statistic for DcmChart.generate_svg_markup
+
+        Args:
+            statistic(str): 'mean' or 'share' - see get_path_values
+            target_level(int): the target level of the 'share' statistic
+            rollup(bool): if True use the rolled up levels
+
+        Returns:
+            Dict[str, float]: the value by path - paths without any level are left out
+        """
+        path_values = self.get_path_values(statistic, target_level, rollup)
+        heatmap = {
+            path: float(value)
+            for path, value in zip(self.paths, path_values)
+            if not np.isnan(value)
+        }
+        return heatmap
@@ -0,0 +1,608 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import dataclasses
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from slugify import slugify
+
+from dcm.dcm_core import (
+    CompetenceArea,
+    CompetenceAspect,
+    CompetenceElement,
+    CompetenceFacet,
+    CompetenceTree,
+)
+from dcm.svg import SVGNodeConfig
+
+
+class CompactElement:
+    """
+    a lightweight view on a single element of a CompactCompetenceTree
+
+    A view only holds its tree and its row - all other
+    attributes are looked up in the columns of the tree.
+    """
+
+    __slots__ = ("tree", "row")
+
+    def __init__(self, tree: "CompactCompetenceTree", row: int):
+        self.tree = tree
+        self.row = row
+
+    def __eq__(self, other) -> bool:
+        same = (
+            isinstance(other, CompactElement)
+            and self.tree is other.tree
+            and self.row == other.row
+        )
+        return same
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.row))
+
+    def __repr__(self) -> str:
+        return f"{self.element_type}({self.path})"
+
+    @property
+    def kind(self) -> int:
+        """
+        the depth of the element: 0=tree, 1=aspect, 2=area, 3=facet, 4=subfacet ...
+        """
+        return self.tree.kinds[self.row]
+
+    @property
+    def element_type(self) -> str:
+        return self.tree.get_element_class(self.kind).__name__
+
+    @property
+    def name(self) -> str:
+        return self.tree.names[self.row]
+
+    @property
+    def short_name(self) -> str:
+        short_name = self.tree.short_names[self.row]
+        if short_name is None:
+            short_name = self.name[:10]
+        return short_name
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.tree.ids[self.row]
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.tree.urls[self.row]
+
+    @property
+    def description(self) -> Optional[str]:
+        return self.tree.descriptions[self.row]
+
+    @property
+    def color_code(self) -> Optional[str]:
+        return self.tree.color_codes[self.row]
+
+    @property
+    def credits(self) -> Optional[int]:
+        return self.tree.credits.get(self.row)
+
+    @property
+    def path(self) -> str:
+        return self.tree.paths[self.row]
+
+    @property
+    def competence_tree(self) -> "CompactCompetenceTree":
+        return self.tree
+
+    @property
+    def parent(self) -> Union["CompactElement", "CompactCompetenceTree"]:
+        return self.tree.element(self.tree.parents[self.row])
+
+    @property
+    def aspect(self) -> Optional["CompactElement"]:
+        return self.tree.get_ancestor(self.row, 1)
+
+    @property
+    def area(self) -> Optional["CompactElement"]:
+        return self.tree.get_ancestor(self.row, 2)
+
+    @property
+    def areas(self) -> List["CompactElement"]:
+        return self.tree.get_children(self.row, "areas")
+
+    @property
+    def facets(self) -> List["CompactElement"]:
+        return self.tree.get_children(self.row, "facets")
+
+    # the markup of a view is the same as for a full element
+    as_html = CompetenceElement.as_html
+
+    def to_svg_node_config(self, url: str = None, **kwargs) -> SVGNodeConfig:
+        """
+        convert me to an SVGNode Configuration
+
+        Args:
+            url(str): the url to use for clicking this svg node - if None use
+            my configured url
+        """
+        if url is None:
+            url = self.url
+        element_type = self.element_type
+        comment = f"{element_type}:{self.description}"
+        svg_node_config = SVGNodeConfig(
+            element_type=element_type,
+            id=f"{self.id}",
+            url=url,
+            fill=self.color_code,
+            title=self.name,
+            comment=comment,
+            **kwargs,
+        )
+        return svg_node_config
+
+    def to_element(self) -> CompetenceElement:
+        """
+        convert me to a full (detached) competence element with all my subelements
+        """
+        return self.tree.to_element(self.row)
+
+
+class CompactElementsByPath(Mapping):
+    """
+    a read only mapping of the paths of a CompactCompetenceTree
+    to the views of its elements
+    """
+
+    def __init__(self, tree: "CompactCompetenceTree"):
+        self.tree = tree
+
+    def __getitem__(self, path: str):
+        return self.tree.element(self.tree.path_index[path])
+
+    def __contains__(self, path) -> bool:
+        return path in self.tree.path_index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tree.path_index)
+
+    def __len__(self) -> int:
+        return len(self.tree.path_index)
+
+
+class CompactCompetenceTree:
+    """
+    a memory efficient competence tree for large catalogs
+    with tens of thousands of elements
+
+    The elements are not kept as objects but as columns
+    (struct of arrays) of ids, names, short names, urls, descriptions,
+    colors, paths, depths and parent rows. The rows are in the depth
+    first order of CompetenceTree.elements_by_path with the tree itself
+    in row 0. The children of each row are kept in compressed
+    sparse row arrays. Elements are accessed via lightweight CompactElement views.
+
+    The tree attributes e.g. the levels, element names and
+    relative radius are kept in a header CompetenceTree without aspects
+    so that the CompetenceTree API keeps working e.g. for
+    DcmChart.generate_svg_markup, CohortMatrix and lookup_by_path.
+    Only the header_attributes are delegated to the header. A compact tree
+    is read only - use to_tree to get a CompetenceTree that can be modified.
+    """
+
+    # the element class and the sub element attribute by depth
+    # - deeper levels are facets with subfacets
+    element_classes = (
+        CompetenceTree,
+        CompetenceAspect,
+        CompetenceArea,
+        CompetenceFacet,
+    )
+    sub_element_names = ("aspects", "areas", "facets")
+    # the attributes of the header that do not depend on the aspects
+    header_attributes = frozenset(
+        [
+            "name",
+            "short_name",
+            "id",
+            "url",
+            "description",
+            "color_code",
+            "lookup_url",
+            "stacked_levels",
+            "levels",
+            "element_names",
+            "relative_radius",
+            "revision",
+            "as_html",
+            "to_svg_node_config",
+            "get_hierarchy_name",
+            "invalidate_levels",
+            "level_index",
+            "total_valid_levels",
+            "get_level",
+            "get_level_color",
+            "get_level_icon",
+            "get_level_ratio",
+        ]
+    )
+
+    @classmethod
+    def get_element_class(cls, kind: int) -> type:
+        return cls.element_classes[min(kind, len(cls.element_classes) - 1)]
+
+    @classmethod
+    def get_sub_element_name(cls, kind: int) -> str:
+        return cls.sub_element_names[min(kind, len(cls.sub_element_names) - 1)]
+
+    def __init__(self, header: CompetenceTree):
+        """
+        constructor
+
+        Args:
+            header(CompetenceTree): the tree attributes - the aspects of the header are ignored
+        """
+        self.header = header
+        self.kinds = array("l")
+        self.parents = array("l")
+        self.ids: List[Optional[str]] = []
+        self.names: List[str] = []
+        self.short_names: List[Optional[str]] = []
+        self.urls: List[Optional[str]] = []
+        self.descriptions: List[Optional[str]] = []
+        self.color_codes: List[Optional[str]] = []
+        self.paths: List[str] = []
+        # the credits are only set for a few aspects
+        self.credits: Dict[int, int] = {}
+        self.path_index: Dict[str, int] = {}
+        self.child_offsets = array("l")
+        self.child_rows = array("l")
+        self.total_elements = {"aspects": 0, "areas": 0, "facets": 0}
+        # the number of elements by depth
+        self.depth_counts: List[int] = []
+        self.total_levels = 1
+        self.elements_by_path = CompactElementsByPath(self)
+
+    def __getattr__(self, name: str) -> Any:
+        # the tree attributes e.g. levels, lookup_url and element_names
+        # are those of the header
+        if name not in CompactCompetenceTree.header_attributes:
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{name}'"
+            )
+        return getattr(self.header, name)
+
+    def read_only(self, *_args, **_kwargs):
+        """
+        the hierarchy of a compact tree can not be modified
+
+        Raises:
+            ValueError: always
+        """
+        raise ValueError(
+            f"{self.__class__.__name__} is read only - use to_tree to get a modifiable CompetenceTree"
+        )
+
+    add_element = read_only
+    remove_element = read_only
+    move_element = read_only
+    register_element = read_only
+    unregister_element = read_only
+    update_paths = read_only
+
+    def add_row(self, kind: int, parent: int, values: Dict[str, Any]) -> int:
+        """
+        add a row for an element with the given field values
+
+        Args:
+            kind(int): the hierarchy level of the element
+            parent(int): the row of the parent - -1 for the tree
+            values(Dict[str,Any]): the field values of the element
+
+        Returns:
+            int: the row of the element
+        """
+        row = len(self.paths)
+        name = values.get("name")
+        element_id = values.get("id")
+        if element_id is None:
+            # the same default as CompetenceElement.__post_init__
+            element_id = slugify(name, lowercase=False, regex_pattern=r"[^\w\s\-]")
+        path = f"{element_id}" if parent < 0 else f"{self.paths[parent]}/{element_id}"
+        self.kinds.append(kind)
+        self.parents.append(parent)
+        self.ids.append(element_id)
+        self.names.append(name)
+        # the default short name is only derived on access
+        self.short_names.append(values.get("short_name"))
+        self.urls.append(values.get("url"))
+        self.descriptions.append(values.get("description"))
+        self.color_codes.append(values.get("color_code"))
+        self.paths.append(path)
+        self.path_index[path] = row
+        credits = values.get("credits")
+        if credits is not None:
+            self.credits[row] = credits
+        if kind > 0:
+            self.total_elements[self.get_sub_element_name(kind - 1)] += 1
+            self.total_levels = max(self.total_levels, kind + 1)
+        while len(self.depth_counts) <= kind:
+            self.depth_counts.append(0)
+        self.depth_counts[kind] += 1
+        return row
+
+    def index_children(self):
+        """
+        index the children of each row from the parent rows
+        """
+        total = len(self.parents)
+        counts = [0] * (total + 1)
+        for parent in self.parents[1:]:
+            counts[parent + 1] += 1
+        for row in range(total):
+            counts[row + 1] += counts[row]
+        self.child_offsets = array("l", counts)
+        child_rows = array("l", [0]) * max(total - 1, 0)
+        fill = counts[:-1]
+        # rows are in depth first order so each child list is in document order
+        for row in range(1, total):
+            parent = self.parents[row]
+            child_rows[fill[parent]] = row
+            fill[parent] += 1
+        self.child_rows = child_rows
+
+    @classmethod
+    def from_nodes(cls, header: CompetenceTree, root, get_values, get_children):
+        """
+        create a compact tree by walking a nested structure depth first
+
+        Args:
+            header(CompetenceTree): the tree attributes
+            root: the root node
+            get_values: function to get the field values of a node as a dict like object
+            get_children: function to get the sub nodes of a node for a sub element name
+        """
+        tree = cls(header)
+        stack = [(root, 0, -1)]
+        while stack:
+            node, kind, parent = stack.pop()
+            row = tree.add_row(kind, parent, get_values(node))
+            sub_nodes = get_children(node, cls.get_sub_element_name(kind)) or []
+            for sub_node in reversed(sub_nodes):
+                stack.append((sub_node, kind + 1, row))
+        tree.index_children()
+        return tree
+
+    @classmethod
+    def from_dict(cls, definition_data: dict) -> "CompactCompetenceTree":
+        """
+        create a compact tree from parsed definition data without
+        creating objects for the aspects, areas and facets
+
+        Args:
+            definition_data(dict): the parsed JSON or YAML competence tree definition
+
+        Returns:
+            CompactCompetenceTree: the compact tree
+        """
+        header_data = {
+            key: value for key, value in definition_data.items() if key != "aspects"
+        }
+        header = CompetenceTree.from_dict(header_data)
+        tree = cls.from_nodes(
+            header,
+            definition_data,
+            get_values=lambda node: node,
+            get_children=lambda node, name: node.get(name),
+        )
+        return tree
+
+    @classmethod
+    def from_tree(cls, competence_tree: CompetenceTree) -> "CompactCompetenceTree":
+        """
+        create a compact tree from the given competence tree
+
+        Args:
+            competence_tree(CompetenceTree): the tree to convert
+
+        Returns:
+            CompactCompetenceTree: the compact tree
+        """
+        header = dataclasses.replace(competence_tree, aspects=[])
+        tree = cls.from_nodes(
+            header,
+            competence_tree,
+            get_values=lambda element: element.__dict__,
+            get_children=lambda element, name: getattr(element, name, None),
+        )
+        return tree
+
+    def element(self, row: int) -> Union[CompactElement, "CompactCompetenceTree"]:
+        """
+        get the view of the element in the given row - the tree itself for row 0
+        """
+        element = self if row == 0 else CompactElement(self, row)
+        return element
+
+    def get_children(self, row: int, sub_element_name: str) -> List[CompactElement]:
+        """
+        get the views of the children of the given row
+
+        Args:
+            row(int): the row of the parent
+            sub_element_name(str): the name of the subelements asked for e.g. areas
+
+        Raises:
+            AttributeError: if the parent has no subelements of the given name
+        """
+        if self.get_sub_element_name(self.kinds[row]) != sub_element_name:
+            raise AttributeError(f"{self.paths[row]} has no {sub_element_name}")
+        start, end = self.child_offsets[row], self.child_offsets[row + 1]
+        children = [CompactElement(self, child) for child in self.child_rows[start:end]]
+        return children
+
+    def get_ancestor(self, row: int, kind: int) -> Optional[CompactElement]:
+        """
+        get the view of the ancestor of the given row with the given hierarchy level
+        """
+        while row >= 0 and self.kinds[row] > kind:
+            row = self.parents[row]
+        ancestor = CompactElement(self, row) if row > 0 else None
+        return ancestor
+
+    @property
+    def path(self) -> str:
+        return self.paths[0]
+
+    @property
+    def aspects(self) -> List[CompactElement]:
+        return self.get_children(0, "aspects")
+
+    def get_sub_elements(self, element) -> List[CompactElement]:
+        """
+        get the views of the subelements of the given element or of the tree
+        """
+        row = 0 if element is self else element.row
+        return self.get_children(row, self.get_sub_element_name(self.kinds[row]))
+
+    def get_total_elements_at_depth(self, depth: int) -> int:
+        """
+        get the number of elements with the given depth - 1 for the aspects
+        """
+        count = self.depth_counts[depth] if 0 <= depth < len(self.depth_counts) else 0
+        return count
+
+    def lookup_by_path(
+        self, path: str, lenient: bool = True
+    ) -> Optional[Union[CompactElement, "CompactCompetenceTree"]]:
+        """
+        look up the element with the given path
+
+        Args:
+            path (str): The path in the format "tree_id/aspect_id/area_id/facet_id".
+            lenient(bool): if not lenient raise a ValueError for an invalid path
+
+        Returns:
+            the view of the element or None if the path is invalid and lenient
+        """
+        row = self.path_index.get(path)
+        if row is None:
+            if not lenient:
+                raise ValueError(f"invalid path {path}")
+            return None
+        return self.element(row)
+
+    # the legend only needs the levels and the color codes and names of the aspects
+    add_legend = CompetenceTree.add_legend
+
+    def get_subtree_end(self, row: int) -> int:
+        """
+        get the row after the last row of the subtree of the given row - the rows
+        of a subtree are consecutive since they are in depth first order
+        """
+        kind = self.kinds[row]
+        end = row + 1
+        while end < len(self.kinds) and self.kinds[end] > kind:
+            end += 1
+        return end
+
+    def iter_subtree(
+        self, path: Optional[str] = None, min_depth: int = 0
+    ) -> Iterator[Union[CompactElement, "CompactCompetenceTree"]]:
+        """
+        iterate the element with the given path and all its subelements
+        in depth first order
+
+        Args:
+            path(str): the path of the subtree - None for the whole tree
+            min_depth(int): the minimum depth of the elements e.g. 2 to skip the tree and the aspects
+
+        Returns:
+            Iterator: the views of the elements - empty if the path is invalid
+        """
+        row = 0 if path is None else self.path_index.get(path)
+        if row is None:
+            return
+        for subtree_row in range(row, self.get_subtree_end(row)):
+            if self.kinds[subtree_row] >= min_depth:
+                yield self.element(subtree_row)
+
+    def get_ancestors(
+        self, path: str
+    ) -> List[Union[CompactElement, "CompactCompetenceTree"]]:
+        """
+        get the ancestors of the element with the given path starting with the tree
+
+        Raises:
+            ValueError: if the path is invalid
+        """
+        row = self.path_index.get(path)
+        if row is None:
+            raise ValueError(f"invalid path {path}")
+        ancestors = []
+        row = self.parents[row]
+        while row >= 0:
+            ancestors.append(self.element(row))
+            row = self.parents[row]
+        ancestors.reverse()
+        return ancestors
+
+    def to_element(self, row: int) -> CompetenceElement:
+        """
+        convert the element in the given row to a full competence element
+        with all its subelements
+
+        Args:
+            row(int): the row of the element
+
+        Returns:
+            CompetenceElement: the element - for row 0 a complete CompetenceTree
+        """
+        # create the elements bottom up so that the subelements of each row exist
+        elements: Dict[int, CompetenceElement] = {}
+        for subtree_row in reversed(range(row, self.get_subtree_end(row))):
+            kind = self.kinds[subtree_row]
+            values = {
+                "name": self.names[subtree_row],
+                "short_name": self.short_names[subtree_row],
+                "id": self.ids[subtree_row],
+                "url": self.urls[subtree_row],
+                "description": self.descriptions[subtree_row],
+                "color_code": self.color_codes[subtree_row],
+            }
+            if subtree_row in self.credits:
+                values["credits"] = self.credits[subtree_row]
+            start = self.child_offsets[subtree_row]
+            end = self.child_offsets[subtree_row + 1]
+            # a facet without subfacets has none
+            if kind < 3 or end > start:
+                values[self.get_sub_element_name(kind)] = [
+                    elements.pop(child) for child in self.child_rows[start:end]
+                ]
+            if kind == 0:
+                element = dataclasses.replace(self.header, **values)
+            else:
+                element = self.get_element_class(kind)(**values)
+            elements[subtree_row] = element
+        return elements[row]
+
+    def to_tree(self) -> CompetenceTree:
+        """
+        convert me to a full CompetenceTree
+        """
+        return self.to_element(0)
+
+    def to_dict(self, *args, **kwargs) -> dict:
+        return self.to_tree().to_dict(*args, **kwargs)
+
+    def to_json(self, *args, **kwargs) -> str:
+        return self.to_tree().to_json(*args, **kwargs)
+
+    def to_yaml(self, *args, **kwargs) -> str:
+        return self.to_tree().to_yaml(*args, **kwargs)
+
+    def to_pretty_json(self) -> str:
+        return self.to_tree().to_pretty_json()
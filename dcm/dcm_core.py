@@ -5,18 +5,31 @@ Created on 2023-06-11
 """
 import json
 import os
+import sys
 from dataclasses import dataclass, field
 from json.decoder import JSONDecodeError
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import markdown2
 import yaml
-from dataclasses_json import dataclass_json
+from dataclasses_json import config, dataclass_json
 from ngwidgets.yamlable import YamlAble
 from slugify import slugify
 
+from dcm.dcm_trie import PathTrie
 from dcm.svg import SVG, SVGNodeConfig
 
+try:
+    # use the libyaml based C implementation if available
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YamlSafeLoader
+try:
+    # https://pypi.org/project/orjson/
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 @dataclass_json
 @dataclass
@@ -94,8 +107,16 @@ class CompetenceFacet(CompetenceElement):
     Represents a specific facet of a competence aspect, inheriting from CompetenceElement.
 
     This class can include additional properties or methods specific to a competence facet.
+
+    Attributes:
+        facets (Optional[List[CompetenceFacet]]): the subfacets for a hierarchy deeper than tree, aspect, area and facet e.g. the skills of a learning outcome
     """
 
+    # leaf facets are serialized without a facets key
+    facets: Optional[List["CompetenceFacet"]] = field(
+        default=None, metadata=config(exclude=lambda facets: facets is None)
+    )
+
 
 @dataclass_json
 @dataclass
@@ -141,6 +162,48 @@ class CompetenceLevel(CompetenceElement):
     utf8_icon: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class LevelIndex:
+    """
+    precomputed lookup tables of the levels of a CompetenceTree by level number
+
+    Attributes:
+        levels_by_number (Dict[int, CompetenceLevel]): the first level with each level number
+        colors (Dict[int, Optional[str]]): the color code by level number
+        ratios (Dict[int, float]): the level number relative to the number of valid levels
+        total_valid_levels (int): the number of levels with a level number other than 0
+    """
+
+    levels_by_number: Dict[int, CompetenceLevel]
+    colors: Dict[int, Optional[str]]
+    ratios: Dict[int, float]
+    total_valid_levels: int
+
+    @classmethod
+    def from_levels(cls, levels: List[CompetenceLevel]) -> "LevelIndex":
+        """
+        create the index for the given levels
+        """
+        levels_by_number = {}
+        for level in levels:
+            levels_by_number.setdefault(level.level, level)
+        total_valid_levels = len([level for level in levels if level.level != 0])
+        colors = {
+            number: level.color_code for number, level in levels_by_number.items()
+        }
+        ratios = {
+            number: number / total_valid_levels if total_valid_levels else 0.0
+            for number in levels_by_number
+        }
+        level_index = cls(
+            levels_by_number=levels_by_number,
+            colors=colors,
+            ratios=ratios,
+            total_valid_levels=total_valid_levels,
+        )
+        return level_index
+
+
 @dataclass_json
 @dataclass
 class CompetenceTree(CompetenceElement, YamlAble["CompetenceTree"]):
@@ -162,42 +225,300 @@ class CompetenceTree(CompetenceElement, YamlAble["CompetenceTree"]):
     relative_radius: Dict[str, Tuple[float, float]] = field(default_factory=dict)
     total_elements: Dict[str, int] = field(default_factory=dict)
 
+    # the name of the subelement list and counter by element class
+    element_list_names = {
+        CompetenceAspect: "aspects",
+        CompetenceArea: "areas",
+        CompetenceFacet: "facets",
+    }
+
     def __post_init__(self):
         """
         initalize the path variables of my hierarchy
         """
         super().__post_init__()
-        self.total_elements = {"aspects": 0, "areas": 0, "facets": 0}
         self.update_paths()
 
+    def __setattr__(self, name, value):
+        if name == "levels":
+            # assigning new levels invalidates the level index
+            self.__dict__["_level_index"] = None
+        super().__setattr__(name, value)
+
     def update_paths(self):
         """
-        update my paths
+        update my paths, parent references, path trie and counters
+        e.g. after changing the aspects, areas or facets in place
         """
         self.path = self.id
-        self.total_levels = 1
+        self.invalidate_levels()
+        self.total_elements = {"aspects": 0, "areas": 0, "facets": 0}
         self.elements_by_path = {self.path: self}
-        # Loop through each competence aspect and set their paths and parent references
+        self.path_trie = PathTrie()
+        self.path_trie.insert(self.path, self)
+        # set the paths and parent references of the aspects and all their subelements
         for aspect in self.aspects:
-            aspect.competence_tree = self
-            aspect.path = f"{self.id}/{aspect.id}"
-            self.elements_by_path[aspect.path] = aspect
-            self.total_elements["aspects"] = self.total_elements["aspects"] + 1
-            self.total_levels = 2
-            for area in aspect.areas:
-                self.total_levels = 3
-                area.competence_tree = self
-                area.aspect = aspect
-                area.path = f"{self.id}/{aspect.id}/{area.id}"
-                self.elements_by_path[area.path] = area
-                self.total_elements["areas"] = self.total_elements["areas"] + 1
-                for facet in area.facets:
-                    self.total_levels = 4
-                    facet.competence_tree = self
-                    facet.area = area
-                    facet.path = f"{self.id}/{aspect.id}/{area.id}/{facet.id}"
-                    self.elements_by_path[facet.path] = facet
-                    self.total_elements["facets"] = self.total_elements["facets"] + 1
+            self.register_element(self, aspect)
+        self.hierarchy_changed()
+
+    @property
+    def revision(self) -> int:
+        """
+        the number of changes of my hierarchy e.g. to invalidate
+        layouts computed for an older state
+        """
+        return self.__dict__.get("_revision", 0)
+
+    def hierarchy_changed(self):
+        """
+        update the number of hierarchy levels from the depth of my path trie
+        and increase my revision after a change of my hierarchy
+        """
+        self.total_levels = self.path_trie.max_depth + 1
+        self.__dict__["_revision"] = self.revision + 1
+
+    def get_hierarchy_name(self, depth: int) -> str:
+        """
+        get the name of the hierarchy level with the given depth e.g. for
+        the relative_radius and element_names - the levels below the facets
+        are named facet2, facet3 ...
+
+        Args:
+            depth(int): the depth - 0 for the tree
+
+        Returns:
+            str: the name of the hierarchy level
+        """
+        hierarchy_names = ["tree", "aspect", "area", "facet"]
+        if depth < len(hierarchy_names):
+            hierarchy_name = hierarchy_names[depth]
+        else:
+            hierarchy_name = f"facet{depth - 2}"
+        return hierarchy_name
+
+    def get_total_elements_at_depth(self, depth: int) -> int:
+        """
+        get the number of elements with the given depth - 1 for the aspects
+        """
+        return self.path_trie.get_depth_count(depth)
+
+    def iter_subtree(
+        self, path: Optional[str] = None, min_depth: int = 0
+    ) -> Iterator[CompetenceElement]:
+        """
+        iterate the element with the given path and all its subelements
+        in depth first order using the path trie
+
+        Args:
+            path(str): the path of the subtree - None for the whole tree
+            min_depth(int): the minimum depth of the elements e.g. 2 to skip the tree and the aspects
+
+        Returns:
+            Iterator[CompetenceElement]: the elements
+        """
+        for node in self.path_trie.iter_subtree(path):
+            if node.depth >= min_depth:
+                yield node.element
+
+    def get_ancestors(self, path: str) -> List[CompetenceElement]:
+        """
+        get the ancestors of the element with the given path starting with the tree
+
+        Raises:
+            ValueError: if the path is invalid
+        """
+        ancestors = [node.element for node in self.path_trie.get_ancestors(path)]
+        return ancestors
+
+    def get_list_name(self, element: CompetenceElement) -> str:
+        """
+        get the name of the subelement list and counter the given element belongs to
+
+        Raises:
+            ValueError: if the element is not an aspect, area or facet
+        """
+        for element_class, list_name in self.element_list_names.items():
+            if isinstance(element, element_class):
+                return list_name
+        raise ValueError(
+            f"{element.__class__.__name__} is not an aspect, area or facet"
+        )
+
+    def get_sub_element_name(self, parent: CompetenceElement) -> Optional[str]:
+        """
+        get the name of the subelement list of the given parent
+        """
+        if parent is self:
+            sub_element_name = "aspects"
+        elif isinstance(parent, CompetenceAspect):
+            sub_element_name = "areas"
+        elif isinstance(parent, (CompetenceArea, CompetenceFacet)):
+            sub_element_name = "facets"
+        else:
+            sub_element_name = None
+        return sub_element_name
+
+    def get_sub_elements(
+        self, parent: CompetenceElement, create: bool = False
+    ) -> List[CompetenceElement]:
+        """
+        get the aspects, areas or facets of the given parent
+
+        Args:
+            parent(CompetenceElement): the parent
+            create(bool): if True create the list of subfacets of a facet that has none
+        """
+        sub_element_name = self.get_sub_element_name(parent)
+        sub_elements = getattr(parent, sub_element_name) if sub_element_name else None
+        if sub_elements is None:
+            sub_elements = []
+            if create and sub_element_name:
+                setattr(parent, sub_element_name, sub_elements)
+        return sub_elements
+
+    def register_element(self, parent: CompetenceElement, element: CompetenceElement):
+        """
+        set the path and parent references of the given element
+        and its subelements of any depth, index and count them
+
+        Args:
+            parent(CompetenceElement): the parent of the element
+            element(CompetenceElement): the element to register
+        """
+        # depth first walk with an explicit stack
+        stack = [(parent, element)]
+        while stack:
+            parent, element = stack.pop()
+            element.competence_tree = self
+            if isinstance(element, CompetenceArea):
+                element.aspect = parent
+            elif isinstance(element, CompetenceFacet):
+                # a subfacet belongs to the area of its facet
+                element.area = (
+                    parent if isinstance(parent, CompetenceArea) else parent.area
+                )
+            element.path = f"{parent.path}/{element.id}"
+            self.elements_by_path[element.path] = element
+            self.path_trie.insert(element.path, element)
+            self.total_elements[self.get_list_name(element)] += 1
+            for sub_element in reversed(self.get_sub_elements(element)):
+                stack.append((element, sub_element))
+
+    def unregister_element(self, element: CompetenceElement):
+        """
+        remove the given element and its subelements from
+        my elements_by_path index, path trie and counters
+        """
+        for node in self.path_trie.remove(element.path):
+            del self.elements_by_path[node.path]
+            self.total_elements[self.get_list_name(node.element)] -= 1
+
+    def check_sub_element(
+        self, parent: CompetenceElement, element: CompetenceElement
+    ) -> List[CompetenceElement]:
+        """
+        check that the given element may be a subelement of the given parent
+
+        Returns:
+            List[CompetenceElement]: the subelements of the parent
+
+        Raises:
+            ValueError: if the element does not fit the parent or its path is already used
+        """
+        if self.get_sub_element_name(parent) != self.get_list_name(element):
+            raise ValueError(
+                f"a {element.__class__.__name__} can not be added to {parent.path}"
+            )
+        path = f"{parent.path}/{element.id}"
+        if self.elements_by_path.get(path, element) is not element:
+            raise ValueError(f"duplicate path {path}")
+        sub_elements = self.get_sub_elements(parent, create=True)
+        return sub_elements
+
+    def add_element(
+        self, parent_path: str, element: CompetenceElement, index: int = None
+    ) -> CompetenceElement:
+        """
+        add the given aspect, area or facet including its subelements
+        and update my paths and counters incrementally
+
+        Args:
+            parent_path(str): the path of the tree, aspect, area or facet to add the element to
+            element(CompetenceElement): the aspect, area or facet to add
+            index(int): the position in the subelements of the parent - None to append
+
+        Returns:
+            CompetenceElement: the added element
+
+        Raises:
+            ValueError: if the parent path is invalid, the element does not fit
+            the parent or the path of the element is already used
+        """
+        parent = self.lookup_by_path(parent_path, lenient=False)
+        sub_elements = self.check_sub_element(parent, element)
+        if index is None:
+            sub_elements.append(element)
+        else:
+            sub_elements.insert(index, element)
+        self.register_element(parent, element)
+        self.hierarchy_changed()
+        return element
+
+    def remove_element(self, path: str) -> CompetenceElement:
+        """
+        remove the aspect, area or facet with the given path including
+        its subelements and update my paths and counters incrementally
+
+        Args:
+            path(str): the path of the element to remove
+
+        Returns:
+            CompetenceElement: the removed element
+
+        Raises:
+            ValueError: if the path is invalid or the path of the tree itself
+        """
+        element = self.lookup_by_path(path, lenient=False)
+        if element is self:
+            raise ValueError(f"the tree {path} can not be removed")
+        parent = self.elements_by_path[path.rpartition("/")[0]]
+        sub_elements = self.get_sub_elements(parent)
+        # remove by identity - equal elements are not necessarily the same
+        index = next(i for i, sub in enumerate(sub_elements) if sub is element)
+        del sub_elements[index]
+        self.unregister_element(element)
+        self.hierarchy_changed()
+        return element
+
+    def move_element(
+        self, path: str, parent_path: str, index: int = None
+    ) -> CompetenceElement:
+        """
+        move the aspect, area or facet with the given path including
+        its subelements to the given parent
+
+        Args:
+            path(str): the path of the element to move
+            parent_path(str): the path of the new parent
+            index(int): the position in the subelements of the new parent
+                after the element has been removed - None to append
+
+        Returns:
+            CompetenceElement: the moved element
+
+        Raises:
+            ValueError: if a path is invalid, the new parent is the element itself
+            or one of its subelements, the element does not fit the new parent
+            or its new path is already used
+        """
+        element = self.lookup_by_path(path, lenient=False)
+        parent = self.lookup_by_path(parent_path, lenient=False)
+        # check before removing so that a failed move changes nothing
+        if parent_path == path or parent_path.startswith(f"{path}/"):
+            raise ValueError(f"{path} can not be moved into its own subtree")
+        self.check_sub_element(parent, element)
+        self.remove_element(path)
+        return self.add_element(parent_path, element, index)
 
     @classmethod
     def required_keys(cls) -> Tuple:
@@ -235,17 +556,45 @@ class CompetenceTree(CompetenceElement, YamlAble["CompetenceTree"]):
             element = self.elements_by_path.get(path)
         return element
 
+    def invalidate_levels(self):
+        """
+        invalidate the level index e.g. after changing the levels in place
+        """
+        self.__dict__["_level_index"] = None
+
+    @property
+    def level_index(self) -> LevelIndex:
+        """
+        the lookup tables of my levels - built on first use
+        """
+        level_index = self.__dict__.get("_level_index")
+        if level_index is None:
+            level_index = LevelIndex.from_levels(self.levels)
+            self.__dict__["_level_index"] = level_index
+        return level_index
+
     @property
     def total_valid_levels(self) -> int:
         """
-        Calculate the total number of levels excluding
+        The total number of levels excluding
         levels with a level of 0.
 
         Returns:
             int: The total number of valid levels.
         """
-        level_count = len([level for level in self.levels if level.level != 0])
-        return level_count
+        return self.level_index.total_valid_levels
+
+    def get_level(self, achievement_level: int) -> Optional[CompetenceLevel]:
+        """
+        Retrieve the level with the given level number.
+
+        Args:
+            achievement_level (int): The level number.
+
+        Returns:
+            Optional[CompetenceLevel]: The level, or None if not found.
+        """
+        return self.level_index.levels_by_number.get(achievement_level)
 
     def get_level_color(self, achievement_level: int) -> Optional[str]:
         """
@@ -257,10 +606,35 @@ class CompetenceTree(CompetenceElement, YamlAble["CompetenceTree"]):
         Returns:
             Optional[str]: The color code associated with the given level, or None if not found.
         """
-        for level in self.levels:
-            if level.level == achievement_level:
-                return level.color_code
-        return None
+        return self.level_index.colors.get(achievement_level)
+
+    def get_level_icon(self, achievement_level: int) -> Optional[str]:
+        """
+        Retrieve the icon name associated with a specific achievement level.
+
+        Args:
+            achievement_level (int): The level of achievement to get the icon for.
+
+        Returns:
+            Optional[str]: The icon name of the given level, or None if not found.
+        """
+        level = self.get_level(achievement_level)
+        return level.icon if level else None
+
+    def get_level_ratio(self, achievement_level: int) -> float:
+        """
+        Retrieve the ratio of the given achievement level to the total number of valid levels.
+
+        Args:
+            achievement_level (int): The level of achievement.
+
+        Returns:
+            float: The relative height of the achievement e.g. for a donut segment
+        """
+        ratio = self.level_index.ratios.get(achievement_level)
+        if ratio is None:
+            ratio = achievement_level / self.total_valid_levels
+        return ratio
 
     def to_pretty_json(self):
         """
@@ -354,24 +728,42 @@ class Achievement:
     evidence: Optional[str] = None
     date_assessed_iso: Optional[str] = None
 
+    def __setattr__(self, name, value):
+        if name == "path":
+            # a new path needs to be parsed again
+            self.__dict__["_path_parts"] = None
+        super().__setattr__(name, value)
+
+    @property
+    def path_parts(self) -> Tuple[str, ...]:
+        """
+        the ids of my path - parsed once and interned so that
+        achievements of the same element share the id strings
+        """
+        path_parts = self.__dict__.get("_path_parts")
+        if path_parts is None:
+            path_parts = tuple(sys.intern(part) for part in self.path.split("/"))
+            self.__dict__["_path_parts"] = path_parts
+        return path_parts
+
     @property
     def tree_id(self):
-        parts = self.path.split("/")
+        parts = self.path_parts
         return parts[0] if parts else None
 
     @property
     def aspect_id(self):
-        parts = self.path.split("/")
+        parts = self.path_parts
         return parts[1] if len(parts) > 1 else None
 
     @property
     def area_id(self):
-        parts = self.path.split("/")
+        parts = self.path_parts
         return parts[2] if len(parts) > 2 else None
 
     @property
     def facet_id(self):
-        parts = self.path.split("/")
+        parts = self.path_parts
         return parts[3] if len(parts) > 3 else None
 
 
@@ -515,6 +907,8 @@ class DynamicCompetenceMap:
         """
         Parse the given text as JSON or YAML based on the specified markup type.
 
+        The C accelerated libyaml loader and orjson are used if available.
+
         Args:
             text (str): The string content to be parsed.
             markup (str): The type of markup to use for parsing. Supported values are 'json' and 'yaml'.
@@ -526,10 +920,11 @@ class DynamicCompetenceMap:
             ValueError: If an unsupported markup format is specified.
         """
         if markup == "json":
-            data = json.loads(text)
+            # orjson.JSONDecodeError is a subclass of JSONDecodeError
+            data = orjson.loads(text) if orjson else json.loads(text)
             return data
         elif markup == "yaml":
-            data = yaml.safe_load(text)
+            data = yaml.load(text, Loader=YamlSafeLoader)
             return data
         else:
             raise ValueError(f"Unsupported markup format: {markup}")
@@ -560,12 +955,14 @@ class DynamicCompetenceMap:
     @classmethod
     def get_examples(cls, content_class=CompetenceTree, markup: str = "json") -> dict:
         examples = {}
-        for name, definition_string in cls.get_example_dcm_definitions(
-            required_keys=content_class.required_keys(), markup=markup
+        # get the parsed data to avoid parsing each definition twice
+        for name, definition_data in cls.get_example_dcm_definitions(
+            required_keys=content_class.required_keys(), markup=markup, as_text=False
         ).items():
-            example = cls.from_definition_string(
-                name, definition_string, content_class, markup=markup
-            )
+            try:
+                example = cls.from_definition_data(definition_data, content_class)
+            except Exception as ex:
+                cls.handle_markup_issue(name, None, ex, markup)
             # check the type of the example
             example_id = example.main_id
             examples[example_id] = example
@@ -602,10 +999,25 @@ class DynamicCompetenceMap:
                 debug_file_path = os.path.join("/tmp", f"{name}.json")
                 with open(debug_file_path, "w") as debug_file:
                     json.dump(data, debug_file, indent=2, default=str)
-            content = content_class.from_dict(data)
-            if isinstance(content, CompetenceTree):
-                return DynamicCompetenceMap(content)
-            else:
-                return content
+            content = cls.from_definition_data(data, content_class)
+            return content
         except Exception as ex:
             cls.handle_markup_issue(name, definition_string, ex, markup)
+
+    @classmethod
+    def from_definition_data(cls, definition_data: dict, content_class):
+        """
+        Load a DynamicCompetenceMap or Learner instance from already parsed definition data.
+
+        Args:
+            definition_data (dict): The parsed JSON or YAML definition.
+            content_class (dataclass_json): The class which will be instantiated with the data.
+
+        Returns:
+            DynamicCompetenceMap or the content_class instance loaded with the data.
+        """
+        content = content_class.from_dict(definition_data)
+        if isinstance(content, CompetenceTree):
+            return DynamicCompetenceMap(content)
+        else:
+            return content
@@ -0,0 +1,300 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+from dataclasses import fields
+from typing import List, Optional, Tuple
+
+from dcm.dcm_cache import TreeRegistry
+from dcm.dcm_core import (
+    CompetenceArea,
+    CompetenceAspect,
+    CompetenceElement,
+    CompetenceFacet,
+    CompetenceLevel,
+    CompetenceTree,
+    DynamicCompetenceMap,
+)
+
+
+class CompetenceTreeSnapshot:
+    """
+    compiled binary snapshot of a CompetenceTree
+
+    A snapshot holds the whole aspect/area/facet/level hierarchy including
+    the elements_by_path index and the parent references so that loading
+    it needs neither markup parsing nor rebuilding the dataclasses.
+
+    The file layout is:
+        magic (8 bytes), format version (4 bytes big endian),
+        schema hash (64 ascii hex digits), source digest (64 ascii hex digits),
+        pickled CompetenceTree
+
+    Snapshots are pickles - only load snapshots you have created yourself.
+    The directories compiled with the precompile command are recorded in
+    compiled_dirs_path - snapshots in other directories are never loaded.
+    """
+
+    MAGIC = b"DCMSNAP\0"
+    VERSION = 1
+    EXTENSION = ".dcmsnap"
+    HEADER_FORMAT = ">8sI64s64s"
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    compiled_dirs_path = os.path.join(
+        os.path.expanduser("~"), ".dcm", "snapshot_dirs.json"
+    )
+
+    @classmethod
+    def get_schema_hash(cls) -> str:
+        """
+        get the hash of the competence tree dataclass schema - snapshots
+        of a different schema are considered stale
+        """
+        sha256 = hashlib.sha256()
+        for element_class in [
+            CompetenceElement,
+            CompetenceFacet,
+            CompetenceArea,
+            CompetenceAspect,
+            CompetenceLevel,
+            CompetenceTree,
+        ]:
+            sha256.update(element_class.__name__.encode("utf-8"))
+            for class_field in fields(element_class):
+                sha256.update(f"{class_field.name}:{class_field.type}".encode("utf-8"))
+        schema_hash = sha256.hexdigest()
+        return schema_hash
+
+    @classmethod
+    def get_snapshot_path(cls, file_path: str) -> str:
+        """
+        get the path of the snapshot for the given definition file
+        """
+        snapshot_path = f"{file_path}{cls.EXTENSION}"
+        return snapshot_path
+
+    @classmethod
+    def save(
+        cls, competence_tree: CompetenceTree, snapshot_path: str, source_digest: str
+    ):
+        """
+        save the given competence tree as a snapshot
+
+        Args:
+            competence_tree(CompetenceTree): the tree to save
+            snapshot_path(str): the path of the snapshot file
+            source_digest(str): the digest of the definition the tree was parsed from
+        """
+        header = struct.pack(
+            cls.HEADER_FORMAT,
+            cls.MAGIC,
+            cls.VERSION,
+            cls.get_schema_hash().encode("ascii"),
+            source_digest.encode("ascii"),
+        )
+        payload = pickle.dumps(competence_tree, protocol=pickle.HIGHEST_PROTOCOL)
+        # write atomically so that readers never see a partial snapshot
+        tmp_path = f"{snapshot_path}.tmp"
+        with open(tmp_path, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            snapshot_file.write(payload)
+        os.replace(tmp_path, snapshot_path)
+
+    @classmethod
+    def load(cls, snapshot_path: str) -> Optional[Tuple[CompetenceTree, str]]:
+        """
+        load the snapshot from the given path with a single read
+
+        Args:
+            snapshot_path(str): the path of the snapshot file
+
+        Returns:
+            Tuple[CompetenceTree,str]: the competence tree and the digest of its source
+            or None if the snapshot is missing, of another version or schema
+        """
+        try:
+            with open(snapshot_path, "rb") as snapshot_file:
+                content = snapshot_file.read()
+        except FileNotFoundError:
+            return None
+        if len(content) < cls.HEADER_SIZE:
+            return None
+        magic, version, schema_hash, source_digest = struct.unpack_from(
+            cls.HEADER_FORMAT, content
+        )
+        if (
+            magic != cls.MAGIC
+            or version != cls.VERSION
+            or schema_hash.decode("ascii") != cls.get_schema_hash()
+        ):
+            return None
+        competence_tree = pickle.loads(memoryview(content)[cls.HEADER_SIZE :])
+        return competence_tree, source_digest.decode("ascii")
+
+    @classmethod
+    def get_markup(cls, file_path: str) -> str:
+        """
+        get the markup of the given definition file
+        """
+        markup = "json" if file_path.endswith(".json") else "yaml"
+        return markup
+
+    @classmethod
+    def get_source_digest(cls, file_path: str) -> str:
+        """
+        get the digest of the given definition file
+        """
+        with open(file_path, "r") as definition_file:
+            definition = definition_file.read()
+        source_digest = TreeRegistry.get_digest(definition, cls.get_markup(file_path))
+        return source_digest
+
+    @classmethod
+    def load_fresh(
+        cls, file_path: str, source_digest: Optional[str] = None
+    ) -> Optional[Tuple[CompetenceTree, str]]:
+        """
+        load the snapshot of the given definition file if it has been compiled
+        from the current content of the definition file
+
+        Args:
+            file_path(str): the path of the definition file
+            source_digest(str): the digest of the definition file if already known
+
+        Returns:
+            Tuple[CompetenceTree,str]: the competence tree and the digest of its source
+            or None if there is no fresh snapshot
+        """
+        snapshot_path = cls.get_snapshot_path(file_path)
+        if not os.path.isfile(snapshot_path):
+            return None
+        if source_digest is None:
+            source_digest = cls.get_source_digest(file_path)
+        snapshot = cls.load(snapshot_path)
+        if snapshot is not None and snapshot[1] != source_digest:
+            snapshot = None
+        return snapshot
+
+    @classmethod
+    def get_compiled_directories(cls) -> List[str]:
+        """
+        get the existing directories that have been compiled with the precompile command
+
+        Returns:
+            List[str]: the absolute paths of the compiled directories
+        """
+        compiled_dirs = []
+        if os.path.isfile(cls.compiled_dirs_path):
+            try:
+                with open(cls.compiled_dirs_path, "r") as compiled_dirs_file:
+                    compiled_dirs = json.load(compiled_dirs_file)
+            except Exception as ex:
+                print(
+                    f"ignoring invalid snapshot directories {cls.compiled_dirs_path}: {ex}",
+                    file=sys.stderr,
+                )
+        compiled_dirs = [
+            compiled_dir
+            for compiled_dir in compiled_dirs
+            if os.path.isdir(compiled_dir)
+        ]
+        return compiled_dirs
+
+    @classmethod
+    def add_compiled_directory(cls, root_path: str):
+        """
+        record the given directory as compiled
+
+        Args:
+            root_path(str): the compiled directory
+        """
+        root_path = os.path.abspath(root_path)
+        compiled_dirs = cls.get_compiled_directories()
+        if root_path in compiled_dirs:
+            return
+        compiled_dirs.append(root_path)
+        os.makedirs(os.path.dirname(cls.compiled_dirs_path), exist_ok=True)
+        tmp_path = f"{cls.compiled_dirs_path}.tmp"
+        with open(tmp_path, "w") as compiled_dirs_file:
+            json.dump(compiled_dirs, compiled_dirs_file, indent=2)
+        os.replace(tmp_path, cls.compiled_dirs_path)
+
+    @classmethod
+    def is_compiled(cls, file_path: str, compiled_dirs: List[str]) -> bool:
+        """
+        check whether the given definition file is in one of the given compiled directories
+        """
+        file_path = os.path.abspath(file_path)
+        compiled = any(
+            os.path.commonpath([compiled_dir, file_path]) == compiled_dir
+            for compiled_dir in compiled_dirs
+        )
+        return compiled
+
+    @classmethod
+    def compile_file(cls, file_path: str) -> Optional[str]:
+        """
+        compile the given definition file to a snapshot
+
+        Args:
+            file_path(str): the path of the JSON or YAML definition file
+
+        Returns:
+            str: the path of the snapshot or None if the file is not a competence tree definition
+        """
+        markup = cls.get_markup(file_path)
+        with open(file_path, "r") as definition_file:
+            definition = definition_file.read()
+        data = DynamicCompetenceMap.parse_markup(definition, markup)
+        if not DynamicCompetenceMap.is_valid_definition(
+            data, CompetenceTree.required_keys()
+        ):
+            return None
+        dcm = DynamicCompetenceMap.from_definition_data(data, CompetenceTree)
+        snapshot_path = cls.get_snapshot_path(file_path)
+        source_digest = TreeRegistry.get_digest(definition, markup)
+        cls.save(dcm.competence_tree, snapshot_path, source_digest)
+        return snapshot_path
+
+    @classmethod
+    def compile_directory(
+        cls, root_path: str, force: bool = False, debug: bool = False
+    ) -> int:
+        """
+        compile all JSON and YAML competence tree definitions in the given directory
+        and record it as compiled
+
+        Args:
+            root_path(str): the directory to compile
+            force(bool): if True also compile definitions with a fresh snapshot
+            debug(bool): if True show the compiled files
+
+        Returns:
+            int: the number of snapshots written
+        """
+        count = 0
+        for dirpath, _dirnames, filenames in os.walk(root_path):
+            for filename in sorted(filenames):
+                if not filename.endswith((".json", ".yaml")):
+                    continue
+                file_path = os.path.join(dirpath, filename)
+                if not force and cls.load_fresh(file_path) is not None:
+                    continue
+                try:
+                    snapshot_path = cls.compile_file(file_path)
+                except Exception as ex:
+                    print(f"could not compile {file_path}: {ex}", file=sys.stderr)
+                    continue
+                if snapshot_path:
+                    count += 1
+                    if debug:
+                        print(f"compiled {file_path} to {snapshot_path}")
+        cls.add_compiled_directory(root_path)
+        return count
@@ -0,0 +1,738 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from dcm.dcm_core import Achievement, Learner
+
+
+class LearnerStorage(ABC):
+    """
+    a storage backend for learners - the backends implement write and load
+    """
+
+    def __init__(self, storage_path: str):
+        """
+        constructor
+
+        Args:
+            storage_path(str): the directory to store the learners in
+        """
+        self.storage_path = storage_path
+
+    @classmethod
+    def get_storage(cls, backend: str, storage_path: str) -> "LearnerStorage":
+        """
+        get the storage for the given backend name
+
+        Args:
+            backend(str): 'json', 'journal' or 'sqlite'
+            storage_path(str): the directory to store the learners in
+
+        Returns:
+            LearnerStorage: the storage backend
+        """
+        storage_classes = {
+            "json": JsonLearnerStorage,
+            "journal": JournalLearnerStorage,
+            "sqlite": SqliteLearnerStorage,
+        }
+        if backend not in storage_classes:
+            raise ValueError(f"invalid storage backend {backend}")
+        storage = storage_classes[backend](storage_path)
+        return storage
+
+    def get_file_path(self, slug: str) -> str:
+        """
+        get the path of the JSON file for the learner with the given slug
+        """
+        file_path = os.path.join(self.storage_path, f"{slug}.json")
+        return file_path
+
+    def write_json(self, learner: Learner) -> str:
+        """
+        write the complete learner atomically as JSON
+
+        Args:
+            learner(Learner): the learner to write
+
+        Returns:
+            str: the path of the written file
+        """
+        learner_json = learner.to_json(indent=2)
+        file_path = self.get_file_path(learner.file_name)
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w") as learner_file:
+            learner_file.write(learner_json)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def read_json(self, slug: str) -> Optional[Learner]:
+        """
+        read the learner with the given slug from its JSON file
+
+        Args:
+            slug(str): the slug of the learner id
+
+        Returns:
+            Learner: the learner or None if there is no such file
+        """
+        file_path = self.get_file_path(slug)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, "r") as learner_file:
+            learner_data = json.load(learner_file)
+        learner = Learner.from_dict(learner_data)
+        return learner
+
+    @classmethod
+    def iter_json_learners(
+        cls, json_path: str, debug: bool = False
+    ) -> Iterator[Learner]:
+        """
+        read the learner JSON files of the given directory - files that
+        are no learners are skipped
+
+        Args:
+            json_path(str): the directory with the <learner_slug>.json files
+            debug(bool): if True show the files that are skipped
+
+        Yields:
+            Learner: the next learner
+        """
+        for filename in sorted(os.listdir(json_path)):
+            if not filename.endswith(".json"):
+                continue
+            file_path = os.path.join(json_path, filename)
+            try:
+                with open(file_path, "r") as learner_file:
+                    learner_data = json.load(learner_file)
+                if (
+                    not isinstance(learner_data, dict)
+                    or "learner_id" not in learner_data
+                ):
+                    if debug:
+                        print(f"skipping {file_path}: not a learner")
+                    continue
+                learner = Learner.from_dict(learner_data)
+            except Exception as ex:
+                print(f"could not read learner {file_path}: {ex}", file=sys.stderr)
+                continue
+            yield learner
+
+    @abstractmethod
+    def write(self, learner: Learner) -> str:
+        """
+        write the given learner
+
+        Returns:
+            str: the path of the written file
+        """
+
+    @abstractmethod
+    def load(self, slug: str) -> Optional[Learner]:
+        """
+        load the learner with the given slug
+
+        Returns:
+            Learner: the learner or None if there is no such learner
+        """
+
+    def export(self, learner: Learner) -> str:
+        """
+        store the given learner as a complete JSON file e.g. for downloading
+
+        Returns:
+            str: the path of the JSON file
+        """
+        file_path = self.write_json(learner)
+        return file_path
+
+    def close(self):
+        """
+        release the resources of the backend
+        """
+        pass
+
+
+class JsonLearnerStorage(LearnerStorage):
+    """
+    stores each learner as a complete JSON file
+    """
+
+    def write(self, learner: Learner) -> str:
+        file_path = self.write_json(learner)
+        return file_path
+
+    def load(self, slug: str) -> Optional[Learner]:
+        learner = self.read_json(slug)
+        return learner
+
+
+class JournalLearnerStorage(LearnerStorage):
+    """
+    stores each learner as a JSON snapshot and an append-only journal
+    of the achievement changes since the snapshot
+
+    A save only appends the changed and removed achievements to the journal.
+    The journal is compacted into a new snapshot once it has compact_after
+    entries - the compacted entries are kept in a history file. Journal entries
+    hold the complete achievement or the path of a removed achievement with
+    deleted set so replaying an entry twice does no harm.
+    """
+
+    def __init__(self, storage_path: str, compact_after: int = 100):
+        """
+        constructor
+
+        Args:
+            storage_path(str): the directory to store the learners in
+            compact_after(int): the number of journal entries that triggers a compaction
+        """
+        super().__init__(storage_path)
+        self.compact_after = compact_after
+        # the last stored achievements and the journal length by learner slug
+        self.states: Dict[str, Dict[str, dict]] = {}
+        self.journal_lengths: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def get_journal_path(self, slug: str) -> str:
+        journal_path = os.path.join(self.storage_path, f"{slug}.journal.jsonl")
+        return journal_path
+
+    def get_history_path(self, slug: str) -> str:
+        history_path = os.path.join(self.storage_path, f"{slug}.history.jsonl")
+        return history_path
+
+    def read_entries(self, path: str) -> Iterator[dict]:
+        """
+        read the entries of the given journal or history file
+
+        Args:
+            path(str): the path of the file
+
+        Yields:
+            dict: the next journal entry
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a partially written last line of a crash
+                    continue
+                yield entry
+
+    def get_history(self, slug: str) -> List[dict]:
+        """
+        get the complete assessment history of the learner with the given slug
+
+        Args:
+            slug(str): the slug of the learner id
+
+        Returns:
+            List[dict]: the journal entries in the order of the changes
+        """
+        history = list(self.read_entries(self.get_history_path(slug)))
+        history.extend(self.read_entries(self.get_journal_path(slug)))
+        return history
+
+    def load(self, slug: str) -> Optional[Learner]:
+        """
+        load the learner by replaying the journal on the snapshot
+        """
+        with self._lock:
+            learner = self.read_json(slug)
+            if learner is None:
+                return None
+            journal_length = 0
+            for entry in self.read_entries(self.get_journal_path(slug)):
+                journal_length += 1
+                self.replay_entry(learner, entry)
+            self.states[slug] = self.get_state(learner)
+            self.journal_lengths[slug] = journal_length
+        return learner
+
+    def replay_entry(self, learner: Learner, entry: dict):
+        """
+        apply the given journal entry to the given learner
+
+        Args:
+            learner(Learner): the learner to update
+            entry(dict): the journal entry
+        """
+        path = entry["path"]
+        if entry.get("deleted"):
+            learner.achievements = [
+                achievement
+                for achievement in learner.achievements
+                if achievement.path != path
+            ]
+            learner.achievements_by_path.pop(path, None)
+            return
+        achievement_data = {
+            key: value for key, value in entry.items() if key != "timestamp"
+        }
+        achievement = Achievement.from_dict(achievement_data)
+        existing = learner.achievements_by_path.get(path)
+        if existing is None:
+            learner.add_achievement(achievement)
+        else:
+            # replace by identity - equal achievements of a duplicated path
+            # are not necessarily the indexed one
+            index = next(
+                i
+                for i, candidate in enumerate(learner.achievements)
+                if candidate is existing
+            )
+            learner.achievements[index] = achievement
+            learner.achievements_by_path[path] = achievement
+
+    def ends_with_newline(self, path: str) -> bool:
+        """
+        check whether the given file is missing, empty or ends with a newline
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return True
+        with open(path, "rb") as journal_file:
+            journal_file.seek(-1, os.SEEK_END)
+            last_byte = journal_file.read(1)
+        return last_byte == b"\n"
+
+    def get_state(self, learner: Learner) -> Dict[str, dict]:
+        state = {
+            achievement.path: achievement.to_dict()
+            for achievement in learner.achievements or []
+        }
+        return state
+
+    def write(self, learner: Learner) -> str:
+        """
+        append the achievements that changed or have been removed
+        since the last write to the journal
+        """
+        slug = learner.file_name
+        with self._lock:
+            if slug not in self.states:
+                self.load(slug)
+            previous_state = self.states.get(slug)
+            if previous_state is None:
+                # a new learner starts with a snapshot
+                return self.compact(learner)
+            state = self.get_state(learner)
+            timestamp = datetime.now(timezone.utc).isoformat()
+            lines = []
+            for path, achievement_data in state.items():
+                if previous_state.get(path) != achievement_data:
+                    entry = {**achievement_data, "timestamp": timestamp}
+                    lines.append(json.dumps(entry) + "\n")
+            removed_paths = [path for path in previous_state if path not in state]
+            for path in removed_paths:
+                entry = {"path": path, "deleted": True, "timestamp": timestamp}
+                lines.append(json.dumps(entry) + "\n")
+            journal_path = self.get_journal_path(slug)
+            if lines:
+                if not self.ends_with_newline(journal_path):
+                    # do not continue a partially written line of a crash
+                    lines.insert(0, "\n")
+                with open(journal_path, "a") as journal_file:
+                    journal_file.write("".join(lines))
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+            self.states[slug] = state
+            self.journal_lengths[slug] = self.journal_lengths.get(slug, 0) + len(lines)
+            if self.journal_lengths[slug] >= self.compact_after:
+                self.compact(learner)
+        return journal_path
+
+    def compact(self, learner: Learner) -> str:
+        """
+        write a new snapshot of the given learner and move the
+        journal entries to the history
+
+        Args:
+            learner(Learner): the learner to compact
+
+        Returns:
+            str: the path of the snapshot
+        """
+        slug = learner.file_name
+        with self._lock:
+            file_path = self.write_json(learner)
+            journal_path = self.get_journal_path(slug)
+            if os.path.exists(journal_path):
+                with open(journal_path, "r") as journal_file:
+                    journal = journal_file.read()
+                with open(self.get_history_path(slug), "a") as history_file:
+                    history_file.write(journal)
+                os.remove(journal_path)
+            self.states[slug] = self.get_state(learner)
+            self.journal_lengths[slug] = 0
+        return file_path
+
+    def export(self, learner: Learner) -> str:
+        # the snapshot must not be newer than the journal
+        file_path = self.compact(learner)
+        return file_path
+
+
+class SqliteLearnerStorage(LearnerStorage):
+    """
+    stores the learners in an embedded SQLite database
+
+    The achievements are indexed by learner, path and level so that
+    cross-learner queries need no scan of all learners. The database
+    runs in WAL mode so that readers are not blocked by the writer and
+    each thread uses its own pooled connection.
+    """
+
+    DB_NAME = "learners.db"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS learner (
+        slug TEXT PRIMARY KEY,
+        learner_id TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_learner_id ON learner(learner_id);
+    CREATE TABLE IF NOT EXISTS achievement (
+        slug TEXT NOT NULL REFERENCES learner(slug) ON DELETE CASCADE,
+        seq INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        level INTEGER,
+        score REAL,
+        score_unit TEXT,
+        evidence TEXT,
+        date_assessed_iso TEXT,
+        PRIMARY KEY (slug, seq)
+    );
+    CREATE INDEX IF NOT EXISTS idx_achievement_path_level ON achievement(path, level);
+    """
+
+    ACHIEVEMENT_COLUMNS = (
+        "path",
+        "level",
+        "score",
+        "score_unit",
+        "evidence",
+        "date_assessed_iso",
+    )
+
+    def __init__(self, storage_path: str, db_path: Optional[str] = None):
+        """
+        constructor
+
+        Args:
+            storage_path(str): the directory to store the learners in
+            db_path(str): the path of the database - None for learners.db in the storage path
+        """
+        super().__init__(storage_path)
+        if db_path is None:
+            db_path = os.path.join(storage_path, self.DB_NAME)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.connections: List[sqlite3.Connection] = []
+        self.get_connection().executescript(self.SCHEMA)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        get the connection of the current thread - opening it on first use
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            with self._lock:
+                self.connections.append(connection)
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        run the statements of the with block in a single transaction
+        """
+        connection = self.get_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def write(self, learner: Learner) -> str:
+        """
+        replace the stored learner and its achievements
+        """
+        slug = learner.file_name
+        rows = [
+            (slug, seq)
+            + tuple(getattr(achievement, column) for column in self.ACHIEVEMENT_COLUMNS)
+            for seq, achievement in enumerate(learner.achievements or [])
+        ]
+        placeholders = ",".join("?" * (2 + len(self.ACHIEVEMENT_COLUMNS)))
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM achievement WHERE slug=?", (slug,))
+            connection.execute(
+                "INSERT OR REPLACE INTO learner(slug, learner_id) VALUES (?,?)",
+                (slug, learner.learner_id),
+            )
+            connection.executemany(
+                f"INSERT INTO achievement(slug, seq, {','.join(self.ACHIEVEMENT_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+        return self.db_path
+
+    def load(self, slug: str) -> Optional[Learner]:
+        connection = self.get_connection()
+        row = connection.execute(
+            "SELECT learner_id FROM learner WHERE slug=?", (slug,)
+        ).fetchone()
+        if row is None:
+            return None
+        achievement_rows = connection.execute(
+            f"SELECT {','.join(self.ACHIEVEMENT_COLUMNS)} FROM achievement "
+            "WHERE slug=? ORDER BY seq",
+            (slug,),
+        ).fetchall()
+        achievements = [
+            Achievement(**dict(zip(self.ACHIEVEMENT_COLUMNS, achievement_row)))
+            for achievement_row in achievement_rows
+        ]
+        learner = Learner(learner_id=row[0], achievements=achievements)
+        return learner
+
+    def get_learner_ids(self, path: str, min_level: int = 0) -> List[str]:
+        """
+        get the ids of the learners that reached at least the given level
+        for the competence element with the given path
+
+        Args:
+            path(str): the path of the competence element e.g. a facet
+            min_level(int): the minimum level
+
+        Returns:
+            List[str]: the sorted learner ids
+        """
+        rows = (
+            self.get_connection()
+            .execute(
+                "SELECT DISTINCT learner.learner_id FROM achievement "
+                "JOIN learner ON learner.slug = achievement.slug "
+                "WHERE achievement.path=? AND achievement.level>=? "
+                "ORDER BY learner.learner_id",
+                (path, min_level),
+            )
+            .fetchall()
+        )
+        learner_ids = [row[0] for row in rows]
+        return learner_ids
+
+    def migrate(self, json_path: str, debug: bool = False) -> int:
+        """
+        import the learner JSON files of the given directory
+
+        Args:
+            json_path(str): the directory with the <learner_slug>.json files
+            debug(bool): if True show the files that are skipped
+
+        Returns:
+            int: the number of imported learners
+        """
+        count = 0
+        for learner in self.iter_json_learners(json_path, debug=debug):
+            self.write(learner)
+            count += 1
+        return count
+
+    def close(self):
+        """
+        close all pooled connections
+        """
+        with self._lock:
+            connections = self.connections
+            self.connections = []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+
+class LearnerStore:
+    """
+    write-behind persistence of learners with a storage backend
+
+    Changed learners are only marked dirty. All learners marked dirty
+    within the debounce window are written together by a background
+    thread - JSON files atomically via a temporary file and a rename.
+    Pending writes are flushed on close.
+    """
+
+    def __init__(
+        self,
+        storage_path: str,
+        debounce: float = 2.0,
+        backend: str = "json",
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            storage_path(str): the directory to store the learners in
+            debounce(float): the time window in seconds in which changes are coalesced
+            backend(str): the storage backend - 'json', 'journal' or 'sqlite'
+            debug(bool): if True show debug information
+        """
+        self.storage_path = storage_path
+        self.storage = LearnerStorage.get_storage(backend, storage_path)
+        self.debounce = debounce
+        self.debug = debug
+        self.write_count = 0
+        self.dirty: Dict[str, Learner] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # a single worker keeps the writes of the same learner in order
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="learner-store"
+        )
+
+    def mark_dirty(self, learner: Learner):
+        """
+        mark the given learner as changed - it will be written
+        when the debounce window is over
+
+        Args:
+            learner(Learner): the changed learner
+        """
+        with self._lock:
+            self.dirty[learner.file_name] = learner
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.executor.submit(self.flush_dirty)
+        except RuntimeError:
+            # the executor has already been shut down
+            self.flush_dirty()
+
+    def flush_dirty(self) -> List[str]:
+        """
+        write all dirty learners
+
+        Returns:
+            List[str]: the paths of the written files
+        """
+        with self._lock:
+            dirty = self.dirty
+            self.dirty = {}
+        file_paths = []
+        for learner in dirty.values():
+            try:
+                file_paths.append(self.write(learner))
+            except Exception as ex:
+                print(
+                    f"could not store learner {learner.learner_id}: {ex}",
+                    file=sys.stderr,
+                )
+        return file_paths
+
+    def write(self, learner: Learner, export: bool = False) -> str:
+        """
+        write the given learner with my storage backend
+
+        Args:
+            learner(Learner): the learner to write
+            export(bool): if True write the learner as a complete JSON file
+
+        Returns:
+            str: the path of the written file
+        """
+        if export:
+            file_path = self.storage.export(learner)
+        else:
+            file_path = self.storage.write(learner)
+        self.write_count += 1
+        if self.debug:
+            print(f"Learner data stored in {file_path}")
+        return file_path
+
+    def flush(self) -> Future:
+        """
+        write all dirty learners now in the background
+
+        Returns:
+            Future: the future for the list of the written file paths
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        future = self.executor.submit(self.flush_dirty)
+        return future
+
+    async def store(self, learner: Learner) -> str:
+        """
+        write the given learner now as a complete JSON file
+        without blocking the event loop
+
+        Args:
+            learner(Learner): the learner to write
+
+        Returns:
+            str: the path of the JSON file
+        """
+        with self._lock:
+            self.dirty.pop(learner.file_name, None)
+        future = self.executor.submit(self.write, learner, True)
+        file_path = await asyncio.wrap_future(future)
+        return file_path
+
+    def load(self, slug: str) -> Optional[Learner]:
+        """
+        load the learner with the given slug - a learner
+        with pending changes is returned as is
+
+        Args:
+            slug(str): the slug of the learner id
+
+        Returns:
+            Learner: the learner or None if there is no such learner
+        """
+        with self._lock:
+            learner = self.dirty.get(slug)
+        if learner is None:
+            learner = self.storage.load(slug)
+        return learner
+
+    def close(self):
+        """
+        flush the pending changes and stop the background thread
+        """
+        self.flush().result()
+        self.executor.shutdown(wait=True)
+        self.storage.close()
@@ -0,0 +1,190 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class PathTrieNode:
+    """
+    a node of a PathTrie
+    """
+
+    __slots__ = ("path", "element", "depth", "children")
+
+    def __init__(self, path: str, element: Any, depth: int):
+        """
+        constructor
+
+        Args:
+            path(str): the full path of the node
+            element(Any): the element with the path
+            depth(int): the number of separators of the path - -1 for the root
+        """
+        self.path = path
+        self.element = element
+        self.depth = depth
+        self.children: Dict[str, "PathTrieNode"] = {}
+
+
+class PathTrie:
+    """
+    a trie of "/" separated paths e.g. tree_id/aspect_id/area_id/facet_id
+    of a competence hierarchy of arbitrary depth
+
+    Lookups and ancestor queries take O(depth) steps, a subtree
+    is iterated in depth first order without recursion.
+    The number of elements per depth is kept up to date.
+    """
+
+    separator = "/"
+
+    def __init__(self):
+        self.root = PathTrieNode("", None, -1)
+        # the number of elements by depth
+        self.depth_counts: List[int] = []
+
+    def __len__(self) -> int:
+        return sum(self.depth_counts)
+
+    def __contains__(self, path: str) -> bool:
+        return self.get_node(path) is not None
+
+    @property
+    def max_depth(self) -> int:
+        """
+        the highest depth with elements - -1 if there are none
+        """
+        max_depth = len(self.depth_counts) - 1
+        while max_depth >= 0 and self.depth_counts[max_depth] == 0:
+            max_depth -= 1
+        return max_depth
+
+    def get_depth_count(self, depth: int) -> int:
+        """
+        get the number of elements with the given depth
+        """
+        count = self.depth_counts[depth] if 0 <= depth < len(self.depth_counts) else 0
+        return count
+
+    def get_node(self, path: str) -> Optional[PathTrieNode]:
+        """
+        get the node for the given path
+
+        Args:
+            path(str): the path to look up
+
+        Returns:
+            Optional[PathTrieNode]: the node or None if the path is not in the trie
+        """
+        node = self.root
+        for key in path.split(self.separator):
+            node = node.children.get(key)
+            if node is None:
+                break
+        return node
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """
+        get the element for the given path
+        """
+        node = self.get_node(path)
+        element = node.element if node is not None else default
+        return element
+
+    def insert(self, path: str, element: Any) -> PathTrieNode:
+        """
+        insert the element with the given path - the element of an
+        existing path is replaced
+
+        Args:
+            path(str): the path of the element
+            element(Any): the element
+
+        Returns:
+            PathTrieNode: the node of the element
+
+        Raises:
+            ValueError: if the parent path is not in the trie
+        """
+        parent_path, _sep, key = path.rpartition(self.separator)
+        parent = self.get_node(parent_path) if parent_path else self.root
+        if parent is None:
+            raise ValueError(f"invalid path {path}: missing parent {parent_path}")
+        node = parent.children.get(key)
+        if node is None:
+            node = PathTrieNode(path, element, parent.depth + 1)
+            parent.children[key] = node
+            while len(self.depth_counts) <= node.depth:
+                self.depth_counts.append(0)
+            self.depth_counts[node.depth] += 1
+        else:
+            node.element = element
+        return node
+
+    def remove(self, path: str) -> List[PathTrieNode]:
+        """
+        remove the given path and all paths it is a prefix of
+
+        Args:
+            path(str): the path to remove
+
+        Returns:
+            List[PathTrieNode]: the removed nodes in depth first order
+
+        Raises:
+            ValueError: if the path is not in the trie
+        """
+        parent_path, _sep, key = path.rpartition(self.separator)
+        parent = self.get_node(parent_path) if parent_path else self.root
+        if parent is None or key not in parent.children:
+            raise ValueError(f"invalid path {path}")
+        removed = list(self.iter_subtree(path))
+        del parent.children[key]
+        for node in removed:
+            self.depth_counts[node.depth] -= 1
+        return removed
+
+    def iter_subtree(self, path: Optional[str] = None) -> Iterator[PathTrieNode]:
+        """
+        iterate the node of the given path and all nodes below it in depth first order
+
+        Args:
+            path(str): the path prefix - None for all nodes
+
+        Returns:
+            Iterator[PathTrieNode]: the nodes - empty if the path is not in the trie
+        """
+        if path is None:
+            stack = list(reversed(self.root.children.values()))
+        else:
+            node = self.get_node(path)
+            stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children.values()))
+
+    def get_ancestors(self, path: str) -> List[PathTrieNode]:
+        """
+        get the ancestors of the given path starting with the root element
+
+        Args:
+            path(str): the path
+
+        Returns:
+            List[PathTrieNode]: the nodes of all proper prefixes of the path
+
+        Raises:
+            ValueError: if the path is not in the trie
+        """
+        ancestors = []
+        node = self.root
+        for key in path.split(self.separator):
+            if node is not self.root:
+                ancestors.append(node)
+            node = node.children.get(key)
+            if node is None:
+                raise ValueError(f"invalid path {path}")
+        return ancestors
@@ -11,8 +11,8 @@ from typing import List, Optional
 from urllib.parse import urlparse
 
 import yaml
-from fastapi import HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import HTTPException, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from ngwidgets.file_selector import FileSelector
 from ngwidgets.input_webserver import InputWebserver
 from ngwidgets.webserver import WebserverConfig
@@ -20,8 +20,11 @@ from nicegui import Client, app, ui
 from pydantic import BaseModel
 
 from dcm.dcm_assessment import Assessment
+from dcm.dcm_cache import RenderCache, TreeRegistry
+from dcm.dcm_catalog import ExampleCatalog
 from dcm.dcm_chart import DcmChart
 from dcm.dcm_core import CompetenceTree, DynamicCompetenceMap, Learner
+from dcm.dcm_storage import LearnerStore
 from dcm.svg import SVG, SVGConfig
 from dcm.version import Version
 
@@ -43,10 +46,37 @@ class SVGRenderRequest(BaseModel):
     config: Optional[SVGConfig] = None
 
 
+class SVGBatchRenderRequest(SVGRenderRequest):
+    """
+    A request for rendering one SVG per learner for the same competence tree.
+
+    Attributes:
+        learners (List[dict]): the learners as dicts in the JSON format of the Learner class
+    """
+
+    learners: List[dict]
+
+
 @dataclass
 class ServerConfig:
+    """
+    configuration of the server
+
+    Attributes:
+        storage_secret (str): the secret for the nicegui storage
+        storage_path (str): the directory where learners are stored
+        render_cache_size (int): maximum number of rendered SVGs to cache
+        render_cache_ttl (float): time to live of a cached SVG in seconds
+        store_debounce (float): time window in seconds in which learner changes are coalesced
+        storage_backend (str): how learners are stored - 'json', 'journal' or 'sqlite'
+    """
+
     storage_secret: str
     storage_path: str
+    render_cache_size: int = 256
+    render_cache_ttl: Optional[float] = 3600.0
+    store_debounce: float = 2.0
+    storage_backend: str = "json"
 
     @classmethod
     def from_yaml(cls, yaml_path: str):
@@ -83,98 +113,102 @@ class DynamicCompentenceMapWebServer(InputWebserver):
         InputWebserver.__init__(
             self, config=DynamicCompentenceMapWebServer.get_config()
         )
-        self.examples = DynamicCompetenceMap.get_examples(markup="yaml")
+        self.tree_registry = TreeRegistry.get_instance()
+        # the examples are parsed lazily on first use
+        self.examples = ExampleCatalog(
+            [DynamicCompetenceMap.examples_path()],
+            markup="yaml",
+            tree_registry=self.tree_registry,
+        )
         self.dcm = None
+        self.dcm_chart = None
         self.container = None
         self.learner = None
         self.assessment = None
         self.text_mode = "none"
         config_path = os.path.join(os.environ["HOME"], ".dcm/config.yaml")
         self.server_config = ServerConfig.from_yaml(config_path)
+        self.render_cache = RenderCache(
+            max_entries=self.server_config.render_cache_size,
+            ttl=self.server_config.render_cache_ttl,
+        )
+        self.learner_store = LearnerStore(
+            self.server_config.storage_path,
+            debounce=self.server_config.store_debounce,
+            backend=self.server_config.storage_backend,
+        )
+        app.on_shutdown(self.learner_store.close)
 
         @app.get("/learner/{learner_slug}")
         async def show_learner(learner_slug: str):
             return await self.assess_learner_by_slug(learner_slug)
 
         @app.post("/svg/")
-        async def render_svg(svg_render_request: SVGRenderRequest) -> HTMLResponse:
+        async def render_svg(
+            svg_render_request: SVGRenderRequest, request: Request
+        ) -> HTMLResponse:
             """
             render the given request
             """
-            return await self.render_svg(svg_render_request)
-
-        @app.get("/description/{tree_id}/{aspect_id}/{area_id}/{facet_id}")
-        async def get_description_for_facet(
-            tree_id: str,
-            aspect_id: str = None,
-            area_id: str = None,
-            facet_id: str = None,
-        ) -> HTMLResponse:
-            """
-            Endpoints to get the description of a competence facet
+            if_none_match = request.headers.get("if-none-match")
+            return await self.render_svg(svg_render_request, if_none_match)
 
-
-            Args:
-                tree_id (str): ID of the tree
-                area_id (str): ID of the area
-                aspect_id (str, optional): ID of the aspect. Defaults to None.
-                facet_id (str, optional): ID of the facet. Defaults to None.
-
-            Returns:
-                HTMLResponse: HTML content of the description.
+        @app.post("/svg/batch")
+        async def render_svg_batch(
+            svg_batch_render_request: SVGBatchRenderRequest,
+        ) -> StreamingResponse:
             """
-            path = f"{tree_id}/{aspect_id}/{area_id}/{facet_id}"
-            return await self.show_description(path)
-
-        @app.get("/description/{tree_id}/{aspect_id}/{area_id}")
-        async def get_description_for_area(
-            tree_id: str, aspect_id: str = None, area_id: str = None
-        ) -> HTMLResponse:
+            render the given batch request
             """
-            Endpoints to get the description of a
-            competence area
+            return await self.render_svg_batch(svg_batch_render_request)
 
-            Args:
-                tree_id (str): ID of the tree
-                area_id (str): ID of the area
-                aspect_id (str, optional): ID of the aspect. Defaults to None.
-
-            Returns:
-                HTMLResponse: HTML content of the description.
+        @app.post("/svg/stream")
+        async def render_svg_stream(
+            svg_render_request: SVGRenderRequest,
+        ) -> StreamingResponse:
             """
-            path = f"{tree_id}/{aspect_id}/{area_id}"
-            return await self.show_description(path)
+            render the given request as a stream
+            """
+            return await self.render_svg_stream(svg_render_request)
 
-        @app.get("/description/{tree_id}/{aspect_id}")
-        async def get_description_for_aspect(
-            tree_id: str, aspect_id: str = None
-        ) -> HTMLResponse:
+        @app.get("/cache/stats")
+        async def get_cache_stats() -> dict:
+            """
+            get the hit/miss/eviction counters of the caches
+            """
+            stats = {
+                "render": self.render_cache.get_stats(),
+                "trees": self.tree_registry.get_stats(),
+            }
+            return stats
+
+        @app.get("/description/{path:path}")
+        async def get_description(path: str) -> HTMLResponse:
             """
-            Endpoint to get the description of a competence aspect
+            Endpoint to get the description of a competence tree, aspect, area,
+            facet or subfacet of any depth
 
             Args:
-                tree_id (str): ID of the tree
-                area_id (str): ID of the area
+                path (str): the path of the element e.g. tree_id/aspect_id/area_id/facet_id
 
             Returns:
                 HTMLResponse: HTML content of the description.
             """
-            path = f"{tree_id}/{aspect_id}"
             return await self.show_description(path)
 
-        @app.get("/description/{tree_id}")
-        async def get_description_for_tree(tree_id: str) -> HTMLResponse:
-            """
-            Endpoint to get the description of a competence tree
+    def lookup_dcm(self, tree_id: str) -> Optional[DynamicCompetenceMap]:
+        """
+        look up the competence map for the given tree id in the example catalog -
+        trees posted to the rendering endpoints are never looked up by their id
 
-            Args:
-                tree_id (str): ID of the tree
+        Args:
+            tree_id(str): the id of the competence tree
 
-            Returns:
-                HTMLResponse: HTML content of the description.
-            """
-            path = f"{tree_id}"
-            return await self.show_description(path)
+        Returns:
+            DynamicCompetenceMap: the competence map or None if the tree is unknown
+        """
+        dcm = self.examples.get(tree_id)
+        return dcm
 
     async def show_description(self, path: str = None) -> HTMLResponse:
         """
@@ -192,8 +226,8 @@ class DynamicCompentenceMapWebServer(InputWebserver):
         """
         path_parts = path.split("/")
         tree_id = path_parts[0]
-        if tree_id in self.examples:
-            example = self.examples[tree_id]
+        example = self.lookup_dcm(tree_id)
+        if example is not None:
             element = example.competence_tree.lookup_by_path(path)
             if element:
                 content = element.as_html()
@@ -205,19 +239,94 @@ class DynamicCompentenceMapWebServer(InputWebserver):
             msg = f"unknown competence tree {tree_id}"
             raise HTTPException(status_code=404, detail=msg)
 
-    async def render_svg(self, svg_render_request: SVGRenderRequest) -> HTMLResponse:
+    async def render_svg(
+        self, svg_render_request: SVGRenderRequest, if_none_match: str = None
+    ) -> Response:
         """
-        render the given request
+        render the given request - identical requests are
+        served from the render cache
+
+        Args:
+            svg_render_request(SVGRenderRequest): the request to render
+            if_none_match(str): the If-None-Match header of the request if any
+
+        Returns:
+            Response: the SVG markup or a 304 Not Modified response
         """
         r = svg_render_request
-        dcm = DynamicCompetenceMap.from_definition_string(
-            r.name, r.definition, content_class=CompetenceTree, markup=r.markup
+        key = RenderCache.get_key(r.definition, r.markup, r.config, self.text_mode)
+        etag = RenderCache.get_etag(key)
+        headers = {"ETag": etag}
+        if RenderCache.etag_matches(etag, if_none_match):
+            return Response(status_code=304, headers=headers)
+        svg_markup = self.render_cache.get(key)
+        if svg_markup is None:
+            dcm = self.tree_registry.get_dcm(r.name, r.definition, markup=r.markup)
+            dcm_chart = DcmChart(dcm)
+            svg_markup = dcm_chart.generate_svg_markup(
+                config=r.config, with_java_script=True, text_mode=self.text_mode
+            )
+            self.render_cache.put(key, svg_markup)
+        response = HTMLResponse(content=svg_markup, headers=headers)
+        return response
+
+    async def render_svg_batch(
+        self, svg_batch_render_request: SVGBatchRenderRequest
+    ) -> StreamingResponse:
+        """
+        render the given batch request - the tree is parsed and its
+        geometry computed once for all learners
+
+        Args:
+            svg_batch_render_request(SVGBatchRenderRequest): the request to render
+
+        Returns:
+            StreamingResponse: newline delimited JSON with one
+            {"learner_id":...,"svg":...} object per learner
+        """
+        r = svg_batch_render_request
+        dcm = self.tree_registry.get_dcm(r.name, r.definition, markup=r.markup)
+        try:
+            learners = [Learner.from_dict(learner_data) for learner_data in r.learners]
+        except Exception as ex:
+            raise HTTPException(status_code=422, detail=f"invalid learner: {ex}")
+        dcm_chart = DcmChart(dcm)
+
+        def generate_lines():
+            for learner_id, svg_markup in dcm_chart.generate_svg_markups(
+                learners,
+                config=r.config,
+                with_java_script=True,
+                text_mode=self.text_mode,
+            ):
+                line = json.dumps({"learner_id": learner_id, "svg": svg_markup})
+                yield f"{line}\n"
+
+        response = StreamingResponse(
+            generate_lines(), media_type="application/x-ndjson"
         )
+        return response
+
+    async def render_svg_stream(
+        self, svg_render_request: SVGRenderRequest
+    ) -> StreamingResponse:
+        """
+        render the given request streaming the markup while
+        it is generated - bypassing the render cache
+
+        Args:
+            svg_render_request(SVGRenderRequest): the request to render
+
+        Returns:
+            StreamingResponse: the SVG markup
+        """
+        r = svg_render_request
+        dcm = self.tree_registry.get_dcm(r.name, r.definition, markup=r.markup)
         dcm_chart = DcmChart(dcm)
-        svg_markup = dcm_chart.generate_svg_markup(
+        chunks = dcm_chart.iter_svg_markup(
             config=r.config, with_java_script=True, text_mode=self.text_mode
         )
-        response = HTMLResponse(content=svg_markup)
+        response = StreamingResponse(chunks, media_type="text/html")
         return response
 
     def get_basename_without_extension(self, url) -> str:
@@ -245,12 +354,11 @@ class DynamicCompentenceMapWebServer(InputWebserver):
                 # Determine the format based on the file extension
                 markup = "json" if input_source.endswith(".json") else "yaml"
                 if "learner_id" in definition:
-                    content_class = Learner
+                    item = DynamicCompetenceMap.from_definition_string(
+                        name, definition, content_class=Learner, markup=markup
+                    )
                 else:
-                    content_class = CompetenceTree
-                item = DynamicCompetenceMap.from_definition_string(
-                    name, definition, content_class=content_class, markup=markup
-                )
+                    item = self.tree_registry.get_dcm(name, definition, markup=markup)
                 self.render_item(item)
         except Exception as ex:
             self.handle_exception(ex, self.do_trace)
@@ -289,13 +397,16 @@ class DynamicCompentenceMapWebServer(InputWebserver):
                 self.learner = None
             self.dcm = dcm
             self.assess_state(True)
-            dcm_chart = DcmChart(dcm)
-            svg_markup = dcm_chart.generate_svg_markup(
+            # reuse the chart and thus its layout for further learners and selections
+            if self.dcm_chart is None or self.dcm_chart.dcm is not dcm:
+                self.dcm_chart = DcmChart(dcm)
+            svg_markup = self.dcm_chart.generate_svg_markup(
                 learner=learner,
                 selected_paths=selected_paths,
                 config=self.svg.config,
                 with_java_script=False,
                 text_mode=self.text_mode,
+                patchable=True,
             )
             # Use the new get_java_script method to get the JavaScript
             self.svg_view.content = (svg_markup,)
@@ -303,10 +414,41 @@ class DynamicCompentenceMapWebServer(InputWebserver):
         except Exception as ex:
             self.handle_exception(ex, self.do_trace)
 
+    def update_dcm(self, dcm, learner: Learner = None, selected_paths: List = []):
+        """
+        update the rendered dynamic competence map - only the segments whose
+        achievement level or selection changed are sent to the browser
+        if the map is already shown
+
+        Args:
+            dcm(DynamicCompetenceMap): the competence map
+            learner(Learner): the learner to show the achievements for
+            selected_paths (List, optional): A list of paths that should be highlighted
+        """
+        dcm_chart = self.dcm_chart
+        if (
+            dcm_chart is None
+            or dcm_chart.dcm is not dcm
+            or self.dcm is not dcm
+            or not dcm_chart.patchable
+            or dcm_chart.text_mode != self.text_mode
+        ):
+            self.render_dcm(
+                dcm, learner, selected_paths=selected_paths, clear_assessment=False
+            )
+            return
+        try:
+            patches = dcm_chart.generate_svg_patches(learner, selected_paths)
+            if patches:
+                ui.run_javascript(f"applySvgPatches({json.dumps(patches)})")
+        except Exception as ex:
+            self.handle_exception(ex, self.do_trace)
+
     def prepare_ui(self):
         config = SVGConfig(with_popup=True)
         self.svg = SVG(config=config)
         java_script = self.svg.get_java_script()
+        java_script += self.svg.get_patch_java_script()
 
         # Add the script using ui.add_head_html()
         ui.add_head_html(java_script)
@@ -404,19 +546,13 @@ class DynamicCompentenceMapWebServer(InputWebserver):
         """
 
         def show():
-            learner_file = os.path.join(
-                self.server_config.storage_path, f"{learner_slug}.json"
-            )
-            if not os.path.exists(learner_file):
-                raise HTTPException(status_code=404, detail="Learner not found")
             try:
-                with open(learner_file, "r") as file:
-                    learner_data = json.load(file)
-                    learner = Learner.from_dict(learner_data)
+                learner = self.learner_store.load(learner_slug)
             except Exception as e:
                 # Handle any exceptions related to file reading or JSON parsing
                 raise HTTPException(status_code=500, detail=str(e))
-                pass
+            if learner is None:
+                raise HTTPException(status_code=404, detail="Learner not found")
             self.assess(learner)
 
         await self.setup_content_div(show())
@@ -436,9 +572,9 @@ class DynamicCompentenceMapWebServer(InputWebserver):
                     f"There must be exactly one competence tree referenced but there are: {tree_ids}"
                 )
             tree_id = tree_ids[0]
-        if not tree_id in self.examples:
+        dcm = self.lookup_dcm(tree_id)
+        if dcm is None:
             raise Exception(f"invalid competence tree_id {tree_id}")
-        dcm = self.examples[tree_id]
         # assess_learner will render ...
         # self.render_dcm(dcm,learner=learner)
         self.assess_learner(dcm, learner)
@@ -462,7 +598,7 @@ class DynamicCompentenceMapWebServer(InputWebserver):
                 if not self.assessment:
                     ui.notify("no active learner assessment")
                     return
-                json_path = self.assessment.store()
+                json_path = await self.assessment.store()
                 ui.notify(f"downloading {json_path}")
                 ui.download(json_path)
         except Exception as ex:
@@ -492,5 +628,7 @@ class DynamicCompentenceMapWebServer(InputWebserver):
             DynamicCompetenceMap.examples_path(),
             self.root_path,
         ]
+        if self.root_path:
+            self.examples.add_root_path(self.root_path)
         self.args.storage_secret = self.server_config.storage_secret
         pass
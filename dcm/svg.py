@@ -1,8 +1,8 @@
 import html
 import math
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, TextIO, Tuple
 
 
 @dataclass
@@ -19,6 +19,9 @@ class SVGConfig:
         indent (str): Indentation string, default is two spaces.
         default_color (str): Default color code for SVG elements.
         with_pop(bool): if True support popup javascript functionality
+        compact(bool): if True leave out indentation, comments and redundant attributes
+        deterministic(bool): if True identical input gives byte identical output - no timestamp and fixed float formatting
+        precision(int): the number of decimal places of coordinates in compact or deterministic mode
     """
 
     width: int = 600
@@ -29,6 +32,9 @@ class SVGConfig:
     indent: str = "  "
     default_color: str = "#C0C0C0"
     with_popup: bool = False
+    compact: bool = False
+    deterministic: bool = False
+    precision: int = 2
 
     @property
     def total_height(self) -> int:
@@ -130,11 +136,13 @@ class Arc:
     middle_y: Optional[float] = None
 
 
-@dataclass
-class DonutSegment(SVGNode):
+@dataclass(frozen=True)
+class DonutSegment:
     """
     A donut segment representing a
     section of a donut chart.
+
+    Segments are immutable values - use replace to derive a modified segment.
     """
 
     cx: float = 0.0
@@ -155,6 +163,19 @@ class DonutSegment(SVGNode):
         large_arc_flag = "1" if self.end_angle - self.start_angle >= 180 else "0"
         return large_arc_flag
 
+    def replace(self, **changes) -> "DonutSegment":
+        """
+        derive a new segment with the given changes e.g. another outer_radius
+
+        Args:
+            **changes: the field values to change
+
+        Returns:
+            DonutSegment: the derived segment
+        """
+        segment = replace(self, **changes)
+        return segment
+
     def relative_angle(self, angle_factor=0.5) -> float:
         """Calculate a relative angle of the donut segment."""
         relative_angle = (self.start_angle + self.end_angle) * angle_factor
@@ -222,7 +243,9 @@ class SVG:
         self.width = self.config.width
         self.height = self.config.height
         self.elements = []
-        self.indent = self.config.indent
+        self.indent = "" if self.config.compact else self.config.indent
+        # in streaming mode the elements are written to the writer
+        self.writer = None
 
     def get_indent(self, level) -> str:
         """
@@ -231,6 +254,38 @@ class SVG:
         indentation = f"{self.indent * level}"
         return indentation
 
+    def fmt(self, value: float) -> str:
+        """
+        format the given coordinate - rounded to the configured
+        precision in compact or deterministic mode
+
+        Args:
+            value(float): the value to format
+
+        Returns:
+            str: the formatted value
+        """
+        if not (self.config.compact or self.config.deterministic):
+            return f"{value}"
+        formatted = f"{value:.{self.config.precision}f}"
+        if "." in formatted:
+            formatted = formatted.rstrip("0").rstrip(".")
+        if formatted == "-0":
+            formatted = "0"
+        return formatted
+
+    def get_font_attrs(self) -> str:
+        """
+        get the font attributes of text elements - in compact mode
+        the font is set by the style sheet instead
+        """
+        if self.config.compact:
+            return ""
+        font_attrs = (
+            f' font-family="{self.config.font}" font-size="{self.config.font_size}"'
+        )
+        return font_attrs
+
     def get_svg_style(self) -> str:
         """
         Define styles for SVG elements.
@@ -245,6 +300,12 @@ class SVG:
             f"{self.indent * 2}.selected {{ fill-opacity: 0.5; stroke: blue; stroke-width: 1.5;}}\n"
             f"{self.indent * 2}.noclick {{ pointer-events: none; }}\n"  # style for non-clickable text
         )
+        if self.config.compact:
+            # shared font settings instead of attributes on each text element
+            style += (
+                f"text {{ font-family: {self.config.font}; font-size: {self.config.font_size}px; "
+                "dominant-baseline: middle; }\n"
+            )
 
         if self.config.with_popup:
             style += (
@@ -327,20 +388,24 @@ class SVG:
         if middle_arc:
             arc = segment.get_arc(radial_offset=radial_offset)
 
+            f = self.fmt
             # Create the path for the middle arc
             path_str = (
-                f"M {arc.start_x} {arc.start_y} "  # Move to start of middle arc
-                f"A {arc.radius} {arc.radius} 0 {segment.large_arc_flag} 1 {arc.end_x} {arc.end_y}"
+                f"M {f(arc.start_x)} {f(arc.start_y)} "  # Move to start of middle arc
+                f"A {f(arc.radius)} {f(arc.radius)} 0 {segment.large_arc_flag} 1 {f(arc.end_x)} {f(arc.end_y)}"
             )
         else:
+            f = self.fmt
             outer_arc = segment.get_arc(radial_offset=1)
             inner_arc = segment.get_arc(radial_offset=0)
+            outer_radius = f(segment.outer_radius)
+            inner_radius = f(segment.inner_radius)
             path_str = (
-                f"M {inner_arc.start_x} {inner_arc.start_y} "  # Move to start of inner arc
-                f"L {outer_arc.start_x} {outer_arc.start_y} "  # Line to start of outer arc
-                f"A {segment.outer_radius} {segment.outer_radius} 0 {segment.large_arc_flag} 1 {outer_arc.end_x} {outer_arc.end_y} "  # Outer arc
-                f"L {inner_arc.end_x} {inner_arc.end_y} "  # Line to end of inner arc
-                f"A {segment.inner_radius} {segment.inner_radius} 0 {segment.large_arc_flag} 0 {inner_arc.start_x} {inner_arc.start_y} "  # Inner arc (reverse)
+                f"M {f(inner_arc.start_x)} {f(inner_arc.start_y)} "  # Move to start of inner arc
+                f"L {f(outer_arc.start_x)} {f(outer_arc.start_y)} "  # Line to start of outer arc
+                f"A {outer_radius} {outer_radius} 0 {segment.large_arc_flag} 1 {f(outer_arc.end_x)} {f(outer_arc.end_y)} "  # Outer arc
+                f"L {f(inner_arc.end_x)} {f(inner_arc.end_y)} "  # Line to end of inner arc
+                f"A {inner_radius} {inner_radius} 0 {segment.large_arc_flag} 0 {f(inner_arc.start_x)} {f(inner_arc.start_y)} "  # Inner arc (reverse)
                 "Z"
             )
 
@@ -355,12 +420,24 @@ class SVG:
             indent_level (int): Indentation level for the element.
             comment(str): optional comment to add
         """
+        if self.config.compact:
+            element = element.strip()
         base_indent = self.get_indent(indent_level)
-        if comment:
+        if comment and not self.config.compact:
             indented_comment = f"{base_indent}<!-- {comment} -->\n"
-            self.elements.append(indented_comment)
+            self.write(indented_comment)
         indented_element = f"{base_indent}{element}\n"
-        self.elements.append(indented_element)
+        self.write(indented_element)
+
+    def write(self, markup: str):
+        """
+        write the given markup to my writer in streaming mode
+        or keep it in my elements otherwise
+        """
+        if self.writer is None:
+            self.elements.append(markup)
+        else:
+            self.writer.write(markup)
 
     def add_circle(self, config: SVGNodeConfig):
         """
@@ -370,7 +447,7 @@ class SVG:
             config (SVGNodeConfig): Configuration for the circle element.
         """
         color = config.fill if config.fill else self.config.default_color
-        circle_element = f'<circle cx="{config.x}" cy="{config.y}" r="{config.width}" fill="{color}" class="{config.element_class}" />'
+        circle_element = f'<circle cx="{self.fmt(config.x)}" cy="{self.fmt(config.y)}" r="{self.fmt(config.width)}" fill="{color}" class="{config.element_class}" />'
 
         # If URL is provided, wrap the circle in an anchor tag to make it clickable
         if config.url:
@@ -409,7 +486,7 @@ class SVG:
             indent_level (int): Indentation level for the rectangle.
         """
         color = fill if fill else self.config.default_color
-        rect = f'<rect x="{x}" y="{y}" width="{width}" height="{height}" fill="{color}" />\n'
+        rect = f'<rect x="{self.fmt(x)}" y="{self.fmt(y)}" width="{self.fmt(width)}" height="{self.fmt(height)}" fill="{color}" />\n'
         self.add_element(rect, indent_level=indent_level)
 
     def add_legend_column(
@@ -479,20 +556,33 @@ class SVG:
         # Create a text element to hold the tspan elements
         # Only include the transform attribute if it is provided
         transform_attr = f'transform="{transform}" ' if transform else ""
+        x = self.fmt(x)
+        if self.config.compact:
+            # leave out the defaults and the font attributes of the style sheet
+            text_attrs = (
+                f'font-weight="{font_weight}" ' if font_weight != "normal" else ""
+            )
+            if text_anchor != "start":
+                text_attrs += f'text-anchor="{text_anchor}" '
+        else:
+            text_attrs = (
+                f'font-family="{self.config.font}" '
+                f'font-size="{self.config.font_size}" '
+                f'font-weight="{font_weight}" '
+                f'text-anchor="{text_anchor}" '
+                f'dominant-baseline="middle" '
+            )
 
         text_element = (
-            f'\n{self.get_indent(indent_level)}<text class="{text_class}" x="{x}" y="{y}" fill="{fill}" '
-            f'font-family="{self.config.font}" '
-            f'font-size="{self.config.font_size}" '
-            f'font-weight="{font_weight}" '
-            f'text-anchor="{text_anchor}" '
-            f'dominant-baseline="middle" '
+            f'\n{self.get_indent(indent_level)}<text class="{text_class}" x="{x}" y="{self.fmt(y)}" fill="{fill}" '
+            f"{text_attrs}"
             f"{transform_attr}>"
         )
         # Add tspan elements for each line
+        line_height = self.fmt(self.config.line_height)
         for line in text_obj.lines:
             escaped_line = html.escape(line)
-            text_element += f'\n{self.get_indent(indent_level+1)}<tspan x="{x}" dy="{self.config.line_height}">{escaped_line}</tspan>'
+            text_element += f'\n{self.get_indent(indent_level+1)}<tspan x="{x}" dy="{line_height}">{escaped_line}</tspan>'
 
         text_element += f"\n{self.get_indent(indent_level)}</text>\n"
         self.add_element(text_element)
@@ -534,6 +624,7 @@ class SVG:
         self,
         config: SVGNodeConfig,
         segment: DonutSegment,
+        donut_path: str = None,
     ) -> None:
         """
         Add a donut segment to the SVG.
@@ -541,13 +632,14 @@ class SVG:
         Args:
             config (SVGNodeConfig): Configuration for the donut segment.
             segment(DonutSegment)
+            donut_path(str): the precomputed path definition of the segment if available
         """
         color = config.fill if config.fill else self.config.default_color
 
         if color is None:
             color = self.config.default_color
 
-        path_str = self.get_donut_path(segment)
+        path_str = donut_path if donut_path else self.get_donut_path(segment)
 
         # Assemble the path and title elements
         path_element = f'<path d="{path_str}" fill="{color}" />\n'
@@ -610,7 +702,8 @@ class SVG:
             if direction == "angled":
                 mid_angle = segment.relative_angle(0.5)
                 rotation_angle = self.get_text_rotation(mid_angle)
-                transform = f"rotate({rotation_angle}, {text_x}, {text_y})"
+                f = self.fmt
+                transform = f"rotate({f(rotation_angle)}, {f(text_x)}, {f(text_y)})"
 
             # Add text using the add_text method
             self.add_text(
@@ -639,7 +732,7 @@ class SVG:
                     f'<path id="{path_id}" d="{path_d}" fill="none" stroke="none" />'
                 )
 
-                text_tag = f"""<text class="{text_class}" fill="{color}" font-family="{self.config.font}" font-size="{self.config.font_size}">"""
+                text_tag = f"""<text class="{text_class}" fill="{color}"{self.get_font_attrs()}>"""
                 self.add_element(text_tag, indent_level=indent_level)
                 text_path = f"""<textPath  xlink:href="#{path_id}" startOffset="50%" dominant-baseline="middle" text-anchor="middle">{html.escape(line)}</textPath>"""
                 self.add_element(text_path, indent_level=indent_level + 1)
@@ -701,26 +794,50 @@ class SVG:
     """
         return popup_script
 
-    def get_svg_markup(self, with_java_script: bool = False) -> str:
+    def get_patch_java_script(self) -> str:
         """
-        Generate the complete SVG markup.
-
-        Args:
-            with_java_script(bool): if True(default) the javascript code is included otherwise
-            it's available via the get_java_script function
+        get the java script code to apply the patches of an incremental update
+        """
+        patch_script = """
+    <script>
+        function applySvgPatches(patches) {
+            // replace the content of the groups of the changed segments
+            for (const patch of patches) {
+                var group = document.getElementById(patch.id);
+                if (group) {
+                    group.innerHTML = patch.markup;
+                }
+            }
+        }
+    </script>
+    """
+        return patch_script
 
-        Returns:
-            str: String containing the complete SVG markup.
+    def get_svg_header(self) -> str:
+        """
+        get the header of the SVG markup including the opening svg tag
         """
-        # Get current date and time
-        now = datetime.now()
-        formatted_now = now.strftime("%Y-%m-%d %H:%M:%S")
         header = (
-            f"<!-- generated by dcm https://github.com/WolfgangFahl/dcm at {formatted_now} -->\n"
             f'<svg xmlns="http://www.w3.org/2000/svg" '
             f'xmlns:xlink="http://www.w3.org/1999/xlink" '
             f'width="{self.width}" height="{self.config.total_height}">\n'
         )
+        if self.config.deterministic and not self.config.compact:
+            header = f"<!-- generated by dcm https://github.com/WolfgangFahl/dcm -->\n{header}"
+        elif not self.config.compact:
+            # Get current date and time
+            now = datetime.now()
+            formatted_now = now.strftime("%Y-%m-%d %H:%M:%S")
+            header = (
+                f"<!-- generated by dcm https://github.com/WolfgangFahl/dcm at {formatted_now} -->\n"
+                f"{header}"
+            )
+        return header
+
+    def get_svg_popup(self) -> str:
+        """
+        get the popup markup if my config asks for popups
+        """
         popup = (
             """
         <!-- Add a foreignObject for the popup -->
@@ -737,13 +854,73 @@ class SVG:
             if self.config.with_popup
             else ""
         )
-        styles = self.get_svg_style()
-        body = "".join(self.elements)
-        footer = "</svg>"
-        java_script = self.get_java_script() if with_java_script else ""
-        svg_markup = f"{header}{java_script}{styles}{body}{popup}{footer}"
+        if popup and self.config.compact:
+            lines = [line.strip() for line in popup.splitlines()]
+            popup = "".join(
+                f"{line}\n" for line in lines if line and not line.startswith("<!--")
+            )
+        return popup
+
+    def iter_svg_markup(self, with_java_script: bool = False) -> Iterator[str]:
+        """
+        iterate over the parts of the complete SVG markup without
+        joining them
+
+        Args:
+            with_java_script(bool): if True the javascript code is included
+
+        Yields:
+            str: the next part of the SVG markup
+        """
+        yield self.get_svg_header()
+        if with_java_script:
+            yield self.get_java_script()
+        yield self.get_svg_style()
+        yield from self.elements
+        yield self.get_svg_popup()
+        yield "</svg>"
+
+    def get_svg_markup(self, with_java_script: bool = False) -> str:
+        """
+        Generate the complete SVG markup.
+
+        Args:
+            with_java_script(bool): if True(default) the javascript code is included otherwise
+            it's available via the get_java_script function
+
+        Returns:
+            str: String containing the complete SVG markup.
+        """
+        svg_markup = "".join(self.iter_svg_markup(with_java_script=with_java_script))
         return svg_markup
 
+    def open(self, writer: TextIO, with_java_script: bool = False):
+        """
+        switch to streaming mode - the header, styles and the elements added
+        so far are written to the given writer and all further elements are
+        written as soon as they are added
+
+        Args:
+            writer(TextIO): any file-like object with a write method
+            with_java_script(bool): if True the javascript code is included
+        """
+        writer.write(self.get_svg_header())
+        if with_java_script:
+            writer.write(self.get_java_script())
+        writer.write(self.get_svg_style())
+        for element in self.elements:
+            writer.write(element)
+        self.elements = []
+        self.writer = writer
+
+    def close(self):
+        """
+        finish streaming mode by writing the popup and the closing svg tag
+        """
+        self.writer.write(self.get_svg_popup())
+        self.writer.write("</svg>")
+        self.writer = None
+
     def save(self, filename: str):
         """
         Save the SVG markup to a file.
@@ -752,4 +929,5 @@ class SVG:
             filename (str): Filename to save the SVG markup.
         """
         with open(filename, "w") as file:
-            file.write(self.get_svg_markup())
+            for part in self.iter_svg_markup():
+                file.write(part)
@@ -6,6 +6,7 @@ Experience API xAPI support module
 """
 import json
 import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO
 
 from dcm.dcm_core import Achievement, CompetenceTree, Learner
 
@@ -13,15 +14,163 @@ from dcm.dcm_core import Achievement, CompetenceTree, Learner
 class XAPI:
     """
     Experience API xAPI support class
+
+    Statements are deduplicated by their id within each conversion and
+    the achievements of a competence path are merged with the merge policy:
+        latest: the most recently assessed achievement wins
+        best: the achievement with the highest score wins
+        first: the first assessed achievement wins
     """
 
-    def __init__(self):
+    MERGE_POLICIES = ("latest", "best", "first")
+
+    def __init__(self, merge_policy: str = "latest"):
+        """
+        constructor
+
+        Args:
+            merge_policy(str): 'latest', 'best' or 'first'
+        """
+        if merge_policy not in self.MERGE_POLICIES:
+            raise ValueError(f"invalid merge policy {merge_policy}")
         self.xapi_dict = {}
+        self.merge_policy = merge_policy
+        # the number of duplicates skipped by the last conversion
+        self.duplicates = 0
 
     def warn(self, msg):
         print(msg, file=sys.stderr)
         pass
 
+    @classmethod
+    def get_statement(cls, entry: dict) -> Optional[dict]:
+        """
+        get the xAPI statement of the given entry
+
+        Args:
+            entry(dict): a Learning Locker record or a plain xAPI statement
+
+        Returns:
+            dict: the statement or None if the entry has none
+        """
+        if "statement" in entry:
+            stmt = entry.get("statement")
+        elif "actor" in entry:
+            stmt = entry
+        else:
+            stmt = None
+        return stmt
+
+    @classmethod
+    def get_statement_id(cls, entry: dict, stmt: dict) -> Optional[str]:
+        """
+        get the id of the given statement - the hash of the record
+        if the statement has no id
+        """
+        statement_id = stmt.get("id") or entry.get("hash")
+        return statement_id
+
+    def is_duplicate(
+        self, entry: dict, stmt: dict, achievement: Achievement, statement_keys: Set
+    ) -> bool:
+        """
+        check whether the given statement has already been seen - the id is
+        only trusted together with the path and timestamp of the achievement
+        since some exports e.g. the GRETA example reuse statement ids
+
+        Args:
+            entry(dict): the record of the statement
+            stmt(dict): the statement
+            achievement(Achievement): the achievement of the statement
+            statement_keys(Set): the keys of the statements seen so far by the current conversion
+        """
+        statement_id = self.get_statement_id(entry, stmt)
+        if statement_id is None:
+            return False
+        key = (statement_id, achievement.path, achievement.date_assessed_iso)
+        if key in statement_keys:
+            self.duplicates += 1
+            return True
+        statement_keys.add(key)
+        return False
+
+    def is_preferred(self, achievement: Achievement, current: Achievement) -> bool:
+        """
+        check whether the given achievement replaces the current achievement
+        of the same path according to my merge policy - ties keep the current
+        achievement so that merging the same achievements again changes nothing
+        """
+        date = achievement.date_assessed_iso or ""
+        current_date = current.date_assessed_iso or ""
+        if self.merge_policy == "best":
+            score = achievement.score if achievement.score is not None else -1
+            current_score = current.score if current.score is not None else -1
+            if score != current_score:
+                return score > current_score
+        if self.merge_policy == "first":
+            return bool(date) and (not current_date or date < current_date)
+        return date > current_date
+
+    def merge_achievements(
+        self, learner_id: str, achievements: Iterable[Achievement]
+    ) -> Learner:
+        """
+        get a learner with a single achievement per path
+        merged from the given achievements with my merge policy
+        Args:
+            learner_id (str): the id of the learner
+            achievements (Iterable[Achievement]): the achievements to merge
+        Returns:
+            Learner: the learner with the merged achievements in the order of the paths
+        """
+        achievements_by_path: Dict[str, Achievement] = {}
+        for achievement in achievements:
+            current = achievements_by_path.get(achievement.path)
+            if current is None or self.is_preferred(achievement, current):
+                achievements_by_path[achievement.path] = achievement
+        learner = Learner(
+            learner_id=learner_id, achievements=list(achievements_by_path.values())
+        )
+        return learner
+
+    @classmethod
+    def get_actor_id(cls, stmt: dict) -> Optional[str]:
+        """
+        get the account name of the actor of the given statement
+        """
+        actor = stmt.get("actor")
+        actor_id = actor["account"]["name"] if actor else None
+        return actor_id
+
+    @classmethod
+    def to_achievement(
+        cls, stmt: dict, competence_tree: CompetenceTree
+    ) -> Achievement:
+        """
+        Convert the given xAPI statement to an Achievement.
+        Args:
+            stmt (dict): the xAPI statement
+            competence_tree (CompetenceTree): The competence tree to align the achievement with.
+        Returns:
+            Achievement: the achievement of the statement
+        """
+        competence_path = stmt["context"]["extensions"][
+            "learningObjectMetadata"
+        ]["competencePath"]
+        score_scaled = stmt["result"]["score"]["scaled"]
+        timestamp = stmt["timestamp"]
+
+        # Create an Achievement instance
+        achievement = Achievement(
+            path=competence_path,
+            level=int(
+                score_scaled * competence_tree.total_valid_levels
+            ),  # Convert scaled score to level
+            score=float(stmt["result"]["score"]["raw"]),
+            date_assessed_iso=timestamp,
+        )
+        return achievement
+
     def to_learner(self, competence_tree: CompetenceTree) -> Learner:
         """
         Convert xapi_dict to a Learner with Achievements.
@@ -34,42 +183,134 @@ class XAPI:
         achievements = []
         actor_id = None
         learner = None
+        # each conversion deduplicates on its own so that it can be repeated
+        statement_keys = set()
+        self.duplicates = 0
         for entry in self.xapi_dict:
             stmt=entry.get("statement")
             if stmt:
-                actor=stmt.get("actor")
-                if actor:
-                    # Extract necessary information from the xAPI statement
-                    new_actor_id = actor["account"]["name"]
+                achievement = self.to_achievement(stmt, competence_tree)
+                if self.is_duplicate(entry, stmt, achievement, statement_keys):
+                    continue
+                new_actor_id = self.get_actor_id(stmt)
+                if new_actor_id:
                     if actor_id is None:
                         actor_id = new_actor_id
                     else:
                         if new_actor_id != actor_id:
                             self.warn(f"invalid actor_id {new_actor_id} != {actor_id}")
-                competence_path = stmt["context"]["extensions"][
-                    "learningObjectMetadata"
-                ]["competencePath"]
-                score_scaled = stmt["result"]["score"]["scaled"]
-                timestamp = stmt["timestamp"]
-
-                # Create an Achievement instance
-                achievement = Achievement(
-                    path=competence_path,
-                    level=int(
-                        score_scaled * competence_tree.total_valid_levels
-                    ),  # Convert scaled score to level
-                    score=stmt["result"]["score"]["raw"],
-                    date_assessed_iso=timestamp,
-                )
                 achievements.append(achievement)
 
         if actor_id:
-            # Create a Learner instance with these achievements
-            learner = Learner(learner_id=actor_id, achievements=achievements)
+            # Create a Learner instance with the merged achievements
+            learner = self.merge_achievements(actor_id, achievements)
         else:
             self.warn("no learner / actor defined")
         return learner
 
+    def to_learners(
+        self, competence_tree: CompetenceTree, entries: Iterable[dict] = None
+    ) -> Iterator[Learner]:
+        """
+        Convert the statements of all actors to one Learner per actor in a single pass.
+        Statements that can not be converted are skipped with a warning.
+        Args:
+            competence_tree (CompetenceTree): The competence tree to align the achievements with.
+            entries (Iterable[dict]): the entries to convert - None for my xapi_dict
+        Returns:
+            Iterator[Learner]: the learners in the order of their first statement
+        """
+        if entries is None:
+            entries = self.xapi_dict
+        # only the achievements are kept - not the statements
+        achievements_by_actor: Dict[str, List[Achievement]] = {}
+        statement_keys = set()
+        self.duplicates = 0
+        for index, entry in enumerate(entries):
+            stmt = self.get_statement(entry)
+            if not stmt:
+                continue
+            try:
+                actor_id = self.get_actor_id(stmt)
+                if actor_id is None:
+                    self.warn(f"statement {index} has no actor")
+                    continue
+                achievement = self.to_achievement(stmt, competence_tree)
+            except (KeyError, TypeError, ValueError) as ex:
+                self.warn(f"invalid statement {index}: {ex}")
+                continue
+            if self.is_duplicate(entry, stmt, achievement, statement_keys):
+                continue
+            achievements_by_actor.setdefault(actor_id, []).append(achievement)
+        for actor_id, achievements in achievements_by_actor.items():
+            yield self.merge_achievements(actor_id, achievements)
+
+    @classmethod
+    def iter_json_values(
+        cls, text_file: TextIO, chunk_size: int = 65536
+    ) -> Iterator[dict]:
+        """
+        iterate the values of a JSON array or of NDJSON (one JSON value per line)
+        with an incremental parser that only keeps the current chunk in memory
+        Args:
+            text_file (TextIO): the file to read
+            chunk_size (int): the number of characters to read at once
+        Returns:
+            Iterator[dict]: the values e.g. the xAPI statements
+        """
+        decoder = json.JSONDecoder()
+        separators = " \t\r\n,[]"
+        buffer = ""
+        pos = 0
+        eof = False
+        while True:
+            # skip the whitespace, the commas and the brackets of a top level array
+            while pos < len(buffer) and buffer[pos] in separators:
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    return
+                buffer = text_file.read(chunk_size)
+                pos = 0
+                eof = not buffer
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    # a truncated or invalid file
+                    raise
+                # the value continues in the next chunk
+                chunk = text_file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield value
+            pos = end
+
+    @classmethod
+    def stream_learners(
+        cls,
+        json_file_path: str,
+        competence_tree: CompetenceTree,
+        merge_policy: str = "latest",
+    ) -> Iterator[Learner]:
+        """
+        stream the statements of a large xAPI export e.g. of Learning Locker
+        and get one Learner per actor - the export may be a JSON array or NDJSON
+        Args:
+            json_file_path (str): the path of the export
+            competence_tree (CompetenceTree): The competence tree to align the achievements with.
+            merge_policy (str): 'latest', 'best' or 'first'
+        Returns:
+            Iterator[Learner]: the learners in the order of their first statement
+        """
+        xapi = cls(merge_policy)
+        with open(json_file_path, "r") as json_file:
+            entries = cls.iter_json_values(json_file)
+            yield from xapi.to_learners(competence_tree, entries)
+
     @classmethod
     def from_json(cls, json_file_path: str):
         xapi = cls()
@@ -0,0 +1,229 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from dataclasses_json import dataclass_json
+from ngwidgets.progress import Progressbar
+
+from dcm.dcm_core import Achievement, CompetenceTree, Learner
+from dcm.dcm_storage import LearnerStorage
+from dcm.xapi import XAPI
+
+# the competence tree and merge policy of a worker process
+# - shipped once by the pool initializer
+_worker_competence_tree: Optional[CompetenceTree] = None
+_worker_merge_policy: str = "latest"
+
+
+def _init_worker(competence_tree: CompetenceTree, merge_policy: str):
+    global _worker_competence_tree, _worker_merge_policy
+    _worker_competence_tree = competence_tree
+    _worker_merge_policy = merge_policy
+
+
+def _convert_file(json_file_path: str) -> Tuple[int, int, List[Learner]]:
+    """
+    convert the given xAPI export in a worker process
+
+    Returns:
+        Tuple[int, int, List[Learner]]: the size, the number of duplicate statements
+        and the learners of the file
+    """
+    file_size = os.path.getsize(json_file_path)
+    xapi = XAPI(_worker_merge_policy)
+    with open(json_file_path, "r") as json_file:
+        entries = XAPI.iter_json_values(json_file)
+        learners = list(xapi.to_learners(_worker_competence_tree, entries))
+    return file_size, xapi.duplicates, learners
+
+
+@dataclass_json
+@dataclass
+class XAPIImportReport:
+    """
+    the throughput report of a bulk xAPI import
+
+    Attributes:
+        files (int): the number of converted files
+        total_bytes (int): the total size of the converted files
+        learners (int): the number of imported learners
+        achievements (int): the number of achievements of the learners
+        duplicates (int): the number of skipped duplicate statements
+        elapsed (float): the time of the import in seconds
+        failed (List[str]): the files that could not be converted
+    """
+
+    files: int = 0
+    total_bytes: int = 0
+    learners: int = 0
+    achievements: int = 0
+    duplicates: int = 0
+    elapsed: float = 0.0
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def files_per_second(self) -> float:
+        files_per_second = self.files / self.elapsed if self.elapsed else 0.0
+        return files_per_second
+
+    @property
+    def mb_per_second(self) -> float:
+        mb_per_second = (
+            self.total_bytes / 1024 / 1024 / self.elapsed if self.elapsed else 0.0
+        )
+        return mb_per_second
+
+    def summary(self) -> str:
+        """
+        get a one line summary of the import
+        """
+        summary = (
+            f"{self.files} files ({self.total_bytes/1024/1024:.1f} MB) "
+            f"imported in {self.elapsed:.1f} s: "
+            f"{self.learners} learners with {self.achievements} achievements, "
+            f"{self.files_per_second:.1f} files/s {self.mb_per_second:.1f} MB/s"
+        )
+        if self.failed:
+            summary += f", {len(self.failed)} files failed"
+        return summary
+
+
+class XAPIImporter:
+    """
+    bulk import of many xAPI exports
+
+    The files are converted in parallel by a process pool since decoding
+    JSON is CPU bound. The competence tree is shipped to each worker once
+    by the pool initializer. The achievements of all files are merged by actor
+    with the achievements already stored using the merge policy so that
+    importing the same export again changes nothing.
+    """
+
+    def __init__(
+        self,
+        competence_tree: CompetenceTree,
+        storage_path: str,
+        backend: str = "json",
+        merge_policy: str = "latest",
+        max_workers: Optional[int] = None,
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            competence_tree(CompetenceTree): the competence tree to align the achievements with
+            storage_path(str): the directory to store the learners in
+            backend(str): the storage backend - 'json', 'journal' or 'sqlite'
+            merge_policy(str): how achievements of the same path are merged - 'latest', 'best' or 'first'
+            max_workers(int): the number of worker processes - None for the number of CPUs
+            debug(bool): if True show debug information
+        """
+        self.competence_tree = competence_tree
+        self.storage_path = storage_path
+        self.backend = backend
+        self.xapi = XAPI(merge_policy)
+        self.max_workers = max_workers
+        self.debug = debug
+
+    def warn(self, msg: str):
+        print(msg, file=sys.stderr)
+
+    def convert_files(
+        self,
+        json_file_paths: List[str],
+        report: XAPIImportReport,
+        progress_bar: Optional[Progressbar] = None,
+    ) -> Dict[str, Learner]:
+        """
+        convert the given files in parallel and merge the learners by actor
+
+        Args:
+            json_file_paths(List[str]): the paths of the xAPI exports
+            report(XAPIImportReport): the report to update
+            progress_bar(Progressbar): the progress bar to update per file
+
+        Returns:
+            Dict[str, Learner]: the merged learners by learner id
+        """
+        # each file is only converted once
+        json_file_paths = list(dict.fromkeys(json_file_paths))
+        results = {}
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.competence_tree, self.xapi.merge_policy),
+        ) as executor:
+            futures = {
+                executor.submit(_convert_file, json_file_path): json_file_path
+                for json_file_path in json_file_paths
+            }
+            for future in as_completed(futures):
+                json_file_path = futures[future]
+                try:
+                    file_size, duplicates, learners = future.result()
+                    results[json_file_path] = learners
+                    report.files += 1
+                    report.total_bytes += file_size
+                    report.duplicates += duplicates
+                except Exception as ex:
+                    self.warn(f"could not import {json_file_path}: {ex}")
+                    report.failed.append(json_file_path)
+                if progress_bar:
+                    progress_bar.update(1)
+        # collect in the order of the files independent of the completion order
+        achievements_by_id: Dict[str, List[Achievement]] = {}
+        for json_file_path in json_file_paths:
+            for learner in results.get(json_file_path, []):
+                achievements = achievements_by_id.setdefault(learner.learner_id, [])
+                achievements.extend(learner.achievements)
+        learners_by_id = {
+            learner_id: self.xapi.merge_achievements(learner_id, achievements)
+            for learner_id, achievements in achievements_by_id.items()
+        }
+        return learners_by_id
+
+    def import_files(
+        self,
+        json_file_paths: List[str],
+        progress_bar: Optional[Progressbar] = None,
+    ) -> XAPIImportReport:
+        """
+        import the given xAPI exports into the learner storage
+
+        Args:
+            json_file_paths(List[str]): the paths of the xAPI exports
+            progress_bar(Progressbar): the progress bar to update per file
+
+        Returns:
+            XAPIImportReport: the throughput report
+        """
+        start = time.perf_counter()
+        report = XAPIImportReport()
+        learners_by_id = self.convert_files(json_file_paths, report, progress_bar)
+        storage = LearnerStorage.get_storage(self.backend, self.storage_path)
+        try:
+            for learner in learners_by_id.values():
+                stored = storage.load(learner.file_name)
+                if stored is not None and stored.achievements:
+                    learner = self.xapi.merge_achievements(
+                        learner.learner_id, stored.achievements + learner.achievements
+                    )
+                if stored is None or stored.to_dict() != learner.to_dict():
+                    storage.write(learner)
+                report.learners += 1
+                report.achievements += len(learner.achievements)
+        finally:
+            storage.close()
+        report.elapsed = time.perf_counter() - start
+        if self.debug:
+            print(report.summary())
+        return report
@@ -3,6 +3,12 @@ Created on 2023-11-08
 
 @author: wf
 """
+import asyncio
+import json
+import os
+import tempfile
+
+import yaml
 from ngwidgets.webserver_test import WebserverTest
 
 from dcm.dcm_cmd import CompetenceCmd
@@ -56,6 +62,93 @@ class TestAPI(WebserverTest):
                 markup_check = MarkupCheck(self, dcm)
                 markup_check.check_markup(svg_content=svg_markup, svg_config=svg_config)
 
+    def test_svg_render_cache(self):
+        """
+        test that identical render requests are cached and
+        support conditional requests via ETag
+        """
+        name, definition = next(iter(self.example_definitions["yaml"].items()))
+        data = {"name": name, "definition": definition, "markup": "yaml"}
+        stats_before = self.get_json("/cache/stats")["render"]
+        response = self.client.post("/svg", json=data)
+        self.assertEqual(200, response.status_code)
+        etag = response.headers.get("etag")
+        self.assertIsNotNone(etag)
+        response2 = self.client.post("/svg", json=data)
+        self.assertEqual(200, response2.status_code)
+        self.assertEqual(etag, response2.headers.get("etag"))
+        self.assertEqual(response.content, response2.content)
+        stats = self.get_json("/cache/stats")["render"]
+        self.assertTrue(stats["hits"] > stats_before["hits"])
+        # a client that already has the markup gets no body
+        response3 = self.client.post("/svg", json=data, headers={"If-None-Match": etag})
+        self.assertEqual(304, response3.status_code)
+        self.assertEqual(b"", response3.content)
+
+    def test_svg_batch_render(self):
+        """
+        test rendering one SVG per learner for the same tree
+        """
+        definition = self.example_definitions["yaml"]["architecture"]
+        ex_path = DynamicCompetenceMap.examples_path()
+        with open(f"{ex_path}/arch_student_123.json") as json_file:
+            learner_data = json.load(json_file)
+        learners = []
+        for i in range(3):
+            learner_dict = dict(learner_data)
+            learner_dict["learner_id"] = f"student_{i}"
+            learners.append(learner_dict)
+        data = {
+            "name": "architecture",
+            "definition": definition,
+            "markup": "yaml",
+            "learners": learners,
+        }
+        response = self.client.post("/svg/batch", json=data)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(
+            response.headers["content-type"].startswith("application/x-ndjson")
+        )
+        lines = response.text.splitlines()
+        self.assertEqual(3, len(lines))
+        dcm = DynamicCompetenceMap.from_definition_string(
+            "architecture", definition, content_class=CompetenceTree, markup="yaml"
+        )
+        for i, line in enumerate(lines):
+            record = json.loads(line)
+            self.assertEqual(f"student_{i}", record["learner_id"])
+            markup_check = MarkupCheck(self, dcm)
+            markup_check.check_markup(svg_content=record["svg"])
+
+    def test_svg_stream_render(self):
+        """
+        test streaming the SVG markup
+        """
+        definition = self.example_definitions["yaml"]["architecture"]
+        data = {"name": "architecture", "definition": definition, "markup": "yaml"}
+        response = self.client.post("/svg/stream", json=data)
+        self.assertEqual(200, response.status_code)
+        dcm = DynamicCompetenceMap.from_definition_string(
+            "architecture", definition, content_class=CompetenceTree, markup="yaml"
+        )
+        markup_check = MarkupCheck(self, dcm)
+        markup_check.check_markup(svg_content=response.text)
+
+    def test_posted_tree_does_not_replace_example(self):
+        """
+        test that posting a tree with the id of an example
+        does not change the example
+        """
+        definition = self.example_definitions["yaml"]["greta"].replace(
+            "name: Enthusiasmus", "name: Fake", 1
+        )
+        data = {"name": "greta", "definition": definition, "markup": "yaml"}
+        svg_markup = self.get_html_for_post("/svg", data)
+        self.assertIn("<title>Fake</title>", svg_markup)
+        path = "greta_v2_0/ProfessionelleSelbststeuerung/MotivationaleOrientierungen/GRETA-4-1-2"
+        html = self.get_html(f"/description/{path}")
+        self.assertIn("<h2>Enthusiasmus</h2>", html)
+
     def test_element_description(self):
         """
         Test the element description endpoint
@@ -83,3 +176,46 @@ class TestAPI(WebserverTest):
                 print(f"{path}:\n{html}")
             for expected_content in expected_contents:
                 self.assertIn(expected_content, html)
+
+    def test_subfacet_description(self):
+        """
+        test the description of a subfacet below the facets
+        """
+        definition_data = {
+            "name": "Programme",
+            "id": "programme",
+            "url": "https://example.org/programme",
+            "description": "a programme with subfacets",
+            "element_names": {"facet2": "Skill"},
+            "aspects": [
+                {
+                    "name": "Module",
+                    "id": "module",
+                    "areas": [
+                        {
+                            "name": "Unit",
+                            "id": "unit",
+                            "facets": [
+                                {
+                                    "name": "Outcome",
+                                    "id": "outcome",
+                                    "facets": [{"name": "Skill", "id": "skill"}],
+                                }
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
+        with tempfile.TemporaryDirectory() as root_path:
+            with open(os.path.join(root_path, "programme.yaml"), "w") as yaml_file:
+                yaml.dump(definition_data, yaml_file)
+            self.ws.examples.add_root_path(root_path)
+            path = "programme/module/unit/outcome/skill"
+            response = asyncio.run(self.ws.show_description(path))
+            self.assertIn("<h2>Skill</h2>", response.body.decode())
+        # paths of any depth are routed to the description
+        path = "greta_v2_0/ProfessionelleSelbststeuerung/MotivationaleOrientierungen/GRETA-4-1-2/invalid"
+        response = self.client.get(f"/description/{path}")
+        self.assertEqual(404, response.status_code)
+        self.assertIn(f"No element found for {path}", response.text)
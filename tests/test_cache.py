@@ -0,0 +1,113 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_cache import LRUCache, RenderCache, TreeRegistry
+from dcm.dcm_core import CompetenceTree, DynamicCompetenceMap
+from dcm.svg import SVGConfig
+
+
+class TestCache(Basetest):
+    """
+    test the caches
+    """
+
+    def test_lru_eviction(self):
+        """
+        test that the least recently used entry is evicted
+        """
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        # touch a so that b is the least recently used entry
+        self.assertEqual(1, cache.get("a"))
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+        stats = cache.get_stats()
+        self.assertEqual(2, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(2, stats["entries"])
+
+    def test_ttl(self):
+        """
+        test the time to live handling
+        """
+        now = [0.0]
+        cache = LRUCache(max_entries=10, ttl=60, timer=lambda: now[0])
+        cache.put("a", 1)
+        now[0] = 59.0
+        self.assertEqual(1, cache.get("a"))
+        now[0] = 61.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(1, cache.stats.expirations)
+        self.assertEqual(0, len(cache))
+
+    def test_render_key(self):
+        """
+        test the content hash of render requests
+        """
+        key = RenderCache.get_key("name: test", "yaml", None, "none")
+        # the default configuration is the same as no configuration
+        self.assertEqual(
+            key, RenderCache.get_key("name: test", "yaml", SVGConfig(), "none")
+        )
+        for other_key in [
+            RenderCache.get_key("name: test2", "yaml", None, "none"),
+            RenderCache.get_key("name: test", "json", None, "none"),
+            RenderCache.get_key("name: test", "yaml", SVGConfig(width=700), "none"),
+            RenderCache.get_key("name: test", "yaml", None, "curved"),
+        ]:
+            self.assertNotEqual(key, other_key)
+        etag = RenderCache.get_etag(key)
+        self.assertTrue(RenderCache.etag_matches(etag, etag))
+        self.assertTrue(RenderCache.etag_matches(etag, f'"other", W/{etag}'))
+        self.assertTrue(RenderCache.etag_matches(etag, "*"))
+        self.assertFalse(RenderCache.etag_matches(etag, '"other"'))
+        self.assertFalse(RenderCache.etag_matches(etag, None))
+
+    def test_tree_registry(self):
+        """
+        test that a competence tree is parsed only once per definition
+        """
+        registry = TreeRegistry(max_entries=10, max_size=None)
+        examples = DynamicCompetenceMap.get_example_dcm_definitions(
+            markup="yaml", required_keys=CompetenceTree.required_keys()
+        )
+        definition = examples["greta"]
+        dcm = registry.get_dcm("greta", definition, markup="yaml")
+        self.assertIs(dcm, registry.get_dcm("greta", definition, markup="yaml"))
+        self.assertEqual(1, registry.stats.misses)
+        self.assertEqual(1, registry.stats.hits)
+        ct = dcm.competence_tree
+        # definitions e.g. of requests are not indexed by their tree id
+        self.assertIsNone(registry.get_by_tree_id(ct.id))
+        digest = TreeRegistry.get_digest(definition, "yaml")
+        registry.register(dcm, digest, size=len(definition), index_tree_id=True)
+        self.assertIs(dcm, registry.get_by_tree_id(ct.id))
+        # the paths are already available
+        self.assertTrue(len(ct.elements_by_path) > 1)
+
+    def test_tree_registry_size_bound(self):
+        """
+        test the memory bounded eviction of the tree registry
+        """
+        examples = DynamicCompetenceMap.get_example_dcm_definitions(
+            markup="yaml", required_keys=CompetenceTree.required_keys()
+        )
+        max_size = max(len(definition) for definition in examples.values())
+        registry = TreeRegistry(max_entries=100, max_size=max_size)
+        for name, definition in examples.items():
+            dcm = DynamicCompetenceMap.from_definition_string(
+                name, definition, content_class=CompetenceTree, markup="yaml"
+            )
+            digest = TreeRegistry.get_digest(definition, "yaml")
+            registry.register(dcm, digest, size=len(definition), index_tree_id=True)
+            self.assertTrue(registry.total_size <= max_size)
+            self.assertIs(dcm, registry.get_by_tree_id(dcm.competence_tree.id))
+        self.assertEqual(len(examples) - len(registry), registry.stats.evictions)
+        self.assertEqual(len(registry), len(registry.digests_by_tree_id))
@@ -0,0 +1,115 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import os
+import shutil
+import tempfile
+
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_cache import TreeRegistry
+from dcm.dcm_catalog import ExampleCatalog
+from dcm.dcm_core import DynamicCompetenceMap
+
+
+class TestCatalog(Basetest):
+    """
+    test the lazy example catalog
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root_path = os.path.join(self.tmp_dir, "examples")
+        shutil.copytree(DynamicCompetenceMap.examples_path(), self.root_path)
+        self.index_path = os.path.join(self.tmp_dir, "index.json")
+
+    def tearDown(self):
+        Basetest.tearDown(self)
+        shutil.rmtree(self.tmp_dir)
+
+    def get_catalog(self) -> ExampleCatalog:
+        catalog = ExampleCatalog(
+            [self.root_path],
+            markup="yaml",
+            index_path=self.index_path,
+            tree_registry=TreeRegistry(),
+        )
+        return catalog
+
+    def test_lazy_loading(self):
+        """
+        test that trees are only parsed on demand
+        and that the index avoids parsing on later starts
+        """
+        catalog = self.get_catalog()
+        self.assertTrue(len(catalog.entries) > 1)
+        for entry in catalog.entries.values():
+            self.assertFalse(entry.is_indexed)
+        self.assertEqual(0, len(catalog.tree_registry))
+        dcm = catalog.get("greta_v2_0")
+        self.assertIsNotNone(dcm)
+        self.assertIsNone(catalog.get("unknown_tree"))
+        # now everything is indexed
+        tree_ids = catalog.keys()
+        self.assertIn("greta_v2_0", tree_ids)
+        self.assertTrue(os.path.isfile(self.index_path))
+
+        # a later start only parses the requested tree
+        catalog2 = self.get_catalog()
+        self.assertIn("greta_v2_0", catalog2)
+        self.assertEqual(1, len(catalog2.tree_registry))
+        self.assertEqual(
+            dcm.competence_tree.to_json(),
+            catalog2["greta_v2_0"].competence_tree.to_json(),
+        )
+
+    def test_modified_file(self):
+        """
+        test that a modified file is indexed again
+        """
+        catalog = self.get_catalog()
+        catalog.keys()
+        greta_path = os.path.join(self.root_path, "greta.yaml")
+        stat = os.stat(greta_path)
+        os.utime(greta_path, (stat.st_atime, stat.st_mtime + 10))
+        catalog2 = self.get_catalog()
+        entry = catalog2.entries[greta_path]
+        self.assertFalse(entry.is_indexed)
+        self.assertIsNotNone(catalog2.get("greta_v2_0"))
+        self.assertTrue(entry.is_indexed)
+
+    def test_changed_id(self):
+        """
+        test that a tree is not found by its old id after the id
+        of its file has been changed
+        """
+        catalog = self.get_catalog()
+        self.assertIsNotNone(catalog.get("architecture"))
+        arch_path = os.path.join(self.root_path, "architecture.yaml")
+        with open(arch_path, "r") as arch_file:
+            definition = arch_file.read()
+        with open(arch_path, "w") as arch_file:
+            arch_file.write(definition.replace("id: architecture", "id: other", 1))
+        stat = os.stat(arch_path)
+        os.utime(arch_path, (stat.st_atime, stat.st_mtime + 10))
+        self.assertIsNone(catalog.get("architecture"))
+        dcm = catalog.get("other")
+        self.assertEqual("other", dcm.competence_tree.id)
+
+    def test_deleted_file(self):
+        """
+        test that deleted files are dropped from the catalog
+        """
+        catalog = self.get_catalog()
+        self.assertIn("greta_v2_0", catalog.keys())
+        greta_path = os.path.join(self.root_path, "greta.yaml")
+        os.remove(greta_path)
+        self.assertIsNone(catalog.get("greta_v2_0"))
+        self.assertNotIn(greta_path, catalog.entries)
+        os.remove(os.path.join(self.root_path, "architecture.yaml"))
+        tree_ids = catalog.keys()
+        self.assertNotIn("architecture", tree_ids)
+        self.assertIn("iSAQB_CPSA-F", tree_ids)
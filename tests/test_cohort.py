@@ -0,0 +1,196 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import random
+import statistics
+import time
+
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_chart import DcmChart
+from dcm.dcm_cohort import CohortMatrix
+from dcm.dcm_core import (
+    Achievement,
+    CompetenceFacet,
+    CompetenceTree,
+    DynamicCompetenceMap,
+    Learner,
+)
+from dcm.svg import SVGConfig
+
+
+class TestCohort(Basetest):
+    """
+    test the cohort aggregation
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        examples = DynamicCompetenceMap.get_examples(CompetenceTree, "yaml")
+        self.competence_tree = examples["greta_v2_0"].competence_tree
+
+    def get_cohort(self, size: int) -> list:
+        """
+        get a cohort of learners with random facet levels - some facets are not assessed
+        """
+        rng = random.Random(42)
+        level_values = [level.level for level in self.competence_tree.levels]
+        facet_paths = [
+            path
+            for path, element in self.competence_tree.elements_by_path.items()
+            if isinstance(element, CompetenceFacet)
+        ]
+        learners = []
+        for i in range(size):
+            achievements = [
+                Achievement(path=path, level=rng.choice(level_values))
+                for path in facet_paths
+                if rng.random() < 0.8
+            ]
+            learners.append(
+                Learner(learner_id=f"learner_{i}", achievements=achievements)
+            )
+        return learners
+
+    def test_statistics(self):
+        """
+        compare the vectorized statistics with a per learner computation
+        """
+        learners = self.get_cohort(50)
+        cohort_matrix = CohortMatrix(self.competence_tree, learners)
+        cohort_statistics = cohort_matrix.get_statistics(rollup=False)
+        for path, element in self.competence_tree.elements_by_path.items():
+            levels = [
+                learner.achievements_by_path[path].level
+                for learner in learners
+                if path in learner.achievements_by_path
+            ]
+            path_statistics = cohort_statistics[path]
+            self.assertEqual(len(levels), path_statistics.count)
+            if isinstance(element, CompetenceFacet):
+                self.assertAlmostEqual(statistics.mean(levels), path_statistics.mean)
+                self.assertAlmostEqual(
+                    statistics.median(levels), path_statistics.median
+                )
+                self.assertEqual(
+                    path_statistics.median, path_statistics.percentiles["50"]
+                )
+                self.assertEqual(levels.count(1), path_statistics.histogram["1"])
+                self.assertEqual(len(levels), sum(path_statistics.histogram.values()))
+            else:
+                # no learner has a level of its own for a non facet element
+                self.assertIsNone(path_statistics.mean)
+
+    def test_rollup(self):
+        """
+        test rolling up the levels of the facets to the areas, aspects and the tree
+        """
+        learners = self.get_cohort(20)
+        cohort_matrix = CohortMatrix(self.competence_tree, learners)
+        rolled_up = cohort_matrix.get_rolled_up()
+        tree = self.competence_tree
+        for col, learner in enumerate(learners):
+            aspect_levels = []
+            for aspect in tree.aspects:
+                area_levels = []
+                for area in aspect.areas:
+                    facet_levels = [
+                        learner.achievements_by_path[facet.path].level
+                        for facet in area.facets
+                        if facet.path in learner.achievements_by_path
+                    ]
+                    if facet_levels:
+                        area_level = statistics.mean(facet_levels)
+                        area_levels.append(area_level)
+                        row = cohort_matrix.path_index[area.path]
+                        self.assertAlmostEqual(area_level, rolled_up[row, col])
+                if area_levels:
+                    aspect_levels.append(statistics.mean(area_levels))
+            row = cohort_matrix.path_index[tree.path]
+            self.assertAlmostEqual(statistics.mean(aspect_levels), rolled_up[row, col])
+        tree_statistics = cohort_matrix.get_statistics()[tree.path]
+        self.assertEqual(len(learners), tree_statistics.count)
+
+    def test_from_directory(self):
+        """
+        test loading the learners of the examples directory
+        """
+        examples = DynamicCompetenceMap.get_examples(CompetenceTree, "yaml")
+        competence_tree = examples["architecture"].competence_tree
+        cohort_matrix = CohortMatrix.from_directory(
+            competence_tree, DynamicCompetenceMap.examples_path()
+        )
+        self.assertEqual(["arch_student_123"], cohort_matrix.learner_ids)
+        self.assertEqual(
+            (len(competence_tree.elements_by_path), 1), cohort_matrix.levels.shape
+        )
+
+    def test_performance(self):
+        """
+        test aggregating a large cohort
+        """
+        debug = self.debug
+        # debug=True
+        learners = self.get_cohort(2000)
+        start = time.perf_counter()
+        cohort_matrix = CohortMatrix(self.competence_tree, learners)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        cohort_statistics = cohort_matrix.get_statistics()
+        aggregate_time = time.perf_counter() - start
+        if debug:
+            print(
+                f"{len(learners)} learners: load {load_time*1000:.1f} ms aggregate {aggregate_time*1000:.1f} ms"
+            )
+        self.assertEqual(
+            len(self.competence_tree.elements_by_path), len(cohort_statistics)
+        )
+
+    def test_heatmap(self):
+        """
+        test rendering a cohort heatmap
+        """
+        debug = self.debug
+        # debug=True
+        learners = self.get_cohort(5000)
+        cohort_matrix = CohortMatrix(self.competence_tree, learners)
+        share_heatmap = cohort_matrix.get_heatmap("share", target_level=3)
+        for path in list(share_heatmap)[:5]:
+            levels = [
+                learner.achievements_by_path[path].level
+                for learner in learners
+                if path in learner.achievements_by_path
+            ]
+            if levels:
+                share = len([level for level in levels if level >= 3]) / len(levels)
+                self.assertAlmostEqual(share, share_heatmap[path])
+        with self.assertRaises(ValueError):
+            cohort_matrix.get_heatmap("share")
+        heatmap = cohort_matrix.get_heatmap("mean")
+        self.assertEqual(len(self.competence_tree.elements_by_path), len(heatmap))
+        dcm = DynamicCompetenceMap(self.competence_tree)
+        dcm_chart = DcmChart(dcm)
+        config = SVGConfig()
+        start = time.perf_counter()
+        svg_markup = dcm_chart.generate_svg_markup(config=config, heatmap=heatmap)
+        heatmap_time = time.perf_counter() - start
+        start = time.perf_counter()
+        dcm_chart.generate_svg_markup(config=config, learner=learners[0])
+        learner_time = time.perf_counter() - start
+        if debug:
+            print(
+                f"heatmap: {heatmap_time*1000:.1f} ms learner: {learner_time*1000:.1f} ms"
+            )
+        # the heatmap reuses the layout of the learner chart
+        self.assertEqual(1, len(dcm_chart.layouts))
+        # greta only shows the facets as segments
+        for path, ratio in heatmap.items():
+            element = self.competence_tree.elements_by_path[path]
+            if isinstance(element, CompetenceFacet):
+                self.assertIn(
+                    f'fill="{dcm_chart.get_heatmap_color(ratio)}"', svg_markup
+                )
+        self.assertEqual("#ffffcc", dcm_chart.get_heatmap_color(-1))
+        self.assertEqual("#bd0026", dcm_chart.get_heatmap_color(1.0))
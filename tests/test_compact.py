@@ -0,0 +1,222 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import gc
+import os
+import time
+import tracemalloc
+
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_chart import DcmChart
+from dcm.dcm_compact import CompactCompetenceTree, CompactElement
+from dcm.dcm_core import CompetenceArea, CompetenceTree, DynamicCompetenceMap
+from dcm.svg import SVGConfig
+
+
+class TestCompact(Basetest):
+    """
+    test the compact competence tree representation
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.examples = DynamicCompetenceMap.get_examples(CompetenceTree, "yaml")
+
+    def get_faculty_data(
+        self, aspects: int = 20, areas: int = 50, facets: int = 20
+    ) -> dict:
+        """
+        get the definition data of a faculty wide module catalog
+        with aspects x areas x facets modules
+        """
+        url = "https://sc.informatik.rwth-aachen.de/de/studium/master/informatik/"
+        definition_data = {
+            "name": "Faculty",
+            "id": "faculty",
+            "url": url,
+            "description": "all modules of the faculty",
+            "element_names": {"tree": "Faculty", "aspect": "Program"},
+            "levels": [
+                {"name": "passed", "level": 1, "color_code": "#00FF00"},
+            ],
+            "aspects": [
+                {
+                    "name": f"Program {a}",
+                    "id": f"p{a}",
+                    "url": url,
+                    "color_code": "#4CAF50",
+                    "areas": [
+                        {
+                            "name": f"Area {a}.{b}",
+                            "id": f"p{a}_{b}",
+                            "url": url,
+                            "facets": [
+                                {
+                                    "name": f"Module {a}.{b}.{f}",
+                                    "id": f"m{a}_{b}_{f}",
+                                    "url": url,
+                                    "description": "a module of the catalog",
+                                }
+                                for f in range(facets)
+                            ],
+                        }
+                        for b in range(areas)
+                    ],
+                }
+                for a in range(aspects)
+            ],
+        }
+        return definition_data
+
+    def test_compact_api(self):
+        """
+        test that a compact tree has the same elements as the full tree
+        """
+        competence_tree = self.examples["greta_v2_0"].competence_tree
+        trees = [(competence_tree, CompactCompetenceTree.from_tree(competence_tree))]
+        yaml_path = os.path.join(
+            DynamicCompetenceMap.examples_path(), "rwth_aachen_master_informatik.yaml"
+        )
+        with open(yaml_path) as yaml_file:
+            definition_data = DynamicCompetenceMap.parse_markup(
+                yaml_file.read(), "yaml"
+            )
+        trees.append(
+            (
+                CompetenceTree.from_dict(definition_data),
+                CompactCompetenceTree.from_dict(definition_data),
+            )
+        )
+        for competence_tree, compact_tree in trees:
+            self.assertEqual(
+                list(competence_tree.elements_by_path),
+                list(compact_tree.elements_by_path),
+            )
+            self.assertEqual(
+                competence_tree.total_elements, compact_tree.total_elements
+            )
+            self.assertEqual(competence_tree.total_levels, compact_tree.total_levels)
+            self.assertEqual(
+                competence_tree.total_valid_levels, compact_tree.total_valid_levels
+            )
+            for path, element in competence_tree.elements_by_path.items():
+                view = compact_tree.lookup_by_path(path)
+                for attr in ["name", "short_name", "id", "url", "description"]:
+                    self.assertEqual(getattr(element, attr), getattr(view, attr))
+                self.assertEqual(element.color_code, view.color_code)
+                self.assertEqual(
+                    element.to_svg_node_config(), view.to_svg_node_config()
+                )
+            for aspect, aspect_view in zip(
+                competence_tree.aspects, compact_tree.aspects
+            ):
+                self.assertEqual(
+                    [area.path for area in aspect.areas],
+                    [area.path for area in aspect_view.areas],
+                )
+                for area_view in aspect_view.areas:
+                    self.assertEqual(aspect_view, area_view.aspect)
+                    for facet_view in area_view.facets:
+                        self.assertEqual(area_view, facet_view.area)
+            self.assertIsNone(compact_tree.lookup_by_path("invalid/path"))
+            with self.assertRaises(ValueError):
+                compact_tree.lookup_by_path("invalid/path", lenient=False)
+            # round trip
+            self.assertEqual(
+                competence_tree.to_dict(), compact_tree.to_tree().to_dict()
+            )
+
+    def test_compact_tree_api(self):
+        """
+        test the tree level API of a compact tree
+        """
+        competence_tree = self.examples["greta_v2_0"].competence_tree
+        compact_tree = CompactCompetenceTree.from_tree(competence_tree)
+        # serialization uses the full tree
+        self.assertEqual(competence_tree.to_dict(), compact_tree.to_dict())
+        self.assertEqual(4, len(compact_tree.to_dict()["aspects"]))
+        self.assertEqual(competence_tree.to_json(), compact_tree.to_json())
+        self.assertEqual(competence_tree.to_yaml(), compact_tree.to_yaml())
+        # the elements to assess as in Assessment.setup_achievements
+        self.assertEqual(
+            [element.path for element in competence_tree.iter_subtree(min_depth=2)],
+            [element.path for element in compact_tree.iter_subtree(min_depth=2)],
+        )
+        aspect_path = "greta_v2_0/ProfessionelleSelbststeuerung"
+        self.assertEqual(
+            [element.path for element in competence_tree.iter_subtree(aspect_path)],
+            [element.path for element in compact_tree.iter_subtree(aspect_path)],
+        )
+        self.assertEqual([], list(compact_tree.iter_subtree("invalid/path")))
+        facet_path = f"{aspect_path}/MotivationaleOrientierungen/GRETA-4-1-2"
+        self.assertEqual(
+            [element.path for element in competence_tree.get_ancestors(facet_path)],
+            [element.path for element in compact_tree.get_ancestors(facet_path)],
+        )
+        self.assertIs(compact_tree, compact_tree.get_ancestors(facet_path)[0])
+        with self.assertRaises(ValueError):
+            compact_tree.get_ancestors("invalid/path")
+        # the hierarchy is read only
+        with self.assertRaises(ValueError):
+            compact_tree.add_element(aspect_path, CompetenceArea(name="new area"))
+        with self.assertRaises(ValueError):
+            compact_tree.remove_element(facet_path)
+        with self.assertRaises(ValueError):
+            compact_tree.update_paths()
+        self.assertEqual(competence_tree.to_dict(), compact_tree.to_dict())
+        # only the tree attributes are delegated to the header
+        self.assertEqual(competence_tree.levels, compact_tree.levels)
+        with self.assertRaises(AttributeError):
+            compact_tree.path_trie
+
+    def test_compact_chart(self):
+        """
+        test rendering a compact tree
+        """
+        dcm = self.examples["greta_v2_0"]
+        compact_tree = CompactCompetenceTree.from_tree(dcm.competence_tree)
+        config = SVGConfig(with_popup=True)
+        svg_markup = DcmChart(dcm).generate_svg_markup(
+            config=config, text_mode="curved"
+        )
+        compact_markup = DcmChart(
+            DynamicCompetenceMap(compact_tree)
+        ).generate_svg_markup(config=config, text_mode="curved")
+        # the markup has a timestamp
+        self.assertEqual(svg_markup.split("\n")[2:], compact_markup.split("\n")[2:])
+
+    def test_memory(self):
+        """
+        benchmark the memory of a faculty wide module catalog
+        for the full and the compact representation
+        """
+        debug = self.debug
+        # debug=True
+        # tracing the full tree is slow - the defaults give 20000 facets
+        definition_data = self.get_faculty_data(aspects=10, areas=20, facets=10)
+        results = {}
+        for tree_class in [CompetenceTree, CompactCompetenceTree]:
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            competence_tree = tree_class.from_dict(definition_data)
+            elapsed = time.perf_counter() - start
+            memory, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            total = len(competence_tree.elements_by_path)
+            results[tree_class.__name__] = memory
+            if debug:
+                print(
+                    f"{tree_class.__name__}: {total} elements {memory/1024/1024:.1f} MB "
+                    f"{memory/total:.0f} bytes/element {elapsed:.1f} s (traced)"
+                )
+            self.assertEqual(2211, total)
+            self.assertEqual(2000, competence_tree.total_elements["facets"])
+        facet = competence_tree.lookup_by_path("faculty/p3/p3_4/m3_4_5")
+        self.assertIsInstance(facet, CompactElement)
+        self.assertEqual("Module 3.4.5", facet.name)
+        self.assertEqual(10, len(facet.area.facets))
+        self.assertLess(results["CompactCompetenceTree"] * 2, results["CompetenceTree"])
@@ -3,13 +3,17 @@ Created on 2023-11-06
 
 @author: wf
 """
+import json
 import os
+from datetime import datetime
+from unittest.mock import patch
 
 from ngwidgets.basetest import Basetest
 
 from dcm.dcm_chart import DcmChart
 from dcm.dcm_core import (
     Achievement,
+    CompetenceArea,
     CompetenceAspect,
     CompetenceElement,
     CompetenceFacet,
@@ -146,3 +150,243 @@ class TestDynamicCompetenceMap(Basetest):
                     )
                     markup_check = MarkupCheck(self, dcm)
                     markup_check.check_markup(svg_file=svg_file, svg_config=svg_config)
+
+    def test_chart_layout(self):
+        """
+        test that the layout of a chart is computed once and
+        reused for other learners and selections
+        """
+        dcm = self.example_definitions["yaml"]["architecture"]
+        config = SVGConfig(with_popup=True)
+        dcm_chart = DcmChart(dcm)
+        layout = dcm_chart.get_layout(dcm.competence_tree, config)
+        self.assertIs(layout, dcm_chart.get_layout(dcm.competence_tree, config))
+        for aspect in dcm.competence_tree.aspects:
+            self.assertIn(aspect.path, layout.segments_by_path)
+        with self.assertRaises(Exception):
+            layout.segments_by_path["x"] = None
+        path = dcm.competence_tree.aspects[0].path
+        markup = dcm_chart.generate_svg_markup(
+            selected_paths=[path], config=config, text_mode="curved"
+        )
+        self.assertIn('class="selected"', markup)
+        self.assertIs(layout, dcm_chart.layout)
+        # another configuration needs another layout
+        other_layout = dcm_chart.get_layout(
+            dcm.competence_tree, SVGConfig(width=800, height=800)
+        )
+        self.assertIsNot(layout, other_layout)
+        self.assertEqual(len(layout.segments), len(other_layout.segments))
+
+    def test_streaming(self):
+        """
+        test streaming the SVG markup in chunks
+        """
+        dcm = self.example_definitions["yaml"]["architecture"]
+        ex_path = DynamicCompetenceMap.examples_path()
+        with open(f"{ex_path}/arch_student_123.json", "r") as json_file:
+            learner = Learner.from_dict(json.load(json_file))
+        config = SVGConfig(with_popup=True)
+        dcm_chart = DcmChart(dcm)
+        svg_markup = dcm_chart.generate_svg_markup(
+            learner=learner, config=config, text_mode="curved"
+        )
+        chunks = list(
+            dcm_chart.iter_svg_markup(
+                learner=learner, config=config, text_mode="curved", chunk_size=1024
+            )
+        )
+        self.assertTrue(len(chunks) > 1)
+        streamed_markup = "".join(chunks)
+        # ignore the timestamp comment in the first line
+        self.assertEqual(
+            svg_markup.split("\n", 1)[1], streamed_markup.split("\n", 1)[1]
+        )
+        svg_file = "/tmp/architecture_streamed.svg"
+        with open(svg_file, "w") as writer:
+            dcm_chart.write_svg_markup(writer, learner=learner, config=config)
+        markup_check = MarkupCheck(self, dcm)
+        markup_check.check_markup(svg_file=svg_file)
+
+    def test_deterministic_rendering(self):
+        """
+        test that identical input gives byte identical output in deterministic mode
+        """
+        dcm = self.example_definitions["yaml"]["architecture"]
+        ex_path = DynamicCompetenceMap.examples_path()
+        with open(f"{ex_path}/arch_student_123.json", "r") as json_file:
+            learner = Learner.from_dict(json.load(json_file))
+        config = SVGConfig(with_popup=True, deterministic=True)
+        markups = []
+        for year in [2024, 2025]:
+            with patch("dcm.svg.datetime") as mock_datetime:
+                mock_datetime.now.return_value = datetime(year, 1, 1)
+                markups.append(
+                    DcmChart(dcm).generate_svg_markup(learner=learner, config=config)
+                )
+        self.assertEqual(markups[0], markups[1])
+        digest = DcmChart.get_content_digest(markups[0])
+        dcm_chart = DcmChart(dcm)
+        self.assertEqual(
+            digest, dcm_chart.generate_svg_digest(config=config, learner=learner)
+        )
+        self.assertNotEqual(digest, dcm_chart.generate_svg_digest(config=config))
+
+    def test_svg_patches(self):
+        """
+        test the incremental update of a rendered chart
+        """
+        dcm = self.example_definitions["yaml"]["architecture"]
+        ex_path = DynamicCompetenceMap.examples_path()
+        with open(f"{ex_path}/arch_student_123.json", "r") as json_file:
+            learner = Learner.from_dict(json.load(json_file))
+        config = SVGConfig(with_popup=True)
+        dcm_chart = DcmChart(dcm)
+        achievement = learner.achievements[0]
+        dcm_chart.generate_svg_markup(
+            learner=learner,
+            selected_paths=[achievement.path],
+            config=config,
+            patchable=True,
+        )
+        # nothing changed
+        patches = dcm_chart.generate_svg_patches(learner, [achievement.path])
+        self.assertEqual([], patches)
+        # change the level and the selection
+        achievement.level = 1 if achievement.level != 1 else 2
+        next_path = learner.achievements[1].path
+        patches = dcm_chart.generate_svg_patches(learner, [next_path])
+        self.assertEqual(2, len(patches))
+        # the patches need to be identical to the groups of a full rendering
+        svg_markup = DcmChart(dcm).generate_svg_markup(
+            learner=learner, selected_paths=[next_path], config=config, patchable=True
+        )
+        for patch in patches:
+            group_start = f'<g id="{patch["id"]}">'
+            self.assertIn(group_start, svg_markup)
+            group_markup = svg_markup.split(group_start, 1)[1]
+            self.assertIn(patch["markup"].strip(), group_markup)
+
+    def test_batch_rendering(self):
+        """
+        test rendering the charts of many learners for the same tree
+        """
+        ex_path = DynamicCompetenceMap.examples_path()
+        with open(f"{ex_path}/arch_student_123.json", "r") as json_file:
+            learner_data = json.load(json_file)
+        learners = []
+        for i in range(5):
+            learner = Learner.from_dict(learner_data)
+            learner.learner_id = f"student_{i}"
+            learners.append(learner)
+        dcm = self.example_definitions["yaml"]["architecture"]
+        config = SVGConfig(with_popup=True)
+        dcm_chart = DcmChart(dcm)
+        results = list(dcm_chart.generate_svg_markups(learners, config=config))
+        self.assertEqual(5, len(results))
+        # the layout has been computed once
+        self.assertEqual(1, len(dcm_chart.layouts))
+        for (learner_id, svg_markup), learner in zip(results, learners):
+            self.assertEqual(learner.learner_id, learner_id)
+            single_markup = DcmChart(dcm).generate_svg_markup(
+                learner=learner, config=config
+            )
+            # ignore the timestamp comment in the first line
+            self.assertEqual(
+                single_markup.split("\n", 1)[1], svg_markup.split("\n", 1)[1]
+            )
+
+    def check_incremental(self, ct: CompetenceTree):
+        """
+        check the incrementally updated state of the given tree
+        against a full update_paths of a copy
+        """
+        ct_copy = CompetenceTree.from_dict(ct.to_dict())
+        self.assertEqual(set(ct_copy.elements_by_path), set(ct.elements_by_path))
+        self.assertEqual(ct_copy.total_elements, ct.total_elements)
+        self.assertEqual(ct_copy.total_levels, ct.total_levels)
+        for path, element in ct.elements_by_path.items():
+            self.assertEqual(path, element.path)
+            if element is not ct:
+                self.assertIs(ct, element.competence_tree)
+
+    def test_update_paths_counts(self):
+        """
+        test that repeated update_paths calls do not double count
+        """
+        ct = self.example_definitions["yaml"]["greta_v2_0"].competence_tree
+        total_elements = dict(ct.total_elements)
+        ct.update_paths()
+        ct.update_paths()
+        self.assertEqual(total_elements, ct.total_elements)
+
+    def test_tree_mutations(self):
+        """
+        test adding, removing and moving aspects, areas and facets
+        """
+        ct = CompetenceTree(name="Tree", id="tree")
+        self.assertEqual(1, ct.total_levels)
+        ct.add_element("tree", CompetenceAspect(name="Aspect", id="aspect"))
+        self.assertEqual(2, ct.total_levels)
+        area = CompetenceArea(
+            name="Area", id="area", facets=[CompetenceFacet(name="Facet", id="f1")]
+        )
+        ct.add_element("tree/aspect", area)
+        self.assertEqual(4, ct.total_levels)
+        self.assertIs(area, ct.elements_by_path["tree/aspect/area/f1"].area)
+        ct.add_element("tree/aspect/area", CompetenceFacet(name="F0", id="f0"), 0)
+        self.assertEqual(["f0", "f1"], [facet.id for facet in area.facets])
+        self.check_incremental(ct)
+        for parent_path, element in [
+            ("tree/aspect/area", CompetenceArea(name="Area", id="area2")),
+            ("tree/aspect/area", CompetenceFacet(name="Facet", id="f1")),
+            ("tree/aspect/area/f1", CompetenceAspect(name="Aspect", id="a2")),
+            ("tree/invalid", CompetenceFacet(name="Facet", id="f2")),
+        ]:
+            with self.assertRaises(ValueError):
+                ct.add_element(parent_path, element)
+        with self.assertRaises(ValueError):
+            ct.remove_element("tree")
+        ct.remove_element("tree/aspect/area/f0")
+        ct.remove_element("tree/aspect/area/f1")
+        self.assertEqual(3, ct.total_levels)
+        self.assertNotIn("tree/aspect/area/f1", ct.elements_by_path)
+        self.check_incremental(ct)
+        # a facet can not be moved into its own subtree
+        subfacet = CompetenceFacet(name="Subfacet", id="s")
+        ct.add_element(
+            "tree/aspect/area", CompetenceFacet(name="F", id="f", facets=[subfacet])
+        )
+        paths = list(ct.elements_by_path)
+        total_elements = dict(ct.total_elements)
+        for parent_path in ["tree/aspect/area/f", "tree/aspect/area/f/s"]:
+            with self.assertRaises(ValueError):
+                ct.move_element("tree/aspect/area/f", parent_path)
+            self.assertEqual(paths, list(ct.elements_by_path))
+            self.assertEqual(total_elements, ct.total_elements)
+            self.assertIsNone(subfacet.facets)
+        self.check_incremental(ct)
+        # move an area with its facets to another aspect
+        ct = self.example_definitions["yaml"]["greta_v2_0"].competence_tree
+        dcm_chart = DcmChart(DynamicCompetenceMap(ct))
+        config = SVGConfig()
+        layout = dcm_chart.get_layout(ct, config)
+        source, target = ct.aspects[0], ct.aspects[1]
+        area = source.areas[0]
+        total_areas = len(target.areas)
+        ct.move_element(area.path, target.path, 0)
+        self.assertIs(area, target.areas[0])
+        self.assertIs(target, area.aspect)
+        self.assertEqual(total_areas + 1, len(target.areas))
+        for facet in area.facets:
+            self.assertTrue(facet.path.startswith(f"{target.path}/{area.id}/"))
+            self.assertIs(facet, ct.lookup_by_path(facet.path))
+        self.check_incremental(ct)
+        # a failed move changes nothing
+        with self.assertRaises(ValueError):
+            ct.move_element(area.path, ct.path)
+        self.assertIs(area, target.areas[0])
+        # the layout of the changed tree is recomputed
+        moved_layout = dcm_chart.get_layout(ct, config)
+        self.assertIsNot(layout, moved_layout)
+        self.assertIn(area.path, moved_layout.segments_by_path)
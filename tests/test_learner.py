@@ -7,7 +7,7 @@ import json
 
 from ngwidgets.basetest import Basetest
 
-from dcm.dcm_core import DynamicCompetenceMap, Learner
+from dcm.dcm_core import Achievement, DynamicCompetenceMap, Learner
 
 
 class TestLearner(Basetest):
@@ -37,3 +37,47 @@ class TestLearner(Basetest):
             self.assertEqual("architecture", tree_ids[0])
             for achievement in learner.achievements:
                 self.assertTrue(achievement.path in learner.achievements_by_path)
+
+    def test_achievement_path_parts(self):
+        """
+        test that the path of an achievement is parsed once
+        """
+        achievements = [
+            Achievement.from_dict({"path": "tree/aspect/area/facet", "level": i})
+            for i in range(3)
+        ]
+        first, second = achievements[0], achievements[1]
+        self.assertEqual(("tree", "aspect", "area", "facet"), first.path_parts)
+        # the parsed path is cached and the ids are shared
+        self.assertIs(first.path_parts, first.path_parts)
+        self.assertIs(first.facet_id, second.facet_id)
+        self.assertEqual("tree", first.tree_id)
+        self.assertEqual("aspect", first.aspect_id)
+        self.assertEqual("area", first.area_id)
+        # the cache is not part of the JSON representation
+        self.assertEqual(
+            {"path", "level", "score", "score_unit", "evidence", "date_assessed_iso"},
+            set(first.to_dict().keys()),
+        )
+        # a new path is parsed again
+        first.path = "other/aspect"
+        self.assertEqual("other", first.tree_id)
+        self.assertIsNone(first.area_id)
+        self.assertIsNone(first.facet_id)
+
+    def test_group_achievements(self):
+        """
+        test grouping many achievements by their ids
+        """
+        achievements = [
+            Achievement(path=f"tree/aspect{i % 3}/area{i % 7}/facet{i}", level=1)
+            for i in range(5000)
+        ]
+        achievements_by_area = {}
+        for achievement in achievements:
+            achievements_by_area.setdefault(achievement.area_id, []).append(achievement)
+        self.assertEqual(7, len(achievements_by_area))
+        # all achievements of an area share the same id object
+        # - grouping again needs no new strings
+        area_ids = {id(achievement.area_id) for achievement in achievements}
+        self.assertEqual(7, len(area_ids))
@@ -0,0 +1,86 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import json
+import os
+import time
+
+import yaml
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_core import DynamicCompetenceMap, YamlSafeLoader, orjson
+
+
+class TestMarkupLoading(Basetest):
+    """
+    benchmark the JSON and YAML loaders on the example files
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.example_files = {"json": [], "yaml": []}
+        for dirpath, _dirnames, filenames in os.walk(
+            DynamicCompetenceMap.examples_path()
+        ):
+            for filename in sorted(filenames):
+                markup = os.path.splitext(filename)[1][1:]
+                if markup in self.example_files:
+                    with open(os.path.join(dirpath, filename), "r") as file:
+                        self.example_files[markup].append((filename, file.read()))
+
+    def time_loader(self, loader, text: str, repeat: int) -> float:
+        """
+        get the average time in seconds the given loader needs for the given text
+        """
+        start = time.perf_counter()
+        for _i in range(repeat):
+            loader(text)
+        elapsed = (time.perf_counter() - start) / repeat
+        return elapsed
+
+    def benchmark(self, markup: str, loaders: dict, repeat: int = 3):
+        """
+        compare the given loaders on all example files of the given markup
+        """
+        debug = self.debug
+        # debug=True
+        totals = {name: 0.0 for name in loaders}
+        for filename, text in self.example_files[markup]:
+            results = {}
+            for name, loader in loaders.items():
+                results[name] = loader(text)
+                totals[name] += self.time_loader(loader, text, repeat)
+            # all loaders need to give the same result
+            reference = next(iter(results.values()))
+            for name, result in results.items():
+                self.assertEqual(reference, result, f"{name} differs for {filename}")
+        if debug:
+            for name, total in totals.items():
+                print(f"{markup} {name}: {total*1000:.3f} ms")
+        return totals
+
+    def test_yaml_loaders(self):
+        """
+        compare the pure python and the libyaml loader
+        """
+        loaders = {
+            "SafeLoader": lambda text: yaml.load(text, Loader=yaml.SafeLoader),
+            "default": lambda text: DynamicCompetenceMap.parse_markup(text, "yaml"),
+        }
+        totals = self.benchmark("yaml", loaders)
+        if YamlSafeLoader is not yaml.SafeLoader:
+            self.assertLess(totals["default"], totals["SafeLoader"])
+
+    def test_json_loaders(self):
+        """
+        compare the json module and orjson
+        """
+        loaders = {
+            "json": json.loads,
+            "default": lambda text: DynamicCompetenceMap.parse_markup(text, "json"),
+        }
+        if orjson:
+            loaders["orjson"] = orjson.loads
+        self.benchmark("json", loaders)
@@ -0,0 +1,230 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import copy
+import gzip
+import time
+import xml.etree.ElementTree as ET
+from typing import Tuple
+from unittest.mock import patch
+
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_chart import DcmChart
+from dcm.dcm_core import (
+    Achievement,
+    CompetenceLevel,
+    CompetenceTree,
+    DynamicCompetenceMap,
+    Learner,
+)
+from dcm.svg import DonutSegment, SVGConfig
+
+
+class TestRenderPerformance(Basetest):
+    """
+    benchmark rendering the GRETA example with stacked levels
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        examples = DynamicCompetenceMap.get_examples(CompetenceTree, "yaml")
+        self.dcm = examples["greta_v2_0"]
+        competence_tree = self.dcm.competence_tree
+        max_level = competence_tree.total_valid_levels
+        # a learner with the highest level for all facets gives the most stacked segments
+        achievements = [
+            Achievement(path=path, level=max_level)
+            for path, element in competence_tree.elements_by_path.items()
+            if element.__class__.__name__ == "CompetenceFacet"
+        ]
+        self.learner = Learner(learner_id="greta_learner", achievements=achievements)
+
+    def time_render(self, repeat: int = 20) -> float:
+        """
+        get the average time in seconds to render the greta chart for the learner
+        """
+        elapsed, _svg_markup = self.render(repeat=repeat)
+        return elapsed
+
+    def render(self, repeat: int = 20) -> Tuple[float, str]:
+        """
+        render the greta chart for the learner
+
+        Returns:
+            Tuple[float,str]: the average time in seconds and the svg markup
+        """
+        config = SVGConfig(with_popup=True)
+        dcm_chart = DcmChart(self.dcm)
+        start = time.perf_counter()
+        for _i in range(repeat):
+            svg_markup = dcm_chart.generate_svg_markup(
+                learner=self.learner, config=config, text_mode="curved"
+            )
+        elapsed = (time.perf_counter() - start) / repeat
+        return elapsed, svg_markup
+
+    def test_no_deepcopy(self):
+        """
+        rendering needs no deep copies - compare with
+        deriving the segments and configs by deep copies
+        """
+        debug = self.debug
+        # debug=True
+
+        def copy_segment(segment: DonutSegment, **changes) -> DonutSegment:
+            segment = copy.deepcopy(segment)
+            for name, value in changes.items():
+                object.__setattr__(segment, name, value)
+            return segment
+
+        def copy_config(node_config, **changes):
+            node_config = copy.deepcopy(node_config)
+            for name, value in changes.items():
+                setattr(node_config, name, value)
+            return node_config
+
+        # warm up the layout cache
+        self.render(repeat=1)
+        with patch("copy.deepcopy", wraps=copy.deepcopy) as deepcopy:
+            elapsed, svg_markup = self.render(repeat=5)
+        self.assertEqual(0, deepcopy.call_count)
+        # the previous rendering path copied each derived segment and config
+        with patch.object(DonutSegment, "replace", copy_segment), patch(
+            "dcm.dcm_chart.replace", copy_config
+        ), patch("copy.deepcopy", wraps=copy.deepcopy) as deepcopy:
+            copy_elapsed, copy_markup = self.render(repeat=5)
+        self.assertTrue(deepcopy.call_count > 0)
+        # the markup has a timestamp
+        self.assertEqual(svg_markup.split("\n")[1:], copy_markup.split("\n")[1:])
+        if debug:
+            print(
+                f"greta render: {elapsed*1000:.2f} ms "
+                f"with deep copies: {copy_elapsed*1000:.2f} ms"
+            )
+
+    def test_segment_derivation(self):
+        """
+        compare deriving a stacked segment by replace with a deep copy
+        """
+        debug = self.debug
+        # debug=True
+        segment = DonutSegment(
+            cx=300, cy=300, inner_radius=50, outer_radius=250, end_angle=90
+        )
+        repeat = 2000
+        start = time.perf_counter()
+        for i in range(repeat):
+            stacked_segment = copy.deepcopy(segment)
+            object.__setattr__(stacked_segment, "outer_radius", 100 + i % 100)
+        deepcopy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(repeat):
+            stacked_segment = segment.replace(outer_radius=100 + i % 100)
+        replace_time = time.perf_counter() - start
+        # the wall clock times are only reported - they are too noisy for an assertion
+        if debug:
+            print(
+                f"deepcopy: {deepcopy_time*1000:.2f} ms replace: {replace_time*1000:.2f} ms"
+            )
+        self.assertEqual(250, segment.outer_radius)
+        self.assertEqual(199, stacked_segment.outer_radius)
+        self.assertIsNot(segment, stacked_segment)
+
+    def test_compact_size(self):
+        """
+        compare the size of the default and the compact markup
+        of all example trees
+        """
+        debug = self.debug
+        # debug=True
+        examples = DynamicCompetenceMap.get_examples(CompetenceTree, "yaml")
+        for tree_id, dcm in examples.items():
+            sizes = {}
+            for compact in [False, True]:
+                config = SVGConfig(with_popup=True, compact=compact)
+                svg_markup = DcmChart(dcm).generate_svg_markup(
+                    config=config, with_java_script=False, text_mode="curved"
+                )
+                if compact:
+                    # the compact markup is still well formed
+                    root = ET.fromstring(svg_markup)
+                    self.assertTrue(root.tag.endswith("svg"))
+                    self.assertNotIn("<!--", svg_markup)
+                    self.assertNotIn("font-family=", svg_markup)
+                raw_size = len(svg_markup.encode("utf-8"))
+                gzip_size = len(gzip.compress(svg_markup.encode("utf-8")))
+                sizes[compact] = (raw_size, gzip_size)
+            if debug:
+                (raw, gz), (compact_raw, compact_gz) = sizes[False], sizes[True]
+                print(
+                    f"{tree_id}: {raw} -> {compact_raw} bytes "
+                    f"({compact_raw/raw:.0%}) gzip {gz} -> {compact_gz} bytes"
+                )
+            self.assertLess(sizes[True][0], sizes[False][0])
+            self.assertLess(sizes[True][1], sizes[False][1])
+
+    def test_level_lookups(self):
+        """
+        the render hot path looks up the levels without scanning them
+        """
+        debug = self.debug
+        # debug=True
+
+        class CountingList(list):
+            """
+            a list that counts how often it is iterated
+            """
+
+            iterations = 0
+
+            def __iter__(self):
+                CountingList.iterations += 1
+                return super().__iter__()
+
+        competence_tree = self.dcm.competence_tree
+        levels = competence_tree.levels
+        try:
+            competence_tree.levels = CountingList(levels)
+            # build the level index
+            self.time_render(repeat=1)
+            CountingList.iterations = 0
+            elapsed = self.time_render(repeat=1)
+            if debug:
+                print(
+                    f"greta render: {elapsed*1000:.2f} ms {CountingList.iterations} level scans"
+                )
+            # only the legend iterates the levels - not the segments
+            self.assertLessEqual(CountingList.iterations, 2)
+        finally:
+            competence_tree.levels = levels
+        # the lookups do not scan the levels whatever their number
+        for level_count in [5, 500]:
+            competence_tree = CompetenceTree(
+                name="levels",
+                levels=CountingList(
+                    CompetenceLevel(name=f"level {i}", level=i, color_code="#ff0000")
+                    for i in range(1, level_count + 1)
+                ),
+            )
+            # build the level index
+            self.assertEqual(level_count, competence_tree.total_valid_levels)
+            CountingList.iterations = 0
+            start = time.perf_counter()
+            for _i in range(10000):
+                competence_tree.get_level_color(level_count)
+                competence_tree.get_level_ratio(level_count)
+            lookup_time = time.perf_counter() - start
+            # the wall clock times are only reported - they are too noisy for an assertion
+            if debug:
+                print(f"{level_count} levels: {lookup_time*1000:.2f} ms")
+            self.assertEqual(0, CountingList.iterations)
+            self.assertEqual(1.0, competence_tree.get_level_ratio(level_count))
+        # changing the levels invalidates the index
+        competence_tree.levels = competence_tree.levels[:10]
+        self.assertEqual(10, competence_tree.total_valid_levels)
+        competence_tree.levels.append(CompetenceLevel(name="extra", level=11))
+        competence_tree.invalidate_levels()
+        self.assertEqual(11, competence_tree.total_valid_levels)
@@ -0,0 +1,136 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_cache import TreeRegistry
+from dcm.dcm_catalog import ExampleCatalog
+from dcm.dcm_cmd import CompetenceCmd
+from dcm.dcm_core import DynamicCompetenceMap
+from dcm.dcm_snapshot import CompetenceTreeSnapshot
+from dcm.dcm_webserver import DynamicCompentenceMapWebServer
+
+
+class TestSnapshot(Basetest):
+    """
+    test the compiled binary snapshots of competence trees
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root_path = os.path.join(self.tmp_dir, "examples")
+        shutil.copytree(DynamicCompetenceMap.examples_path(), self.root_path)
+        # do not record the compiled test directories in the home directory
+        self.compiled_dirs_patch = patch.object(
+            CompetenceTreeSnapshot,
+            "compiled_dirs_path",
+            os.path.join(self.tmp_dir, "snapshot_dirs.json"),
+        )
+        self.compiled_dirs_patch.start()
+
+    def tearDown(self):
+        Basetest.tearDown(self)
+        self.compiled_dirs_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        """
+        test saving and loading snapshots of all example trees
+        """
+        examples = DynamicCompetenceMap.get_examples(markup="yaml")
+        for tree_id, dcm in examples.items():
+            ct = dcm.competence_tree
+            snapshot_path = os.path.join(self.tmp_dir, f"{tree_id}.dcmsnap")
+            CompetenceTreeSnapshot.save(ct, snapshot_path, "0" * 64)
+            ct2, digest = CompetenceTreeSnapshot.load(snapshot_path)
+            self.assertEqual("0" * 64, digest)
+            self.assertEqual(ct.to_json(), ct2.to_json())
+            self.assertEqual(list(ct.elements_by_path), list(ct2.elements_by_path))
+            self.assertEqual(ct.total_elements, ct2.total_elements)
+            # the parent references are restored
+            for aspect in ct2.aspects:
+                self.assertIs(ct2, aspect.competence_tree)
+                self.assertIs(aspect, ct2.elements_by_path[aspect.path])
+                for area in aspect.areas:
+                    self.assertIs(aspect, area.aspect)
+                    for facet in area.facets:
+                        self.assertIs(area, facet.area)
+
+    def test_stale_snapshot(self):
+        """
+        test that snapshots of another schema or of another source are ignored
+        """
+        greta_path = os.path.join(self.root_path, "greta.yaml")
+        snapshot_path = CompetenceTreeSnapshot.compile_file(greta_path)
+        self.assertIsNotNone(CompetenceTreeSnapshot.load_fresh(greta_path))
+        with patch.object(
+            CompetenceTreeSnapshot, "get_schema_hash", return_value="1" * 64
+        ):
+            self.assertIsNone(CompetenceTreeSnapshot.load(snapshot_path))
+        # a changed definition is detected even if it is older than the snapshot
+        stat = os.stat(snapshot_path)
+        with open(greta_path, "a") as greta_file:
+            greta_file.write("# changed\n")
+        os.utime(greta_path, (stat.st_atime, stat.st_mtime - 10))
+        self.assertIsNone(CompetenceTreeSnapshot.load_fresh(greta_path))
+
+    def test_precompile(self):
+        """
+        test the precompile command line option and that the catalog
+        prefers the snapshots
+        """
+        cmd = CompetenceCmd(
+            config=DynamicCompentenceMapWebServer.get_config(),
+            webserver_cls=DynamicCompentenceMapWebServer,
+        )
+        exit_code = cmd.cmd_main(["--precompile", self.root_path])
+        self.assertEqual(0, exit_code)
+        greta_path = os.path.join(self.root_path, "greta.yaml")
+        self.assertTrue(
+            os.path.isfile(CompetenceTreeSnapshot.get_snapshot_path(greta_path))
+        )
+        # nothing is fresher than a fresh snapshot
+        self.assertEqual(0, CompetenceTreeSnapshot.compile_directory(self.root_path))
+        catalog = ExampleCatalog(
+            [self.root_path],
+            index_path=os.path.join(self.tmp_dir, "index.json"),
+            tree_registry=TreeRegistry(),
+        )
+        with patch.object(
+            DynamicCompetenceMap, "parse_markup", side_effect=Exception("parsed")
+        ):
+            dcm = catalog.get("greta_v2_0")
+        self.assertIsNotNone(dcm)
+        self.assertEqual("greta_v2_0", dcm.competence_tree.id)
+        self.assertEqual(
+            [os.path.abspath(self.root_path)],
+            CompetenceTreeSnapshot.get_compiled_directories(),
+        )
+
+    def test_uncompiled_directory(self):
+        """
+        test that snapshots are only loaded from directories
+        compiled with the precompile command
+        """
+        greta_path = os.path.join(self.root_path, "greta.yaml")
+        CompetenceTreeSnapshot.compile_file(greta_path)
+        self.assertEqual([], CompetenceTreeSnapshot.get_compiled_directories())
+        catalog = ExampleCatalog(
+            [self.root_path],
+            index_path=os.path.join(self.tmp_dir, "index.json"),
+            tree_registry=TreeRegistry(),
+        )
+        with patch.object(
+            CompetenceTreeSnapshot, "load", side_effect=Exception("loaded")
+        ):
+            dcm = catalog.get("greta_v2_0")
+        self.assertIsNotNone(dcm)
+        self.assertEqual("greta_v2_0", dcm.competence_tree.id)
@@ -0,0 +1,261 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_core import Achievement, Learner
+from dcm.dcm_storage import (
+    JournalLearnerStorage,
+    JsonLearnerStorage,
+    LearnerStorage,
+    LearnerStore,
+    SqliteLearnerStorage,
+)
+
+
+class TestStorage(Basetest):
+    """
+    test the learner persistence
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.storage_path = tempfile.mkdtemp(prefix="dcm_storage_")
+
+    def get_learner(self, learner_id: str = "learner_1") -> Learner:
+        learner = Learner(
+            learner_id=learner_id,
+            achievements=[Achievement(path="tree/aspect/area/facet", level=1)],
+        )
+        return learner
+
+    def test_debounced_writes(self):
+        """
+        test that changes within the debounce window are coalesced
+        """
+        store = LearnerStore(self.storage_path, debounce=0.2)
+        learner = self.get_learner()
+        for level in range(1, 6):
+            learner.achievements[0].level = level
+            store.mark_dirty(learner)
+        file_path = store.storage.get_file_path(learner.file_name)
+        # nothing has been written yet
+        self.assertFalse(os.path.exists(file_path))
+        self.assertEqual(0, store.write_count)
+        # a pending change is visible before it is written
+        self.assertIs(learner, store.load(learner.file_name))
+        time.sleep(0.5)
+        store.flush().result()
+        self.assertEqual(1, store.write_count)
+        with open(file_path) as learner_file:
+            learner_data = json.load(learner_file)
+        self.assertEqual(5, learner_data["achievements"][0]["level"])
+        self.assertFalse(os.path.exists(f"{file_path}.tmp"))
+        store.close()
+
+    def test_close_flushes(self):
+        """
+        test that pending changes are written on close
+        """
+        store = LearnerStore(self.storage_path, debounce=60)
+        learners = [self.get_learner(f"learner_{i}") for i in range(3)]
+        for learner in learners:
+            store.mark_dirty(learner)
+        store.close()
+        self.assertEqual(3, store.write_count)
+        reloaded_store = LearnerStore(self.storage_path)
+        for learner in learners:
+            reloaded = reloaded_store.load(learner.file_name)
+            self.assertEqual(learner.to_json(), reloaded.to_json())
+        self.assertIsNone(reloaded_store.load("unknown"))
+        reloaded_store.close()
+
+    def test_store_now(self):
+        """
+        test storing a learner immediately
+        """
+        store = LearnerStore(self.storage_path, debounce=60)
+        learner = self.get_learner()
+        store.mark_dirty(learner)
+        file_path = asyncio.run(store.store(learner))
+        self.assertTrue(os.path.exists(file_path))
+        store.close()
+        # the pending change has been written by store already
+        self.assertEqual(1, store.write_count)
+
+    def test_journal_storage(self):
+        """
+        test the append-only journal backend
+        """
+        storage = JournalLearnerStorage(self.storage_path, compact_after=5)
+        learner = Learner(
+            learner_id="journal_learner",
+            achievements=[
+                Achievement(path=f"tree/aspect/area/facet{i}") for i in range(50)
+            ],
+        )
+        slug = learner.file_name
+        snapshot_path = storage.write(learner)
+        snapshot_size = os.path.getsize(snapshot_path)
+        journal_path = storage.get_journal_path(slug)
+        self.assertFalse(os.path.exists(journal_path))
+        # each change only appends a single entry
+        for level in range(1, 4):
+            learner.achievements[level].level = level
+            storage.write(learner)
+            self.assertEqual(snapshot_size, os.path.getsize(snapshot_path))
+        with open(journal_path) as journal_file:
+            self.assertEqual(3, len(journal_file.readlines()))
+        # unchanged learners need no entry
+        storage.write(learner)
+        self.assertEqual(3, len(storage.get_history(slug)))
+        # a partially written entry of a crash is ignored
+        with open(journal_path, "a") as journal_file:
+            journal_file.write('{"path": "tree/asp')
+        reloaded = JournalLearnerStorage(self.storage_path).load(slug)
+        self.assertEqual(learner.to_json(), reloaded.to_json())
+        # the journal is compacted into a new snapshot
+        learner.achievements[10].level = 1
+        learner.achievements[11].level = 2
+        storage.write(learner)
+        self.assertFalse(os.path.exists(journal_path))
+        self.assertEqual(5, len(storage.get_history(slug)))
+        reloaded = JournalLearnerStorage(self.storage_path).load(slug)
+        self.assertEqual(learner.to_json(), reloaded.to_json())
+
+    def test_journal_removal(self):
+        """
+        test that removed achievements are journaled and that
+        duplicated paths are replaced by identity
+        """
+        storage = JournalLearnerStorage(self.storage_path)
+        learner = Learner(
+            learner_id="journal_removal",
+            achievements=[
+                Achievement(path=f"tree/aspect/area/facet{i}") for i in range(3)
+            ],
+        )
+        # an equal achievement with the same path
+        learner.add_achievement(Achievement(path="tree/aspect/area/facet1"))
+        slug = learner.file_name
+        storage.write(learner)
+        removed = learner.achievements.pop(2)
+        del learner.achievements_by_path[removed.path]
+        learner.achievements_by_path["tree/aspect/area/facet1"].level = 3
+        storage.write(learner)
+        history = storage.get_history(slug)
+        self.assertEqual(2, len(history))
+        self.assertEqual(
+            {"path": removed.path, "deleted": True},
+            {key: value for key, value in history[1].items() if key != "timestamp"},
+        )
+        reloaded = JournalLearnerStorage(self.storage_path).load(slug)
+        self.assertEqual(learner.to_json(), reloaded.to_json())
+        self.assertNotIn(removed.path, reloaded.achievements_by_path)
+        self.assertEqual([None, None, 3], [a.level for a in reloaded.achievements])
+
+    def test_journal_store(self):
+        """
+        test the learner store with the journal backend
+        """
+        store = LearnerStore(self.storage_path, debounce=60, backend="journal")
+        learner = self.get_learner()
+        store.mark_dirty(learner)
+        store.flush().result()
+        learner.achievements[0].level = 3
+        store.mark_dirty(learner)
+        store.close()
+        reloaded_store = LearnerStore(self.storage_path, backend="journal")
+        reloaded = reloaded_store.load(learner.file_name)
+        self.assertEqual(3, reloaded.achievements[0].level)
+        # the export is a complete JSON file
+        json_path = asyncio.run(reloaded_store.store(reloaded))
+        with open(json_path) as json_file:
+            self.assertEqual(3, json.load(json_file)["achievements"][0]["level"])
+        reloaded_store.close()
+
+    def test_sqlite_storage(self):
+        """
+        test the SQLite backend and its indexed queries
+        """
+        storage = SqliteLearnerStorage(self.storage_path)
+        for i in range(5):
+            learner = Learner(
+                learner_id=f"learner {i}",
+                achievements=[
+                    Achievement(path="tree/aspect/area/facet1", level=i),
+                    Achievement(path="tree/aspect/area/facet2", level=1, score=50.0),
+                ],
+            )
+            storage.write(learner)
+        # rewriting replaces the achievements
+        storage.write(learner)
+        reloaded = storage.load(learner.file_name)
+        self.assertEqual(learner.to_json(), reloaded.to_json())
+        self.assertIsNone(storage.load("unknown"))
+        learner_ids = storage.get_learner_ids("tree/aspect/area/facet1", min_level=3)
+        self.assertEqual(["learner 3", "learner 4"], learner_ids)
+        connection = storage.get_connection()
+        journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual("wal", journal_mode)
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT slug FROM achievement WHERE path=? AND level>=?",
+            ("tree/aspect/area/facet1", 3),
+        ).fetchall()
+        self.assertIn("idx_achievement_path_level", str(plan))
+        storage.close()
+
+    def test_sqlite_migrate(self):
+        """
+        test importing a directory of learner JSON files
+        """
+        json_path = os.path.join(self.storage_path, "json")
+        os.makedirs(json_path)
+        json_storage = JsonLearnerStorage(json_path)
+        learners = [self.get_learner(f"learner_{i}") for i in range(3)]
+        for learner in learners:
+            json_storage.write(learner)
+        # files that are not learners are skipped
+        with open(os.path.join(json_path, "settings.json"), "w") as json_file:
+            json.dump({"theme": "dark"}, json_file)
+        store = LearnerStore(self.storage_path, backend="sqlite")
+        count = store.storage.migrate(json_path)
+        self.assertEqual(3, count)
+        for learner in learners:
+            reloaded = store.load(learner.file_name)
+            self.assertEqual(learner.to_json(), reloaded.to_json())
+        # the background writer uses its own connection
+        learners[0].achievements[0].level = 4
+        store.mark_dirty(learners[0])
+        store.flush().result()
+        self.assertEqual(
+            ["learner_0"],
+            store.storage.get_learner_ids("tree/aspect/area/facet", min_level=4),
+        )
+        self.assertEqual(2, len(store.storage.connections))
+        store.close()
+        self.assertEqual(0, len(store.storage.connections))
+
+    def test_incomplete_backend(self):
+        """
+        test that a backend without load can not be instantiated
+        """
+
+        class WriteOnlyStorage(LearnerStorage):
+            def write(self, learner: Learner) -> str:
+                return self.write_json(learner)
+
+        with self.assertRaises(TypeError):
+            WriteOnlyStorage(self.storage_path)
+        for backend in ["json", "journal", "sqlite"]:
+            storage = LearnerStorage.get_storage(backend, self.storage_path)
+            self.assertIsInstance(storage, LearnerStorage)
+            storage.close()
@@ -0,0 +1,218 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+from ngwidgets.basetest import Basetest
+
+from dcm.dcm_chart import DcmChart
+from dcm.dcm_compact import CompactCompetenceTree
+from dcm.dcm_core import (
+    CompetenceArea,
+    CompetenceAspect,
+    CompetenceFacet,
+    CompetenceTree,
+    DynamicCompetenceMap,
+)
+from dcm.dcm_trie import PathTrie
+from dcm.svg import SVGConfig
+
+
+class TestTrie(Basetest):
+    """
+    test the path trie and competence hierarchies of arbitrary depth
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+
+    def get_curriculum(self) -> CompetenceTree:
+        """
+        get a programme -> module -> unit -> learning outcome -> skill -> subskill curriculum
+        """
+        definition_data = {
+            "name": "Programme",
+            "id": "programme",
+            "element_names": {
+                "tree": "Programme",
+                "aspect": "Module",
+                "area": "Unit",
+                "facet": "Learning outcome",
+                "facet2": "Skill",
+                "facet3": "Subskill",
+            },
+            "levels": [{"name": "passed", "level": 1, "color_code": "#00FF00"}],
+            "aspects": [
+                {
+                    "name": f"Module {m}",
+                    "id": f"m{m}",
+                    "areas": [
+                        {
+                            "name": f"Unit {m}.{u}",
+                            "id": f"u{u}",
+                            "facets": [
+                                {
+                                    "name": f"Outcome {m}.{u}.{o}",
+                                    "id": f"o{o}",
+                                    "facets": [
+                                        {
+                                            "name": f"Skill {m}.{u}.{o}.{s}",
+                                            "id": f"s{s}",
+                                            "facets": [{"name": "Subskill", "id": "x"}],
+                                        }
+                                        for s in range(2)
+                                    ],
+                                }
+                                for o in range(2)
+                            ],
+                        }
+                        for u in range(2)
+                    ],
+                }
+                for m in range(2)
+            ],
+        }
+        competence_tree = CompetenceTree.from_dict(definition_data)
+        return competence_tree
+
+    def test_path_trie(self):
+        """
+        test the path trie operations
+        """
+        trie = PathTrie()
+        for path in ["t", "t/a", "t/a/b", "t/a/c", "t/d", "t/a/b/e"]:
+            trie.insert(path, path.upper())
+        self.assertEqual(6, len(trie))
+        self.assertEqual([1, 2, 2, 1], trie.depth_counts)
+        self.assertEqual(3, trie.max_depth)
+        self.assertEqual("T/A/B", trie.get("t/a/b"))
+        self.assertIsNone(trie.get("t/x/b"))
+        self.assertIn("t/a/c", trie)
+        self.assertNotIn("t/a/c/f", trie)
+        with self.assertRaises(ValueError):
+            trie.insert("t/x/y", "missing parent")
+        self.assertEqual(
+            ["t/a", "t/a/b", "t/a/b/e", "t/a/c"],
+            [node.path for node in trie.iter_subtree("t/a")],
+        )
+        self.assertEqual(
+            ["T", "T/A", "T/A/B"],
+            [node.element for node in trie.get_ancestors("t/a/b/e")],
+        )
+        removed = trie.remove("t/a/b")
+        self.assertEqual(["t/a/b", "t/a/b/e"], [node.path for node in removed])
+        self.assertEqual(2, trie.max_depth)
+        self.assertEqual(0, trie.get_depth_count(3))
+        self.assertEqual(4, len(trie))
+        with self.assertRaises(ValueError):
+            trie.remove("t/a/b")
+
+    def test_deep_hierarchy(self):
+        """
+        test a curriculum with subfacets
+        """
+        ct = self.get_curriculum()
+        self.assertEqual(6, ct.total_levels)
+        self.assertEqual(16, ct.get_total_elements_at_depth(5))
+        # all facets of any depth are counted as facets
+        self.assertEqual(8 + 16 + 16, ct.total_elements["facets"])
+        self.assertEqual("facet3", ct.get_hierarchy_name(5))
+        path = "programme/m1/u0/o1/s1/x"
+        subskill = ct.lookup_by_path(path)
+        self.assertIs(subskill, ct.path_trie.get(path))
+        self.assertEqual(
+            ["programme", "m1", "u0", "o1", "s1"],
+            [element.id for element in ct.get_ancestors(path)],
+        )
+        self.assertIs(ct.lookup_by_path("programme/m1/u0"), subskill.area)
+        # only facets with subfacets have a facets key
+        self.assertNotIn("facets", subskill.to_dict())
+        self.assertIn("facets", ct.lookup_by_path("programme/m1/u0/o1/s1").to_dict())
+        skill_paths = [
+            element.path for element in ct.iter_subtree("programme/m1/u0/o1")
+        ]
+        self.assertEqual(
+            [
+                "programme/m1/u0/o1",
+                "programme/m1/u0/o1/s0",
+                "programme/m1/u0/o1/s0/x",
+                "programme/m1/u0/o1/s1",
+                "programme/m1/u0/o1/s1/x",
+            ],
+            skill_paths,
+        )
+        # the paths are in the same depth first order as elements_by_path
+        self.assertEqual(
+            list(ct.elements_by_path),
+            [element.path for element in ct.iter_subtree()],
+        )
+        # yaml round trip
+        ct2 = CompetenceTree.from_yaml(ct.to_yaml())
+        self.assertEqual(list(ct.elements_by_path), list(ct2.elements_by_path))
+        # add a subskill and remove a skill
+        ct.add_element(path, CompetenceFacet(name="Subsubskill", id="y"))
+        self.assertEqual(7, ct.total_levels)
+        ct.remove_element("programme/m1/u0/o1/s1")
+        self.assertEqual(6, ct.total_levels)
+        self.assertNotIn(path, ct.elements_by_path)
+        self.assertNotIn(path, ct.path_trie)
+
+    def test_deep_chart(self):
+        """
+        test rendering a curriculum with subfacets
+        """
+        ct = self.get_curriculum()
+        config = SVGConfig()
+        dcm_chart = DcmChart(DynamicCompetenceMap(ct))
+        svg_markup = dcm_chart.generate_svg_markup(config=config)
+        layout = dcm_chart.layout
+        self.assertEqual(
+            set(ct.elements_by_path) - {ct.path}, set(layout.segments_by_path)
+        )
+        # the subskills are in the outermost ring
+        subskill_segment = layout.segments_by_path["programme/m0/u0/o0/s0/x"].segment
+        self.assertEqual(
+            max(segment.segment.outer_radius for segment in layout.segments),
+            subskill_segment.outer_radius,
+        )
+        compact_tree = CompactCompetenceTree.from_tree(ct)
+        self.assertEqual(ct.total_elements, compact_tree.total_elements)
+        self.assertEqual(ct.to_dict(), compact_tree.to_tree().to_dict())
+        compact_markup = DcmChart(
+            DynamicCompetenceMap(compact_tree)
+        ).generate_svg_markup(config=config)
+        # ignore the timestamp
+        self.assertEqual(svg_markup.split("\n")[2:], compact_markup.split("\n")[2:])
+
+    def test_deep_chain(self):
+        """
+        test that a hierarchy deeper than the recursion limit
+        is indexed and laid out iteratively
+        """
+        depth = 1200
+        facet = CompetenceFacet(name="leaf", id="f")
+        for _i in range(depth - 4):
+            facet = CompetenceFacet(name="facet", id="f", facets=[facet])
+        area = CompetenceArea(name="area", id="area", facets=[facet])
+        aspect = CompetenceAspect(name="aspect", id="aspect", areas=[area])
+        ct = CompetenceTree(name="tree", id="tree", aspects=[aspect])
+        self.assertEqual(depth, ct.total_levels)
+        leaf_path = "tree/aspect/area" + "/f" * (depth - 3)
+        self.assertEqual("leaf", ct.path_trie.get(leaf_path).name)
+        self.assertEqual(depth - 1, len(ct.get_ancestors(leaf_path)))
+        layout = DcmChart(DynamicCompetenceMap(ct)).get_layout(ct, SVGConfig())
+        self.assertEqual(depth - 1, len(layout.segments))
+        compact_tree = CompactCompetenceTree.from_tree(ct)
+        self.assertEqual(depth, compact_tree.total_levels)
+        self.assertEqual(depth - 1, compact_tree.lookup_by_path(leaf_path).kind)
+        self.assertEqual(
+            [element.path for element in ct.get_ancestors(leaf_path)],
+            [element.path for element in compact_tree.get_ancestors(leaf_path)],
+        )
+        self.assertEqual(
+            list(ct.elements_by_path), list(compact_tree.to_tree().elements_by_path)
+        )
+        compact_layout = DcmChart(DynamicCompetenceMap(compact_tree)).get_layout(
+            compact_tree, SVGConfig()
+        )
+        self.assertEqual(depth - 1, len(compact_layout.segments))
@@ -3,8 +3,11 @@ Created on 2024-01-24
 
 @author: wf
 """
+import copy
+import io
 import json
 import os
+import tempfile
 
 from ngwidgets.basetest import Basetest
 
@@ -62,3 +65,116 @@ class TestxApi(Basetest):
         self.assertIsNotNone(learner)
         if debug:
             print(learner.to_json(indent=2))
+
+    def get_multi_actor_statements(self, actors: int = 3) -> list:
+        """
+        get the statements of the GRETA xAPI example for the given number of actors
+        """
+        xapi = self.get_xApi_example()
+        entries = []
+        for i in range(actors):
+            for entry in xapi.xapi_dict:
+                entry = copy.deepcopy(entry)
+                stmt = entry["statement"]
+                stmt["actor"]["account"]["name"] = f"actor_{i}"
+                stmt["id"] = f"actor_{i}-{stmt['id']}"
+                entries.append(entry)
+        return entries
+
+    def test_iter_json_values(self):
+        """
+        test the incremental parsing of JSON arrays and NDJSON
+        """
+        entries = self.get_multi_actor_statements()
+        array_json = json.dumps(entries, indent=2)
+        ndjson = "\n".join(json.dumps(entry) for entry in entries)
+        for text in [array_json, ndjson, "[]", ""]:
+            expected = json.loads(text) if text.startswith("[") else None
+            # tiny chunks make the values span several chunks
+            values = list(XAPI.iter_json_values(io.StringIO(text), chunk_size=7))
+            if expected is None:
+                expected = entries if text else []
+            self.assertEqual(expected, values)
+        with self.assertRaises(json.JSONDecodeError):
+            list(XAPI.iter_json_values(io.StringIO(array_json[:-100])))
+
+    def test_stream_learners(self):
+        """
+        test streaming one learner per actor from an xAPI export
+        """
+        entries = self.get_multi_actor_statements()
+        # a statement that can not be converted is skipped
+        entries.append({"statement": {"actor": {"account": {"name": "actor_0"}}}})
+        expected = self.get_xApi_example().to_learner(self.competence_tree)
+        with tempfile.TemporaryDirectory() as tmp_path:
+            for ndjson in [False, True]:
+                json_path = os.path.join(tmp_path, "export.json")
+                with open(json_path, "w") as json_file:
+                    if ndjson:
+                        for entry in entries:
+                            json_file.write(json.dumps(entry) + "\n")
+                    else:
+                        json.dump(entries, json_file)
+                learners = list(XAPI.stream_learners(json_path, self.competence_tree))
+                learner_ids = [learner.learner_id for learner in learners]
+                self.assertEqual(["actor_0", "actor_1", "actor_2"], learner_ids)
+                for learner in learners:
+                    self.assertEqual(
+                        expected.to_dict()["achievements"],
+                        learner.to_dict()["achievements"],
+                    )
+
+    def test_merge_policy(self):
+        """
+        test merging the achievements of the same competence path
+        """
+        xapi = self.get_xApi_example()
+        entries = xapi.xapi_dict
+        path = XAPI.to_achievement(entries[0]["statement"], self.competence_tree).path
+        stmts = [
+            entry["statement"]
+            for entry in entries
+            if XAPI.to_achievement(entry["statement"], self.competence_tree).path
+            == path
+        ]
+        self.assertTrue(len(stmts) > 1)
+        timestamps = sorted(stmt["timestamp"] for stmt in stmts)
+        # give each statement of the path a different score
+        for i, stmt in enumerate(stmts):
+            stmt["result"]["score"]["raw"] = i
+        best_score = len(stmts) - 1
+        expected = {
+            "latest": timestamps[-1],
+            "first": timestamps[0],
+            "best": stmts[best_score]["timestamp"],
+        }
+        for merge_policy, timestamp in expected.items():
+            xapi.merge_policy = merge_policy
+            learner = xapi.to_learner(self.competence_tree)
+            paths = [achievement.path for achievement in learner.achievements]
+            # a single achievement per path
+            self.assertEqual(len(set(paths)), len(paths))
+            achievement = learner.achievements_by_path[path]
+            self.assertEqual(timestamp, achievement.date_assessed_iso)
+            if merge_policy == "best":
+                self.assertEqual(best_score, achievement.score)
+        with self.assertRaises(ValueError):
+            XAPI("random")
+
+    def test_dedupe(self):
+        """
+        test that duplicate statements are only imported once
+        """
+        xapi = self.get_xApi_example()
+        entries = xapi.xapi_dict
+        learner = xapi.to_learner(self.competence_tree)
+        # a conversion can be repeated
+        self.assertEqual(
+            learner.to_json(), xapi.to_learner(self.competence_tree).to_json()
+        )
+        self.assertEqual(1, len(list(xapi.to_learners(self.competence_tree))))
+        xapi = XAPI()
+        learners = list(xapi.to_learners(self.competence_tree, entries + entries))
+        self.assertEqual(len(entries), xapi.duplicates)
+        self.assertEqual(1, len(learners))
+        self.assertEqual(learner.to_json(), learners[0].to_json())
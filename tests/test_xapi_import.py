@@ -0,0 +1,105 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+import copy
+import json
+import os
+import tempfile
+
+from ngwidgets.basetest import Basetest
+from ngwidgets.progress import Progressbar
+
+from dcm.dcm_core import CompetenceTree
+from dcm.dcm_storage import JsonLearnerStorage
+from dcm.xapi import XAPI
+from dcm.xapi_import import XAPIImporter
+
+
+class CountingProgressbar(Progressbar):
+    """
+    a progress bar that just counts
+    """
+
+    def __init__(self, total: int):
+        super().__init__(total, 0, "xAPI import", "file")
+
+    def update(self, step):
+        self.value += step
+
+
+class TestXAPIImport(Basetest):
+    """
+    test the parallel import of many xAPI exports
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+        yaml_path = os.path.join(base_path, "dcm_examples", "greta.yaml")
+        self.competence_tree = CompetenceTree.load_from_file(yaml_path)
+        json_path = os.path.join(base_path, "greta", "greta_xapi_example1.json")
+        self.xapi = XAPI.from_json(json_path)
+
+    def write_export(self, json_path: str, actors: list):
+        """
+        write an export with the example statements for each of the given actors
+        """
+        entries = []
+        for actor in actors:
+            for entry in self.xapi.xapi_dict:
+                entry = copy.deepcopy(entry)
+                stmt = entry["statement"]
+                stmt["actor"]["account"]["name"] = actor
+                stmt["id"] = f"{actor}-{stmt['id']}"
+                entries.append(entry)
+        with open(json_path, "w") as json_file:
+            json.dump(entries, json_file)
+
+    def test_import_files(self):
+        """
+        test importing several exports with overlapping actors
+        """
+        debug = self.debug
+        # debug=True
+        # the example has several statements per competence path
+        paths = {
+            XAPI.to_achievement(entry["statement"], self.competence_tree).path
+            for entry in self.xapi.xapi_dict
+        }
+        with tempfile.TemporaryDirectory() as tmp_path:
+            json_file_paths = []
+            for i in range(4):
+                json_path = os.path.join(tmp_path, f"export_{i}.json")
+                # actor_0 is in all exports
+                self.write_export(json_path, ["actor_0", f"actor_{i+1}"])
+                json_file_paths.append(json_path)
+            invalid_path = os.path.join(tmp_path, "invalid.json")
+            with open(invalid_path, "w") as invalid_file:
+                invalid_file.write('[{"statement": ')
+            json_file_paths.append(invalid_path)
+            storage_path = os.path.join(tmp_path, "storage")
+            os.makedirs(storage_path)
+            importer = XAPIImporter(self.competence_tree, storage_path, max_workers=2)
+            progress_bar = CountingProgressbar(len(json_file_paths))
+            report = importer.import_files(json_file_paths, progress_bar=progress_bar)
+            if debug:
+                print(report.summary())
+            self.assertEqual(5, progress_bar.value)
+            self.assertEqual(4, report.files)
+            self.assertEqual([invalid_path], report.failed)
+            self.assertEqual(5, report.learners)
+            # a single achievement per learner and path
+            self.assertEqual(5 * len(paths), report.achievements)
+            storage = JsonLearnerStorage(storage_path)
+            learner = storage.load("actor_0")
+            self.assertEqual(len(paths), len(learner.achievements))
+            self.assertIn("files/s", report.summary())
+            # importing the same exports again changes nothing
+            with open(storage.get_file_path("actor_0")) as learner_file:
+                learner_json = learner_file.read()
+            report = importer.import_files(json_file_paths[:4])
+            self.assertEqual(5 * len(paths), report.achievements)
+            with open(storage.get_file_path("actor_0")) as learner_file:
+                self.assertEqual(learner_json, learner_file.read())